@@ -1,6 +1,46 @@
 from django.apps import AppConfig
+from django.conf import settings
+from django.core import checks
+
+# Backends de cache cujo conteúdo fica em cada processo (ou não é guardado)
+BACKENDS_CACHE_LOCAIS = (
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+)
+
+
+def verificar_cache_compartilhado(app_configs=None, **kwargs) -> list:
+    """
+        Verificação de deploy (``check --deploy``) do cache ``default`` local de cada processo.
+
+        As versões usadas por ``invalidar_permissoes`` e os contadores do limite
+        de tentativas de login ficam no cache ``default``; com ``LocMemCache``
+        e vários workers, a alteração de um perfil só invalidaria o cache do
+        worker que a atendeu e o limite de login valeria por worker. Com um
+        único processo, defina ``CACHE_LOCAL_PERMITIDO=True``.
+
+        Returns:
+            list: Erro ``core.E001`` se o cache ``default`` é local e ``CACHE_LOCAL_PERMITIDO`` está desativado.
+    """
+    backend = settings.CACHES["default"]["BACKEND"]
+    if settings.CACHE_LOCAL_PERMITIDO or backend not in BACKENDS_CACHE_LOCAIS:
+        return []
+    return [checks.Error(
+        f"O limite de tentativas de login e o cache de permissões exigem um cache compartilhado entre os "
+        f"workers, mas CACHE_BACKEND é {backend}.",
+        hint="Configure o Redis (CACHE_BACKEND/CACHE_LOCATION) ou, com um único processo, defina "
+             "CACHE_LOCAL_PERMITIDO=True.",
+        id="core.E001",
+    )]
 
 
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
+
+    def ready(self):
+        checks.register(verificar_cache_compartilhado, checks.Tags.caches, deploy=True)
+        # Registra as métricas de conexões/pool do banco de dados
+        from core import conexoes  # noqa: F401
+        # Invalida as permissões em cache ao alterar grupos e permissões
+        from core import permissoes  # noqa: F401
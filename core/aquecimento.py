@@ -0,0 +1,260 @@
+import importlib
+import importlib.util
+import logging
+import os
+import pkgutil
+import sys
+import time
+from pathlib import Path
+
+from django.apps import apps
+from django.conf import settings
+from django.contrib.auth import get_backends
+from django.contrib.auth.hashers import get_hashers
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import caches
+from django.db import connections
+from django.template import engines
+from django.urls import get_resolver, URLResolver
+
+from core.importacoes import medidor
+from core.metricas import registro
+
+logger = logging.getLogger(__name__)
+
+registro.definir("aquecimento_etapa_seconds", "gauge",
+                 "Duração de cada etapa do aquecimento na inicialização do worker, por etapa.")
+registro.definir("aquecimento_importacao_seconds", "gauge",
+                 "Tempo de importação de cada módulo das apps do projeto no aquecimento, por módulo.")
+
+# Módulos de cada app carregados pelo servidor ao atender requisições
+MODULOS_SERVIDOR = ("models", "admin", "views", "urls")
+
+
+def _apps_do_projeto() -> list:
+    """
+        Apps instaladas cujo código está no projeto (``BASE_DIR``), sem as do Django.
+    """
+    base = Path(settings.BASE_DIR).resolve()
+    return [app for app in apps.get_app_configs() if base in Path(app.path).resolve().parents]
+
+
+def modulos_servidor() -> list[str]:
+    """
+        Módulos que o servidor importa ao atender requisições: middlewares, ``MODULOS_SERVIDOR`` e as
+        bibliotecas de ``templatetags`` de cada app do projeto e o URLconf raiz.
+
+        Módulos usados apenas por comandos (benchmarks, cargas, seeds) ficam de fora.
+    """
+    modulos = [caminho.rsplit(".", 1)[0] for caminho in settings.MIDDLEWARE]
+    for app in _apps_do_projeto():
+        modulos += [f"{app.name}.{nome}" for nome in MODULOS_SERVIDOR]
+        tags = importlib.util.find_spec(f"{app.name}.templatetags")
+        if tags is not None:
+            modulos += [modulo.name for modulo in pkgutil.iter_modules(tags.submodule_search_locations,
+                                                                         prefix=f"{app.name}.templatetags.")]
+    # Por último: o URLconf raiz importaria as views de todas as apps de uma vez
+    modulos.append(settings.ROOT_URLCONF)
+    return [nome for nome in dict.fromkeys(modulos) if importlib.util.find_spec(nome) is not None]
+
+
+def importar_modulos() -> dict:
+    """
+        Importa os módulos de ``modulos_servidor`` e mede a importação de cada um.
+
+        O tempo é inclusivo: um módulo importado por outro entra no tempo de
+        quem o importou primeiro. Para módulos já carregados (ex: ``models`` e
+        ``admin``, importados pelo ``django.setup()``) vale o tempo medido pelo
+        ``medidor`` instalado em ``project/wsgi.py``/``project/asgi.py``; sem
+        ele ficam com ``0``.
+
+        Returns:
+            dict: Nome do módulo -> segundos de importação.
+    """
+    tempos = {}
+    for nome in modulos_servidor():
+        if nome in sys.modules:
+            tempos[nome] = medidor.tempos.get(nome, 0.0)
+            continue
+        inicio = time.perf_counter()
+        importlib.import_module(nome)
+        tempos[nome] = time.perf_counter() - inicio
+    return tempos
+
+
+def _compilar_padroes(resolver: URLResolver) -> int:
+    total = 0
+    for padrao in resolver.url_patterns:
+        # A expressão regular de cada rota é compilada no primeiro acesso
+        padrao.pattern.regex
+        total += 1
+        if isinstance(padrao, URLResolver):
+            total += _compilar_padroes(padrao)
+    return total
+
+
+def resolver_urls() -> int:
+    """
+        Importa os URLconfs, monta o índice do ``reverse`` e compila as expressões de todas as rotas.
+    """
+    resolver = get_resolver()
+    resolver.reverse_dict
+    return _compilar_padroes(resolver)
+
+
+def compilar_templates() -> int:
+    """
+        Compila os templates do projeto e das apps do projeto, guardando-os no loader em cache.
+
+        Os templates do admin do Django ficam de fora: são compilados no primeiro acesso.
+
+        Returns:
+            int: Quantidade de templates compilados.
+    """
+    total = 0
+    for engine in engines.all():
+        diretorios = list(engine.dirs) + [Path(app.path) / "templates" for app in _apps_do_projeto()]
+        for diretorio in diretorios:
+            for arquivo in sorted(Path(diretorio).rglob("*.html")):
+                engine.get_template(arquivo.relative_to(diretorio).as_posix())
+                total += 1
+    return total
+
+
+def carregar_autenticacao() -> None:
+    """
+        Instancia os backends de autenticação e os hashers de senha.
+    """
+    get_backends()
+    get_hashers()
+
+
+def abrir_conexoes() -> int:
+    """
+        Abre o pool de conexões (``DB_POOL``) de cada banco que o configura.
+
+        Com o pool do psycopg a conexão volta ao pool, que fica aberto com
+        ``min_size`` conexões para qualquer thread do worker. Bancos sem pool
+        ficam de fora: a conexão pertenceria à thread do aquecimento e ficaria
+        ociosa em workers ASGI ou com várias threads (``gthread``).
+
+        Returns:
+            int: Quantidade de pools abertos.
+    """
+    total = 0
+    for alias in connections:
+        conexao = connections[alias]
+        if not conexao.settings_dict.get("OPTIONS", {}).get("pool"):
+            continue
+        conexao.ensure_connection()
+        conexao.close()
+        total += 1
+    return total
+
+
+def preparar_caches() -> None:
+    """
+        Abre a conexão de cada cache e preenche o cache de ``ContentType`` (permissões, admin) em uma consulta.
+    """
+    for cache in caches.all():
+        cache.get("aquecimento")
+    ContentType.objects.get_for_models(*apps.get_models())
+
+
+ETAPAS = {
+    "importacao": importar_modulos,
+    "urls": resolver_urls,
+    "templates": compilar_templates,
+    "autenticacao": carregar_autenticacao,
+    "conexoes": abrir_conexoes,
+    "caches": preparar_caches,
+}
+
+
+def aquecer(conexoes: bool = True) -> dict:
+    """
+        Carrega antecipadamente o que o Django carregaria na primeira requisição de cada worker.
+
+        Importa os módulos das apps, resolve as rotas, compila os templates,
+        instancia os backends de autenticação, abre os pools de conexões e
+        prepara os caches. Uma etapa que falha (ex: banco indisponível na inicialização)
+        é registrada e não impede as demais nem a inicialização do worker.
+
+        As durações ficam nas métricas ``aquecimento_etapa_seconds`` e
+        ``aquecimento_importacao_seconds``.
+
+        Args:
+            conexoes (bool): Abre os pools de conexões e os caches. Use ``False`` em um
+                processo que fará fork dos workers (ex: ``gunicorn --preload``).
+
+        Returns:
+            dict: ``etapas`` (etapa -> segundos), ``modulos`` (módulo -> segundos) e ``erros`` (etapa -> mensagem).
+    """
+    resultado = {"etapas": {}, "modulos": {}, "erros": {}}
+    for etapa, funcao in ETAPAS.items():
+        if not conexoes and etapa in ("conexoes", "caches"):
+            continue
+        inicio = time.perf_counter()
+        try:
+            retorno = funcao()
+        except Exception as e:
+            logger.warning("Falha no aquecimento (%s): %s", etapa, e)
+            resultado["erros"][etapa] = str(e)
+            retorno = None
+        resultado["etapas"][etapa] = time.perf_counter() - inicio
+        if etapa == "importacao" and retorno:
+            resultado["modulos"] = retorno
+
+    for etapa, segundos in resultado["etapas"].items():
+        registro.ajustar("aquecimento_etapa_seconds", (("etapa", etapa),), segundos)
+    for modulo, segundos in resultado["modulos"].items():
+        registro.ajustar("aquecimento_importacao_seconds", (("modulo", modulo),), segundos)
+    return resultado
+
+
+def aquecer_na_inicializacao(inicio: float) -> dict | None:
+    """
+        Aquece o worker ao carregar a aplicação (``project/wsgi.py`` e ``project/asgi.py``).
+
+        Com ``AQUECIMENTO_PRELOAD`` (``gunicorn --preload``) a aplicação é
+        carregada no processo mestre: o aquecimento roda sem conexões, herdado
+        pelos workers no fork, e cada worker abre as próprias conexões logo
+        após o fork.
+
+        Args:
+            inicio (float): ``time.perf_counter()`` no início do módulo de entrada, para medir o ``django.setup()``.
+
+        Returns:
+            dict | None: Resultado de ``aquecer`` ou ``None`` se ``AQUECIMENTO`` estiver desativado.
+    """
+    if not settings.AQUECIMENTO:
+        return None
+
+    inicializacao = time.perf_counter() - inicio
+    registro.ajustar("aquecimento_etapa_seconds", (("etapa", "inicializacao"),), inicializacao)
+    resultado = aquecer(conexoes=not settings.AQUECIMENTO_PRELOAD)
+    if settings.AQUECIMENTO_PRELOAD:
+        mestre = os.getpid()
+        # Apenas os filhos diretos do mestre (workers), não os pools criados pelos próprios workers
+        os.register_at_fork(after_in_child=lambda: os.getppid() == mestre and aquecer_conexoes_worker())
+
+    lentos = sorted(resultado["modulos"].items(), key=lambda item: item[1], reverse=True)[:5]
+    logger.info(
+        "Aquecimento (pid %s): inicialização %.0f ms, %s; módulos mais lentos: %s", os.getpid(), inicializacao * 1000,
+        ", ".join(f"{etapa} {segundos * 1000:.0f} ms" for etapa, segundos in resultado["etapas"].items()),
+        ", ".join(f"{modulo} {segundos * 1000:.0f} ms" for modulo, segundos in lentos),
+    )
+    return resultado
+
+
+def aquecer_conexoes_worker() -> None:
+    """
+        Abre os pools de conexões e prepara os caches em um worker recém-criado pelo fork.
+    """
+    for etapa in ("conexoes", "caches"):
+        inicio = time.perf_counter()
+        try:
+            ETAPAS[etapa]()
+        except Exception as e:
+            logger.warning("Falha no aquecimento (%s): %s", etapa, e)
+        registro.ajustar("aquecimento_etapa_seconds", (("etapa", etapa),), time.perf_counter() - inicio)
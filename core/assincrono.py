@@ -0,0 +1,42 @@
+from asgiref.sync import sync_to_async
+from django.contrib.auth.mixins import LoginRequiredMixin
+from django.http import HttpRequest, HttpResponse
+from django.shortcuts import render
+
+
+class LoginRequiredAsyncMixin(LoginRequiredMixin):
+    """
+        Versão do ``LoginRequiredMixin`` para views assíncronas.
+
+        Carrega o usuário com ``request.auser()`` (sem bloquear o loop de eventos)
+        e o atribui a ``request.user``, evitando uma segunda consulta quando o
+        template acessa ``user``.
+    """
+
+    async def dispatch(self, request: HttpRequest, *args, **kwargs) -> HttpResponse:
+        request.user = await request.auser()
+        if not request.user.is_authenticated:
+            return self.handle_no_permission()
+
+        # Pula o dispatch síncrono do LoginRequiredMixin, que acessaria request.user
+        return await super(LoginRequiredMixin, self).dispatch(request, *args, **kwargs)
+
+
+async def arender(request: HttpRequest, template_name: str, context: dict | None = None) -> HttpResponse:
+    """
+        Renderiza um template a partir de uma view assíncrona.
+
+        O template engine do Django é síncrono e os context processors podem
+        consultar o banco (ex: mensagens guardadas na sessão), então a
+        renderização roda na thread do ORM da requisição. O contexto deve
+        conter apenas dados já carregados (listas, não querysets).
+
+        Args:
+            request (HttpRequest): Requisição atual.
+            template_name (str): Template a renderizar.
+            context (dict | None): Contexto do template.
+
+        Returns:
+            HttpResponse: Página renderizada.
+    """
+    return await sync_to_async(render)(request, template_name, context)
@@ -0,0 +1,606 @@
+import asyncio
+import io
+import json
+import platform
+import random
+import statistics
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from importlib import import_module
+from urllib.parse import urlsplit
+from wsgiref.util import setup_testing_defaults
+
+import django
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.conf import settings
+from django.contrib.auth.tokens import default_token_generator
+from django.core.cache import cache
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.db import connection, connections, reset_queries
+from django.db.backends.signals import connection_created
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import URLPattern, reverse
+from django.utils import timezone
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_encode
+
+from core.models import LogSystem
+from estoque.models import Produto, Movimentacao, Inventario, ItemInventario
+
+# Módulos de rotas medidos pelo benchmark
+MODULOS_ROTAS = ("core.urls", "estoque.urls", "user.urls")
+
+# Rotas que não fazem sentido medir com GET (dependem de artefatos gerados em outra requisição ou não terminam)
+ROTAS_IGNORADAS = {"download_perfil", "eventos_estoque", "feed_estoque", "contar_inventario", "aplicar_inventario"}
+
+USUARIO_BENCHMARK = "benchmark"
+SENHA_BENCHMARK = "benchmark-senha"
+
+
+def popular_dados(produtos: int = 100, movimentacoes: int = 1000, usuarios: int = 20, seed: int = 42) -> User:
+    """
+        Popula o banco com um conjunto de dados determinístico para o benchmark.
+
+        Args:
+            produtos (int): Quantidade de produtos.
+            movimentacoes (int): Quantidade de movimentações.
+            usuarios (int): Quantidade de usuários comuns além do usuário do benchmark.
+            seed (int): Semente do gerador aleatório.
+
+        Returns:
+            User: Superusuário usado nas requisições do benchmark.
+    """
+    aleatorio = random.Random(seed)
+    admin = User.objects.create_superuser(USUARIO_BENCHMARK, "benchmark@example.com", SENHA_BENCHMARK)
+
+    senha = make_password(SENHA_BENCHMARK)
+    User.objects.bulk_create(
+        [User(username=f"usuario{i}", email=f"usuario{i}@example.com", password=senha) for i in range(usuarios)],
+        batch_size=1000,
+    )
+
+    Produto.objects.bulk_create(
+        [
+            Produto(
+                nome=f"Produto {i}",
+                descricao=f"Descrição do produto {i}",
+                quantidade=aleatorio.randint(0, 500),
+                localizacao=f"Corredor {i % 20}",
+            )
+            for i in range(produtos)
+        ],
+        batch_size=1000,
+    )
+
+    ids_produtos = list(Produto.objects.values_list("id", flat=True))
+    ids_usuarios = list(User.objects.values_list("id", flat=True))
+    for inicio in range(0, movimentacoes if ids_produtos else 0, 5000):
+        Movimentacao.objects.bulk_create(
+            [
+                Movimentacao(
+                    usuario_id=aleatorio.choice(ids_usuarios),
+                    produto_id=aleatorio.choice(ids_produtos),
+                    quantidade=aleatorio.randint(1, 20),
+                    tipo=aleatorio.choice(("entrada", "saida")),
+                )
+                for _ in range(min(5000, movimentacoes - inicio))
+            ]
+        )
+
+    inventario = Inventario.objects.create(usuario=admin, descricao="Benchmark")
+    ItemInventario.objects.bulk_create(
+        [
+            ItemInventario(inventario=inventario, produto_id=produto_id, quantidade_contada=aleatorio.randint(0, 500))
+            for produto_id in ids_produtos
+        ],
+        batch_size=1000,
+    )
+
+    LogSystem.objects.bulk_create(
+        [LogSystem(user=admin, action="Benchmark", status="SUCESSO", message=f"Log {i}") for i in range(usuarios)]
+    )
+    return admin
+
+
+def rotas_benchmark(admin: User) -> list[tuple[str, str]]:
+    """
+        Monta a lista (nome, url) de todas as rotas nomeadas de ``MODULOS_ROTAS``.
+
+        Os parâmetros das rotas são preenchidos com registros existentes no banco.
+
+        Args:
+            admin (User): Usuário do benchmark (usado nas rotas de reset de senha).
+
+        Returns:
+            list[tuple[str, str]]: Rotas a serem medidas.
+    """
+    produto = Produto.objects.order_by("id").first()
+    inventario = Inventario.objects.order_by("id").first()
+    outro_usuario = User.objects.exclude(id=admin.id).order_by("id").first() or admin
+    parametros = {
+        "produto_id": produto.id if produto else 1,
+        "inventario_id": inventario.id if inventario else 1,
+        "usuario_id": outro_usuario.id,
+        "uidb64": urlsafe_base64_encode(force_bytes(admin.pk)),
+        "token": default_token_generator.make_token(admin),
+    }
+
+    rotas = []
+    for modulo in MODULOS_ROTAS:
+        for padrao in import_module(modulo).urlpatterns:
+            if not isinstance(padrao, URLPattern) or not padrao.name or padrao.name in ROTAS_IGNORADAS:
+                continue
+            kwargs = {nome: parametros[nome] for nome in padrao.pattern.regex.groupindex}
+            rotas.append((padrao.name, reverse(padrao.name, kwargs=kwargs)))
+    return rotas
+
+
+def _percentil(valores: list[float], percentual: float) -> float:
+    """
+        Percentil pelo método do vizinho mais próximo.
+    """
+    ordenados = sorted(valores)
+    indice = max(0, min(len(ordenados) - 1, round(percentual / 100 * len(ordenados)) - 1))
+    return ordenados[indice]
+
+
+def medir_rota(client: Client, admin: User, nome: str, url: str, repeticoes: int = 20, aquecimento: int = 2) -> dict:
+    """
+        Mede uma rota com o client de testes.
+
+        A latência é medida sem o tracemalloc ativo; o pico de memória é medido
+        em uma execução adicional.
+
+        Args:
+            client (Client): Client de testes autenticado.
+            admin (User): Usuário do benchmark (para refazer o login após o logout).
+            nome (str): Nome da rota.
+            url (str): URL da rota.
+            repeticoes (int): Quantidade de medições.
+            aquecimento (int): Execuções descartadas antes das medições.
+
+        Returns:
+            dict: p50/p95/média em ms, consultas, pico de memória em KB e status HTTP.
+    """
+    def requisitar():
+        response = client.get(url)
+        if nome == "logout":
+            client.force_login(admin)
+        return response
+
+    for _ in range(aquecimento):
+        requisitar()
+
+    duracoes = []
+    for _ in range(repeticoes):
+        # O log de consultas é limitado; limpá-lo evita contagens erradas em views com muitas consultas
+        reset_queries()
+        with CaptureQueriesContext(connection) as consultas:
+            inicio = time.perf_counter()
+            response = requisitar()
+            duracoes.append((time.perf_counter() - inicio) * 1000)
+
+    tracemalloc.start()
+    try:
+        requisitar()
+        _, pico = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "url": url,
+        "status": response.status_code,
+        "p50_ms": round(_percentil(duracoes, 50), 3),
+        "p95_ms": round(_percentil(duracoes, 95), 3),
+        "media_ms": round(statistics.fmean(duracoes), 3),
+        "consultas": len(consultas.captured_queries),
+        "pico_memoria_kb": round(pico / 1024, 1),
+    }
+
+
+def executar_benchmark(produtos: int = 100, movimentacoes: int = 1000, usuarios: int = 20, seed: int = 42,
+                       repeticoes: int = 20, aquecimento: int = 2, filtro: str | None = None) -> dict:
+    """
+        Popula o banco e mede todas as rotas de ``MODULOS_ROTAS``.
+
+        Deve ser executado em um banco de testes (ver comando ``benchmark``).
+
+        Args:
+            produtos (int): Quantidade de produtos do conjunto de dados.
+            movimentacoes (int): Quantidade de movimentações do conjunto de dados.
+            usuarios (int): Quantidade de usuários do conjunto de dados.
+            seed (int): Semente do gerador aleatório.
+            repeticoes (int): Medições por rota.
+            aquecimento (int): Execuções descartadas por rota.
+            filtro (str | None): Mede apenas rotas cujo nome contém o texto informado.
+
+        Returns:
+            dict: Metadados da execução e resultados por rota.
+    """
+    admin = popular_dados(produtos, movimentacoes, usuarios, seed)
+    client = Client()
+    client.force_login(admin)
+
+    resultados = {}
+    for nome, url in rotas_benchmark(admin):
+        if filtro and filtro not in nome:
+            continue
+        resultados[nome] = medir_rota(client, admin, nome, url, repeticoes, aquecimento)
+
+    return {
+        "metadados": {
+            "data": timezone.now().isoformat(),
+            "banco": connection.vendor,
+            "python": platform.python_version(),
+            "django": django.get_version(),
+            "dados": {"produtos": produtos, "movimentacoes": movimentacoes, "usuarios": usuarios, "seed": seed},
+            "repeticoes": repeticoes,
+        },
+        "rotas": resultados,
+    }
+
+
+def comparar_com_baseline(resultado: dict, baseline: dict, limite: float = 0.2, tolerancia_ms: float = 1.0) -> list[str]:
+    """
+        Compara um resultado com a baseline e retorna as regressões encontradas.
+
+        Uma rota regride quando o p50 cresce mais que ``limite`` (fração) e mais
+        que ``tolerancia_ms`` em valor absoluto, ou quando executa mais consultas.
+
+        Args:
+            resultado (dict): Resultado de ``executar_benchmark``.
+            baseline (dict): Resultado salvo anteriormente.
+            limite (float): Aumento relativo tolerado do p50 (0.2 = 20%).
+            tolerancia_ms (float): Aumento absoluto mínimo para considerar regressão.
+
+        Returns:
+            list[str]: Descrição de cada regressão.
+    """
+    regressoes = []
+    for nome, atual in resultado["rotas"].items():
+        anterior = baseline.get("rotas", {}).get(nome)
+        if anterior is None:
+            continue
+
+        if atual["p50_ms"] > anterior["p50_ms"] * (1 + limite) and atual["p50_ms"] - anterior["p50_ms"] > tolerancia_ms:
+            regressoes.append(f"{nome}: p50 {anterior['p50_ms']}ms -> {atual['p50_ms']}ms")
+
+        if atual["consultas"] > anterior["consultas"]:
+            regressoes.append(f"{nome}: consultas {anterior['consultas']} -> {atual['consultas']}")
+
+    return regressoes
+
+
+def salvar_resultado(resultado: dict, caminho: str) -> None:
+    """
+        Salva o resultado do benchmark em JSON.
+    """
+    with open(caminho, "w", encoding="utf-8") as arquivo:
+        json.dump(resultado, arquivo, indent=2, ensure_ascii=False)
+
+
+def carregar_resultado(caminho: str) -> dict:
+    """
+        Carrega um resultado de benchmark salvo em JSON.
+    """
+    with open(caminho, encoding="utf-8") as arquivo:
+        return json.load(arquivo)
+
+
+def medir_vazao_wsgi(admin: User, url: str, requisicoes: int = 500, concorrencia: int = 4) -> dict:
+    """
+        Mede a vazão de uma rota passando pelo ``WSGIHandler`` completo.
+
+        Diferente do client de testes, o handler dispara os sinais de início e fim
+        de requisição, então as conexões são fechadas ou reaproveitadas conforme
+        ``CONN_MAX_AGE``/pool, como em produção.
+
+        Args:
+            admin (User): Usuário autenticado nas requisições.
+            url (str): Rota medida.
+            requisicoes (int): Total de requisições.
+            concorrencia (int): Threads simultâneas (cada uma com a sua conexão).
+
+        Returns:
+            dict: Vazão, p50/p95 em ms, conexões abertas e erros HTTP.
+    """
+    client = Client()
+    client.force_login(admin)
+    cookie = f"{settings.SESSION_COOKIE_NAME}={client.cookies[settings.SESSION_COOKIE_NAME].value}"
+    handler = WSGIHandler()
+    caminho = urlsplit(url)
+    abertas = []
+
+    def contar(sender, connection, **kwargs):
+        abertas.append(connection.alias)
+
+    def requisitar():
+        environ = {"PATH_INFO": caminho.path, "QUERY_STRING": caminho.query, "HTTP_COOKIE": cookie,
+                   "wsgi.input": io.BytesIO()}
+        setup_testing_defaults(environ)
+        status = []
+        inicio = time.perf_counter()
+        resposta = handler(environ, lambda s, h, *a: status.append(s))
+        try:
+            b"".join(resposta)
+        finally:
+            # Dispara request_finished, que fecha as conexões expiradas
+            resposta.close()
+        return time.perf_counter() - inicio, status[0].startswith(("2", "3"))
+
+    def executar_fatia(quantidade):
+        try:
+            return [requisitar() for _ in range(quantidade)]
+        finally:
+            connections.close_all()
+
+    fatias = [requisicoes // concorrencia + (1 if i < requisicoes % concorrencia else 0) for i in range(concorrencia)]
+    connection_created.connect(contar)
+    try:
+        inicio = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concorrencia) as executor:
+            medicoes = [m for parcial in executor.map(executar_fatia, fatias) for m in parcial]
+        duracao = time.perf_counter() - inicio
+    finally:
+        connection_created.disconnect(contar)
+
+    duracoes = [d * 1000 for d, _ in medicoes]
+    return {
+        "vazao_rps": round(requisicoes / duracao, 1) if duracao else 0,
+        "p50_ms": round(_percentil(duracoes, 50), 3),
+        "p95_ms": round(_percentil(duracoes, 95), 3),
+        "conexoes_abertas": len(abertas),
+        "erros": sum(1 for _, ok in medicoes if not ok),
+    }
+
+
+def executar_benchmark_conexoes(cenarios: dict, url: str, requisicoes: int = 500, concorrencia: int = 4) -> dict:
+    """
+        Compara a vazão de uma rota com diferentes configurações de conexão.
+
+        Cada cenário sobrescreve ``CONN_MAX_AGE``, ``CONN_HEALTH_CHECKS`` e
+        ``OPTIONS`` do banco ``default`` durante a medição. Deve ser executado em
+        um banco de testes (ver comando ``benchmark_conexoes``).
+
+        Args:
+            cenarios (dict): Nome do cenário -> configurações sobrescritas.
+            url (str): Rota medida.
+            requisicoes (int): Requisições por cenário.
+            concorrencia (int): Threads simultâneas.
+
+        Returns:
+            dict: Resultado de ``medir_vazao_wsgi`` por cenário.
+    """
+    admin = popular_dados()
+    configuracao = connection.settings_dict
+    original = {chave: configuracao[chave] for chave in ("CONN_MAX_AGE", "CONN_HEALTH_CHECKS", "OPTIONS")}
+
+    resultados = {}
+    try:
+        for nome, sobrescrita in cenarios.items():
+            connections.close_all()
+            configuracao.update(sobrescrita)
+            try:
+                # Requisições de aquecimento (abre o pool, carrega templates e URLs)
+                medir_vazao_wsgi(admin, url, concorrencia, concorrencia)
+                resultados[nome] = medir_vazao_wsgi(admin, url, requisicoes, concorrencia)
+            finally:
+                connections.close_all()
+                if hasattr(connection, "close_pool"):
+                    connection.close_pool()
+    finally:
+        configuracao.update(original)
+
+    return resultados
+
+
+# Cenários padrão do comando "benchmark_sessoes": engine de sessão e armazenamento das mensagens
+CENARIOS_SESSAO = {
+    "db": {
+        "SESSION_ENGINE": "django.contrib.sessions.backends.db",
+        "MESSAGE_STORAGE": "django.contrib.messages.storage.session.SessionStorage",
+    },
+    "db_cookie": {
+        "SESSION_ENGINE": "django.contrib.sessions.backends.db",
+        "MESSAGE_STORAGE": "django.contrib.messages.storage.cookie.CookieStorage",
+    },
+    "cached_db": {
+        "SESSION_ENGINE": "django.contrib.sessions.backends.cached_db",
+        "MESSAGE_STORAGE": "django.contrib.messages.storage.cookie.CookieStorage",
+    },
+    "cache": {
+        "SESSION_ENGINE": "django.contrib.sessions.backends.cache",
+        "MESSAGE_STORAGE": "django.contrib.messages.storage.cookie.CookieStorage",
+    },
+}
+
+
+def executar_benchmark_sessoes(cenarios: dict = CENARIOS_SESSAO, ciclos: int = 50) -> dict:
+    """
+        Mede as consultas por requisição de cada configuração de sessão e mensagens.
+
+        Cada ciclo repete o fluxo típico de um usuário autenticado: lista o
+        estoque, registra uma movimentação (que grava uma mensagem e redireciona)
+        e abre a listagem que exibe a mensagem. As consultas à tabela
+        ``django_session`` são contadas separadamente. Deve ser executado em um
+        banco de testes (ver comando ``benchmark_sessoes``).
+
+        Args:
+            cenarios (dict): Nome do cenário -> ``SESSION_ENGINE``/``MESSAGE_STORAGE``.
+            ciclos (int): Repetições do fluxo por cenário.
+
+        Returns:
+            dict: Por cenário, consultas totais e de sessão por requisição e p50/p95 em ms.
+    """
+    admin = popular_dados()
+    produto = Produto.objects.order_by("id").first()
+    listagem = reverse("listar_estoque")
+    movimentacao = reverse("registrar_movimentacao")
+    dados = {"produto": produto.id, "tipo": "entrada", "quantidade": 1}
+
+    resultados = {}
+    for nome, sobrescrita in cenarios.items():
+        duracoes, consultas_totais, consultas_sessao = [], [], []
+
+        def requisitar(metodo, url, dados_post=None):
+            reset_queries()
+            with CaptureQueriesContext(connection) as consultas:
+                inicio = time.perf_counter()
+                resposta = metodo(url, dados_post) if dados_post else metodo(url)
+                duracoes.append((time.perf_counter() - inicio) * 1000)
+            consultas_totais.append(len(consultas.captured_queries))
+            consultas_sessao.append(sum(1 for consulta in consultas.captured_queries if "django_session" in consulta["sql"]))
+            return resposta
+
+        cache.clear()
+        with override_settings(**sobrescrita):
+            # Client novo: o middleware de sessão carrega a engine ao receber a primeira requisição
+            client = Client()
+            client.force_login(admin)
+            client.get(listagem)
+
+            for _ in range(ciclos):
+                requisitar(client.get, listagem)
+                resposta = requisitar(client.post, movimentacao, dados)
+                requisitar(client.get, resposta.url)
+
+        resultados[nome] = {
+            "consultas_por_requisicao": round(statistics.fmean(consultas_totais), 2),
+            "consultas_sessao_por_requisicao": round(statistics.fmean(consultas_sessao), 2),
+            "p50_ms": round(_percentil(duracoes, 50), 3),
+            "p95_ms": round(_percentil(duracoes, 95), 3),
+        }
+    cache.clear()
+    return resultados
+
+
+class AtrasoConsultas:
+    """
+        Wrapper de execução SQL que simula um banco/consulta lenta.
+
+        É instalado em todas as conexões abertas durante a medição (inclusive nas
+        threads do ORM assíncrono) pelo sinal ``connection_created``.
+    """
+
+    def __init__(self, atraso: float):
+        self.atraso = atraso
+
+    def __call__(self, execute, sql, params, many, context):
+        time.sleep(self.atraso)
+        return execute(sql, params, many, context)
+
+    def instalar(self, sender, connection, **kwargs) -> None:
+        # No início da lista: os middlewares removem os próprios wrappers do final ao terminar
+        if self not in connection.execute_wrappers:
+            connection.execute_wrappers.insert(0, self)
+
+
+def medir_concorrencia_asgi(admin: User, url: str, requisicoes: int = 500, clientes: int = 64) -> dict:
+    """
+        Mede a vazão de uma rota com clientes simultâneos pelo ``ASGIHandler``.
+
+        Todas as requisições compartilham um único loop de eventos, como em um
+        worker uvicorn.
+
+        Args:
+            admin (User): Usuário autenticado nas requisições.
+            url (str): Rota medida.
+            requisicoes (int): Total de requisições.
+            clientes (int): Clientes simultâneos.
+
+        Returns:
+            dict: Vazão, p50/p95 em ms e erros HTTP.
+    """
+    client = Client()
+    client.force_login(admin)
+    cookie = f"{settings.SESSION_COOKIE_NAME}={client.cookies[settings.SESSION_COOKIE_NAME].value}"
+    handler = ASGIHandler()
+    caminho = urlsplit(url)
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET", "scheme": "http",
+        "path": caminho.path, "raw_path": caminho.path.encode(), "query_string": caminho.query.encode(),
+        "root_path": "",
+        "headers": [(b"host", b"localhost"), (b"cookie", cookie.encode())],
+        "client": ("127.0.0.1", 0), "server": ("localhost", 80),
+    }
+
+    async def requisitar():
+        corpo_lido = asyncio.Event()
+        status = []
+
+        async def receive():
+            if not corpo_lido.is_set():
+                corpo_lido.set()
+                return {"type": "http.request", "body": b"", "more_body": False}
+            # Cliente conectado até o handler terminar a resposta
+            await asyncio.Future()
+
+        async def send(mensagem):
+            if mensagem["type"] == "http.response.start":
+                status.append(mensagem["status"])
+
+        inicio = time.perf_counter()
+        await handler(dict(scope), receive, send)
+        return time.perf_counter() - inicio, bool(status) and status[0] < 400
+
+    async def cliente(quantidade):
+        return [await requisitar() for _ in range(quantidade)]
+
+    async def executar():
+        fatias = [requisicoes // clientes + (1 if i < requisicoes % clientes else 0) for i in range(clientes)]
+        parciais = await asyncio.gather(*(cliente(fatia) for fatia in fatias))
+        return [m for parcial in parciais for m in parcial]
+
+    inicio = time.perf_counter()
+    medicoes = asyncio.run(executar())
+    duracao = time.perf_counter() - inicio
+
+    duracoes = [d * 1000 for d, _ in medicoes]
+    return {
+        "vazao_rps": round(requisicoes / duracao, 1) if duracao else 0,
+        "p50_ms": round(_percentil(duracoes, 50), 3),
+        "p95_ms": round(_percentil(duracoes, 95), 3),
+        "erros": sum(1 for _, ok in medicoes if not ok),
+    }
+
+
+def executar_benchmark_asgi(url: str, requisicoes: int = 500, threads_wsgi: int = 4, clientes_asgi: int = 64,
+                            atraso_ms: float = 50) -> dict:
+    """
+        Compara um worker WSGI (views síncronas, ``threads_wsgi`` threads) com um
+        worker ASGI (views assíncronas, ``clientes_asgi`` clientes simultâneos).
+
+        Cada consulta SQL recebe ``atraso_ms`` de espera para simular buscas
+        lentas. Deve ser executado em um banco de testes (ver comando ``benchmark_asgi``).
+
+        Args:
+            url (str): Rota medida (uma das leituras de estoque).
+            requisicoes (int): Requisições por cenário.
+            threads_wsgi (int): Threads do worker WSGI.
+            clientes_asgi (int): Clientes simultâneos no worker ASGI.
+            atraso_ms (float): Atraso simulado por consulta.
+
+        Returns:
+            dict: Resultado por cenário ('wsgi' e 'asgi').
+    """
+    admin = popular_dados()
+    atraso = AtrasoConsultas(atraso_ms / 1000)
+    connection_created.connect(atraso.instalar)
+    connection.ensure_connection()
+    atraso.instalar(None, connection)
+
+    resultados = {}
+    try:
+        with override_settings(VIEWS_ASSINCRONAS=False, ROOT_URLCONF="project.urls"):
+            resultados["wsgi"] = medir_vazao_wsgi(admin, url, requisicoes, threads_wsgi)
+        with override_settings(VIEWS_ASSINCRONAS=True, ROOT_URLCONF="project.urls_assincronas"):
+            resultados["asgi"] = medir_concorrencia_asgi(admin, url, requisicoes, clientes_asgi)
+    finally:
+        connection_created.disconnect(atraso.instalar)
+        connection.execute_wrappers.remove(atraso)
+
+    return resultados
@@ -0,0 +1,51 @@
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+from core.metricas import registro
+
+registro.definir("django_db_connections_opened_total", "counter",
+                 "Conexões abertas com o banco de dados por alias (alto com CONN_MAX_AGE=0).")
+registro.definir("django_db_pool_connections", "gauge",
+                 "Conexões do pool do psycopg por alias e estado (em_uso/ocioso).")
+registro.definir("django_db_pool_waiting", "gauge",
+                 "Requisições aguardando uma conexão livre do pool.")
+registro.definir("django_db_pool_requests_total", "counter",
+                 "Conexões solicitadas ao pool.")
+registro.definir("django_db_pool_wait_seconds_total", "counter",
+                 "Tempo total aguardando uma conexão livre do pool.")
+registro.definir("django_db_pool_timeouts_total", "counter",
+                 "Solicitações ao pool que falharam por timeout.")
+
+
+def _contar_conexao(sender, connection, **kwargs) -> None:
+    registro.incrementar("django_db_connections_opened_total", (("alias", connection.alias),))
+
+
+def atualizar_metricas_pool() -> None:
+    """
+        Atualiza as métricas dos pools de conexão (psycopg 3) deste processo.
+
+        Os gauges refletem o estado atual do pool; os contadores recebem o
+        acumulado desde a última atualização (``pool.pop_stats()``).
+    """
+    for conexao in connections.all(initialized_only=True):
+        pool = getattr(conexao, "pool", None)
+        if pool is None:
+            continue
+
+        estatisticas = pool.pop_stats()
+        alias = (("alias", conexao.alias),)
+        tamanho = estatisticas.get("pool_size", 0)
+        disponiveis = estatisticas.get("pool_available", 0)
+
+        registro.ajustar("django_db_pool_connections", alias + (("estado", "em_uso"),), tamanho - disponiveis)
+        registro.ajustar("django_db_pool_connections", alias + (("estado", "ocioso"),), disponiveis)
+        registro.ajustar("django_db_pool_waiting", alias, estatisticas.get("requests_waiting", 0))
+        registro.incrementar("django_db_pool_requests_total", alias, estatisticas.get("requests_num", 0))
+        registro.incrementar("django_db_pool_wait_seconds_total", alias,
+                             estatisticas.get("requests_wait_ms", 0) / 1000)
+        registro.incrementar("django_db_pool_timeouts_total", alias, estatisticas.get("requests_errors", 0))
+
+
+connection_created.connect(_contar_conexao, dispatch_uid="core.conexoes.contar_conexao")
+registro.registrar_atualizador(atualizar_metricas_pool)
@@ -0,0 +1,195 @@
+import hashlib
+import re
+import threading
+import time
+import traceback
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connections
+from django.utils import timezone
+
+from core.metricas import registro
+
+# Expressões usadas para normalizar o SQL em uma "impressão digital"
+_RE_STRING = re.compile(r"'(?:[^']|'')*'")
+_RE_NUMERO = re.compile(r"\b\d+(?:\.\d+)?\b")
+_RE_PARAMETRO = re.compile(r"%s|\?")
+_RE_LISTA_IN = re.compile(r"\bIN\s*\((?:\s*\?\s*,?)+\)", re.IGNORECASE)
+_RE_ESPACOS = re.compile(r"\s+")
+
+# Módulos de instrumentação ignorados na pilha de chamadas
+_MODULOS_IGNORADOS = ("core/middleware.py", "core/consultas_lentas.py", "core/n_mais_um.py")
+
+registro.definir("django_db_slow_queries_total", "counter",
+                 "Quantidade de consultas acima do limite SLOW_QUERY_MS por nome de URL resolvida.")
+
+
+def fingerprint_sql(sql: str) -> str:
+    """
+        Normaliza uma instrução SQL removendo literais e parâmetros.
+
+        Consultas com a mesma estrutura (ex: ``nome LIKE '%a%'`` e ``nome LIKE '%b%'``)
+        geram a mesma impressão digital.
+
+        Args:
+            sql (str): Instrução SQL original.
+
+        Returns:
+            str: SQL normalizado.
+    """
+    sql = _RE_STRING.sub("?", sql)
+    sql = _RE_PARAMETRO.sub("?", sql)
+    sql = _RE_NUMERO.sub("?", sql)
+    sql = _RE_LISTA_IN.sub("IN (...)", sql)
+    return _RE_ESPACOS.sub(" ", sql).strip()
+
+
+def pilha_do_projeto(limite: int = 10) -> list[str]:
+    """
+        Retorna os quadros da pilha de chamadas que pertencem ao código do projeto.
+    """
+    base = str(settings.BASE_DIR)
+    quadros = [
+        f"{q.filename[len(base) + 1:]}:{q.lineno} em {q.name}"
+        for q in traceback.extract_stack()[:-2]
+        if q.filename.startswith(base)
+        and "site-packages" not in q.filename
+        and not q.filename.endswith(_MODULOS_IGNORADOS)
+    ]
+    return quadros[-limite:]
+
+
+class RegistroConsultasLentas:
+    """
+        Buffer circular das consultas lentas mais recentes e agregação por impressão digital.
+
+        Attributes:
+            recentes (deque): Últimas ``SLOW_QUERY_BUFFER`` consultas lentas capturadas.
+            agregados (dict): Estatísticas por impressão digital (quantidade, tempo total e máximo),
+                limitadas a ``SLOW_QUERY_AGREGADOS`` impressões digitais.
+    """
+
+    def __init__(self):
+        self.recentes = deque(maxlen=settings.SLOW_QUERY_BUFFER)
+        self.agregados = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="explain")
+
+    def registrar(self, alias: str, sql: str, params, duracao: float, view: str) -> None:
+        """
+            Registra uma consulta lenta e agenda a captura do plano de execução.
+
+            Args:
+                alias (str): Alias da conexão onde a consulta foi executada.
+                sql (str): SQL executado.
+                params: Parâmetros da consulta.
+                duracao (float): Duração em segundos.
+                view (str): Nome da URL resolvida que originou a consulta.
+        """
+        fingerprint = fingerprint_sql(sql)
+        entrada = {
+            "id": hashlib.sha1(fingerprint.encode()).hexdigest()[:12],
+            "fingerprint": fingerprint,
+            "sql": sql,
+            "duracao_ms": round(duracao * 1000, 2),
+            "view": view,
+            "pilha": pilha_do_projeto(),
+            "data": timezone.now(),
+            "plano": None,
+        }
+
+        with self._lock:
+            self.recentes.append(entrada)
+            agregado = self.agregados.get(entrada["id"])
+            if agregado is None:
+                self._descartar_agregado()
+                agregado = self.agregados[entrada["id"]] = {
+                    "fingerprint": fingerprint, "quantidade": 0, "total_ms": 0.0, "max_ms": 0.0, "views": set(),
+                }
+            agregado["quantidade"] += 1
+            agregado["total_ms"] += entrada["duracao_ms"]
+            agregado["max_ms"] = max(agregado["max_ms"], entrada["duracao_ms"])
+            agregado["views"].add(view)
+
+        registro.incrementar("django_db_slow_queries_total", (("view", view),))
+
+        if sql.lstrip()[:6].upper() == "SELECT":
+            self._executor.submit(self._capturar_plano, entrada, alias, sql, params)
+
+    def _descartar_agregado(self) -> None:
+        """
+            Abre espaço para uma nova impressão digital removendo a menos frequente quando o limite foi atingido.
+        """
+        if len(self.agregados) < settings.SLOW_QUERY_AGREGADOS:
+            return
+        menos_frequente = min(self.agregados, key=lambda chave: (self.agregados[chave]["quantidade"],
+                                                                 self.agregados[chave]["total_ms"]))
+        del self.agregados[menos_frequente]
+
+    @staticmethod
+    def _capturar_plano(entrada: dict, alias: str, sql: str, params) -> None:
+        """
+            Executa ``EXPLAIN`` em uma conexão própria da thread e anexa o plano à entrada.
+        """
+        conexao = connections[alias]
+        try:
+            with conexao.cursor() as cursor:
+                cursor.execute(f"{conexao.ops.explain_query_prefix()} {sql}", params)
+                entrada["plano"] = "\n".join(" ".join(str(c) for c in linha) for linha in cursor.fetchall())
+        except Exception as e:
+            entrada["plano"] = f"Não foi possível obter o plano: {str(e)}"
+        finally:
+            conexao.close()
+
+    def mais_frequentes(self, limite: int = 20) -> list[dict]:
+        """
+            Retorna as impressões digitais lentas mais frequentes.
+
+            Args:
+                limite (int): Quantidade máxima de itens.
+
+            Returns:
+                list[dict]: Agregados ordenados por quantidade e tempo total.
+        """
+        with self._lock:
+            itens = [dict(a, id=chave, views=sorted(a["views"])) for chave, a in self.agregados.items()]
+        itens.sort(key=lambda a: (a["quantidade"], a["total_ms"]), reverse=True)
+        return itens[:limite]
+
+    def ultimas(self) -> list[dict]:
+        """
+            Retorna as consultas lentas mais recentes (da mais nova para a mais antiga).
+        """
+        with self._lock:
+            return list(reversed(self.recentes))
+
+
+class CapturaConsultasLentas:
+    """
+        Wrapper de execução SQL que envia ao registro as consultas acima de ``SLOW_QUERY_MS``.
+    """
+
+    __slots__ = ("request", "limite")
+
+    def __init__(self, request, limite: float):
+        self.request = request
+        self.limite = limite
+
+    def __call__(self, execute, sql, params, many, context):
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duracao = time.perf_counter() - inicio
+            if duracao >= self.limite:
+                match = self.request.resolver_match
+                consultas_lentas.registrar(
+                    context["connection"].alias, sql, None if many else params, duracao,
+                    match.view_name if match else "<nao_resolvida>",
+                )
+
+
+# Registro global do processo
+consultas_lentas = RegistroConsultasLentas()
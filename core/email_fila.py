@@ -0,0 +1,175 @@
+import logging
+import smtplib
+from contextlib import suppress
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import connection, transaction
+from django.utils import timezone
+
+from core.models import EmailFila
+
+logger = logging.getLogger(__name__)
+
+# Tempo em que um lote reservado fica invisível para outros workers; se o worker
+# morrer durante o envio, as mensagens voltam para a fila depois desse prazo
+ARRENDAMENTO = timedelta(minutes=5)
+
+
+def enfileirar_email(assunto: str, corpo: str, destinatario: str, remetente: str = "") -> EmailFila | None:
+    """
+        Coloca um e-mail na fila de saída; o envio é feito pelo comando ``enviar_emails``.
+
+        Cada destinatário recebe no máximo ``EMAIL_LIMITE_DESTINATARIO`` e-mails
+        por ``EMAIL_JANELA_LIMITE`` segundos; acima disso o e-mail é descartado,
+        o que impede que formulários públicos (ex: reset de senha) sejam usados
+        para inundar uma caixa de entrada. O limite é aproximado: a contagem e a
+        gravação não são atômicas, então requisições simultâneas para o mesmo
+        destinatário podem ultrapassá-lo em poucas mensagens.
+
+        Args:
+            assunto (str): Assunto do e-mail.
+            corpo (str): Corpo em texto puro.
+            destinatario (str): Endereço de destino.
+            remetente (str): Remetente (padrão: ``DEFAULT_FROM_EMAIL``).
+
+        Returns:
+            EmailFila | None: Mensagem enfileirada ou ``None`` se o limite do destinatário foi atingido.
+    """
+    limite = settings.EMAIL_LIMITE_DESTINATARIO
+    inicio_janela = timezone.now() - timedelta(seconds=settings.EMAIL_JANELA_LIMITE)
+    recentes = EmailFila.objects.filter(destinatario=destinatario, criado_em__gte=inicio_janela)[:limite].count()
+    if recentes >= limite:
+        logger.warning("Limite de e-mails atingido para %s; mensagem '%s' descartada.", destinatario, assunto)
+        return None
+
+    return EmailFila.objects.create(
+        destinatario=destinatario, remetente=remetente, assunto=assunto, corpo=corpo,
+        proxima_tentativa=timezone.now(),
+    )
+
+
+def enfileirar_emails(mensagens: list[tuple[str, str, str]], lote: int = 1000) -> int:
+    """
+        Coloca vários e-mails na fila com ``bulk_create``, sem o limite por destinatário.
+
+        Para envios gerados pelo próprio sistema (ex: convites do provisionamento
+        de usuários), e não por formulários públicos.
+
+        Args:
+            mensagens (list[tuple[str, str, str]]): (assunto, corpo, destinatário) de cada e-mail.
+            lote (int): E-mails gravados por INSERT.
+
+        Returns:
+            int: Quantidade de e-mails enfileirados.
+    """
+    agora = timezone.now()
+    EmailFila.objects.bulk_create(
+        [
+            EmailFila(destinatario=destinatario, assunto=assunto, corpo=corpo, proxima_tentativa=agora)
+            for assunto, corpo, destinatario in mensagens
+        ],
+        batch_size=lote,
+    )
+    return len(mensagens)
+
+
+def _reservar(lote: int) -> list[EmailFila]:
+    """
+        Reserva até ``lote`` mensagens vencidas, sem disputar as linhas já reservadas por outro worker.
+
+        Sem ``SKIP LOCKED`` (ex: SQLite) cada mensagem é reservada por um UPDATE
+        condicional; as que outro worker reservou antes não são atualizadas e ficam de fora.
+    """
+    agora = timezone.now()
+    candidatas = EmailFila.objects.filter(status="pendente", proxima_tentativa__lte=agora).order_by("proxima_tentativa")
+    reserva = {"proxima_tentativa": agora + ARRENDAMENTO}
+
+    if connection.features.has_select_for_update_skip_locked:
+        with transaction.atomic():
+            mensagens = list(candidatas.select_for_update(skip_locked=True)[:lote])
+            EmailFila.objects.filter(id__in=[m.id for m in mensagens]).update(**reserva)
+        return mensagens
+
+    return [
+        m for m in candidatas[:lote]
+        if EmailFila.objects.filter(id=m.id, status="pendente", proxima_tentativa__lte=agora).update(**reserva)
+    ]
+
+
+def _registrar_falha(mensagem: EmailFila, erro: Exception) -> None:
+    """
+        Agenda a próxima tentativa com espera exponencial ou marca a mensagem como falha definitiva.
+    """
+    tentativas = mensagem.tentativas + 1
+    if tentativas >= settings.EMAIL_FILA_TENTATIVAS:
+        campos = {"status": "falhou"}
+        logger.error("E-mail %s para %s descartado após %s tentativas: %s", mensagem.id, mensagem.destinatario, tentativas, erro)
+    else:
+        espera = min(settings.EMAIL_FILA_ESPERA_BASE * 2 ** (tentativas - 1), settings.EMAIL_FILA_ESPERA_MAXIMA)
+        campos = {"proxima_tentativa": timezone.now() + timedelta(seconds=espera)}
+
+    EmailFila.objects.filter(id=mensagem.id).update(tentativas=tentativas, erro=str(erro)[:1000], **campos)
+
+
+def processar_fila(lote: int = 100) -> dict:
+    """
+        Envia um lote de e-mails da fila usando uma única conexão SMTP.
+
+        Falhas de uma mensagem (ex: destinatário recusado) não interrompem o lote:
+        a mensagem volta para a fila com espera exponencial
+        (``EMAIL_FILA_ESPERA_BASE`` * 2^(tentativas - 1), até ``EMAIL_FILA_ESPERA_MAXIMA``)
+        e é descartada após ``EMAIL_FILA_TENTATIVAS`` falhas. Se o servidor
+        derrubar a conexão, ela é reaberta para o restante do lote.
+
+        Args:
+            lote (int): Quantidade máxima de mensagens enviadas.
+
+        Returns:
+            dict: Quantidade de mensagens ``enviadas`` e ``falhas``.
+    """
+    mensagens = _reservar(lote)
+    if not mensagens:
+        return {"enviadas": 0, "falhas": 0}
+
+    conexao = get_connection(fail_silently=False)
+    enviadas, falhas = [], []
+    try:
+        conexao.open()
+    except Exception as erro:
+        # Servidor indisponível: o lote inteiro volta para a fila
+        falhas = [(mensagem, erro) for mensagem in mensagens]
+        mensagens = []
+
+    try:
+        for mensagem in mensagens:
+            email = EmailMessage(mensagem.assunto, mensagem.corpo, mensagem.remetente or None, [mensagem.destinatario])
+            try:
+                conexao.send_messages([email])
+            except Exception as erro:
+                falhas.append((mensagem, erro))
+                if isinstance(erro, smtplib.SMTPServerDisconnected):
+                    conexao.close()
+                    with suppress(Exception):
+                        conexao.open()
+            else:
+                enviadas.append(mensagem.id)
+    finally:
+        conexao.close()
+
+    EmailFila.objects.filter(id__in=enviadas).update(status="enviado", enviado_em=timezone.now(), erro="")
+    for mensagem, erro in falhas:
+        _registrar_falha(mensagem, erro)
+    return {"enviadas": len(enviadas), "falhas": len(falhas)}
+
+
+def limpar_enviados(dias: int) -> int:
+    """
+        Remove os e-mails enviados ou descartados há mais de ``dias`` dias.
+
+        Returns:
+            int: Quantidade de mensagens removidas.
+    """
+    limite = timezone.now() - timedelta(days=dias)
+    return EmailFila.objects.filter(status__in=("enviado", "falhou"), criado_em__lt=limite).delete()[0]
@@ -0,0 +1,80 @@
+import sys
+import time
+
+# Sem imports do Django: o módulo é carregado por project/wsgi.py e project/asgi.py antes do django.setup()
+
+
+class _CarregadorMedido:
+    """
+        Envolve o loader de um módulo e mede a execução do módulo (``exec_module``).
+
+        O loader original é devolvido ao módulo antes da execução, então o
+        código do módulo e quem o inspeciona depois não veem o envoltório.
+    """
+
+    def __init__(self, carregador, tempos: dict):
+        self._carregador = carregador
+        self._tempos = tempos
+
+    def __getattr__(self, nome):
+        return getattr(self._carregador, nome)
+
+    def exec_module(self, modulo) -> None:
+        modulo.__loader__ = modulo.__spec__.loader = self._carregador
+        inicio = time.perf_counter()
+        try:
+            self._carregador.exec_module(modulo)
+        finally:
+            self._tempos[modulo.__name__] = time.perf_counter() - inicio
+
+
+class MedidorImportacoes:
+    """
+        Finder de ``sys.meta_path`` que mede o tempo de importação de cada módulo.
+
+        Delega a busca aos demais finders e envolve o loader encontrado. O tempo
+        é inclusivo: contém as importações feitas pelo módulo pela primeira vez.
+
+        Uso::
+
+            medidor.instalar()
+            application = get_wsgi_application()
+            medidor.remover()
+            medidor.tempos["estoque.models"]
+
+        Attributes:
+            tempos (dict): Nome do módulo -> segundos de importação.
+    """
+
+    def __init__(self):
+        self.tempos = {}
+
+    def find_spec(self, nome, caminho=None, alvo=None):
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, "find_spec"):
+                continue
+            spec = finder.find_spec(nome, caminho, alvo)
+            if spec is None:
+                continue
+            if spec.loader is not None and hasattr(spec.loader, "exec_module"):
+                spec.loader = _CarregadorMedido(spec.loader, self.tempos)
+            return spec
+        return None
+
+    def instalar(self) -> None:
+        """
+            Passa a medir as importações seguintes.
+        """
+        if self not in sys.meta_path:
+            sys.meta_path.insert(0, self)
+
+    def remover(self) -> None:
+        """
+            Deixa de medir as importações; os tempos já medidos são mantidos.
+        """
+        if self in sys.meta_path:
+            sys.meta_path.remove(self)
+
+
+# Medidor do processo, instalado pelos módulos de entrada (wsgi/asgi) e pelo comando "aquecer"
+medidor = MedidorImportacoes()
@@ -0,0 +1,158 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from core.metricas import registro
+
+registro.definir("login_bloqueios_total", "counter",
+                 "Tentativas de login recusadas pelo limite, antes da verificação da senha, por limite atingido.")
+
+
+def _chave(tipo: str, valor: str) -> str:
+    # Hash: nomes de usuário arbitrários não são chaves válidas em todos os backends de cache
+    return f"limite_login:{tipo}:{hashlib.sha256(valor.encode()).hexdigest()}"
+
+
+def ip_cliente(request) -> str:
+    """
+        IP do cliente: ``REMOTE_ADDR`` ou, atrás de proxies, o cabeçalho ``LOGIN_IP_CABECALHO``.
+
+        Cada proxy acrescenta o endereço de quem o chamou ao final do cabeçalho
+        (ex: ``X-Forwarded-For``), então o cliente é o endereço na posição
+        ``LOGIN_PROXIES`` a partir do fim: os anteriores podem ter sido
+        enviados pelo próprio cliente.
+    """
+    if settings.LOGIN_IP_CABECALHO:
+        enderecos = [endereco.strip() for endereco in request.META.get(settings.LOGIN_IP_CABECALHO, "").split(",")]
+        enderecos = [endereco for endereco in enderecos if endereco]
+        if enderecos:
+            return enderecos[-min(settings.LOGIN_PROXIES, len(enderecos))]
+    return request.META.get("REMOTE_ADDR", "")
+
+
+def _limites(request, username: str) -> dict:
+    """
+        Chave de cache e limite de cada contador da tentativa: por nome de usuário e por IP.
+    """
+    return {
+        "usuario": (_chave("usuario", (username or "").strip().lower()), settings.LOGIN_LIMITE_USUARIO),
+        "ip": (_chave("ip", ip_cliente(request)), settings.LOGIN_LIMITE_IP),
+    }
+
+
+def _incrementar(chave: str, timeout: float) -> int:
+    """
+        Incrementa o contador de forma atômica no cache, criando-o com ``add`` se ainda não existe.
+    """
+    cache.add(chave, 0, timeout)
+    try:
+        return cache.incr(chave)
+    except ValueError:  # expirou entre o add e o incr
+        cache.add(chave, 1, timeout)
+        return 1
+
+
+def _bloquear(chave: str, agora: float) -> float:
+    """
+        Bloqueia a chave por ``LOGIN_BLOQUEIO_BASE`` * 2^(bloqueios anteriores) segundos, até o máximo.
+
+        O bloqueio é criado com ``add``: entre tentativas concorrentes apenas uma
+        cria o bloqueio e conta a reincidência; as demais recebem o prazo dele.
+        Os contadores da janela são zerados, então ao fim do bloqueio as
+        tentativas recomeçam do zero.
+
+        Returns:
+            float: Segundos até o fim do bloqueio.
+    """
+    bloqueios = cache.get(f"{chave}:bloqueios", 0)
+    duracao = min(settings.LOGIN_BLOQUEIO_BASE * 2 ** bloqueios, settings.LOGIN_BLOQUEIO_MAXIMO)
+    if not cache.add(f"{chave}:bloqueio", agora + duracao, duracao):
+        return max(cache.get(f"{chave}:bloqueio", agora) - agora, 0)
+
+    janela = int(agora // settings.LOGIN_JANELA)
+    cache.delete_many([f"{chave}:{janela}", f"{chave}:{janela - 1}"])
+    # Apenas quem criou o bloqueio grava a reincidência; a contagem expira após o bloqueio máximo sem bloqueios
+    cache.set(f"{chave}:bloqueios", bloqueios + 1, duracao + settings.LOGIN_BLOQUEIO_MAXIMO)
+    return duracao
+
+
+def consumir_tentativa(request, username: str) -> float:
+    """
+        Conta a tentativa no limite do usuário e verifica o limite do IP antes de verificar a senha.
+
+        Cada limite é uma janela deslizante de ``LOGIN_JANELA`` segundos,
+        estimada com os contadores da janela fixa atual e da anterior
+        (ponderada pela fração que ainda cai na janela deslizante). O contador
+        do usuário conta toda tentativa; o do IP conta apenas as senhas
+        recusadas (``registrar_falha``) e aqui é apenas lido, então logins
+        válidos de muitos usuários atrás do mesmo IP (proxy, NAT) não o
+        esgotam. Acima do limite, a chave fica bloqueada por
+        ``LOGIN_BLOQUEIO_BASE`` * 2^(bloqueios anteriores) segundos, até
+        ``LOGIN_BLOQUEIO_MAXIMO``; tentativas durante o bloqueio são recusadas
+        sem contar nem estender nada.
+
+        Os contadores usam apenas operações atômicas do cache (``add`` e
+        ``incr``), então workers concorrentes não perdem tentativas. O cache
+        precisa ser compartilhado entre os workers (``CACHE_BACKEND``): com o
+        cache local de cada processo o limite valeria por worker. A recusa não
+        custa o hash PBKDF2 da senha.
+
+        Args:
+            request (HttpRequest): Requisição de login (IP de ``ip_cliente``).
+            username (str): Nome de usuário informado.
+
+        Returns:
+            float: Segundos até a próxima tentativa permitida; ``0`` se a tentativa pode prosseguir.
+    """
+    agora = time.time()
+    janela_segundos = settings.LOGIN_JANELA
+    janela = int(agora // janela_segundos)
+    limites = _limites(request, username)
+    chave_ip = limites["ip"][0]
+    valores = cache.get_many([f"{chave}:{sufixo}" for chave, _ in limites.values()
+                              for sufixo in ("bloqueio", janela - 1)] + [f"{chave_ip}:{janela}"])
+
+    bloqueado = {}
+    for tipo, (chave, _) in limites.items():
+        bloqueado_ate = valores.get(f"{chave}:bloqueio")
+        if bloqueado_ate and bloqueado_ate > agora:
+            bloqueado[tipo] = bloqueado_ate - agora
+
+    if bloqueado:
+        for tipo in bloqueado:
+            registro.incrementar("login_bloqueios_total", (("limite", tipo),))
+        return max(bloqueado.values())
+
+    # Peso da janela anterior: fração dela que ainda está dentro da janela deslizante
+    peso_anterior = 1 - (agora % janela_segundos) / janela_segundos
+    espera = 0.0
+    for tipo, (chave, limite) in limites.items():
+        anterior = valores.get(f"{chave}:{janela - 1}", 0) * peso_anterior
+        if tipo == "ip":
+            # Apenas as falhas já registradas: esta tentativa ainda não conta
+            excedido = anterior + valores.get(f"{chave}:{janela}", 0) >= limite
+        else:
+            excedido = anterior + _incrementar(f"{chave}:{janela}", 2 * janela_segundos) > limite
+        if excedido:
+            espera = max(espera, _bloquear(chave, agora))
+            registro.incrementar("login_bloqueios_total", (("limite", tipo),))
+    return espera
+
+
+def registrar_falha(request) -> None:
+    """
+        Conta uma senha recusada no limite do IP do cliente (ver ``consumir_tentativa``).
+    """
+    chave = _limites(request, "")["ip"][0]
+    _incrementar(f"{chave}:{int(time.time() // settings.LOGIN_JANELA)}", 2 * settings.LOGIN_JANELA)
+
+
+def liberar_usuario(username: str) -> None:
+    """
+        Zera os contadores e os bloqueios anteriores do usuário após um login bem-sucedido; os do IP são mantidos.
+    """
+    chave = _chave("usuario", (username or "").strip().lower())
+    janela = int(time.time() // settings.LOGIN_JANELA)
+    cache.delete_many([f"{chave}:{janela}", f"{chave}:{janela - 1}", f"{chave}:bloqueios"])
@@ -0,0 +1,44 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.aquecimento import aquecer
+
+
+class Command(BaseCommand):
+    """
+        Executa o aquecimento dos workers e mostra o tempo de cada etapa e de importação dos módulos.
+
+        Útil para acompanhar o custo de inicialização entre deploys; os workers
+        executam o mesmo aquecimento ao carregar ``project/wsgi.py`` ou
+        ``project/asgi.py`` (``AQUECIMENTO=True``). Os módulos importados pelo
+        ``django.setup()`` são medidos pelo ``manage.py`` ao executar este comando.
+
+        Uso:
+            python manage.py aquecer --modulos 15
+    """
+    help = "Aquece a aplicação (módulos, rotas, templates, autenticação, conexões e caches) e mostra os tempos."
+    # As verificações do sistema importariam as rotas antes da medição
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument("--modulos", type=int, default=10, help="Módulos mais lentos exibidos.")
+        parser.add_argument("--sem-conexoes", action="store_true", help="Não abre conexões nem caches.")
+
+    def handle(self, *args, **options):
+        inicio = time.perf_counter()
+        resultado = aquecer(conexoes=not options["sem_conexoes"])
+        total = time.perf_counter() - inicio
+
+        self.stdout.write(f"{'etapa':<16}{'ms':>10}")
+        for etapa, segundos in resultado["etapas"].items():
+            self.stdout.write(f"{etapa:<16}{segundos * 1000:>10.1f}")
+        self.stdout.write(f"{'total':<16}{total * 1000:>10.1f}")
+
+        self.stdout.write(f"\n{'módulo':<40}{'ms':>10}")
+        lentos = sorted(resultado["modulos"].items(), key=lambda item: item[1], reverse=True)
+        for modulo, segundos in lentos[:options["modulos"]]:
+            self.stdout.write(f"{modulo:<40}{segundos * 1000:>10.1f}")
+
+        for etapa, erro in resultado["erros"].items():
+            self.stderr.write(f"Falha na etapa {etapa}: {erro}")
@@ -0,0 +1,68 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from core.benchmark import executar_benchmark, comparar_com_baseline, salvar_resultado, carregar_resultado
+
+
+class Command(BaseCommand):
+    """
+        Executa o benchmark de todas as views em um banco de testes descartável.
+
+        Funciona com o banco configurado em ``DATABASES['default']`` (SQLite local
+        ou PostgreSQL), criando e removendo o banco de testes correspondente.
+
+        Uso:
+            python manage.py benchmark --produtos 1000 --movimentacoes 50000 --saida atual.json
+            python manage.py benchmark --baseline baseline.json --limite 0.2
+    """
+    help = "Mede p50/p95, consultas e pico de memória de cada view e compara com uma baseline JSON."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--produtos", type=int, default=100, help="Quantidade de produtos gerados.")
+        parser.add_argument("--movimentacoes", type=int, default=1000, help="Quantidade de movimentações geradas.")
+        parser.add_argument("--usuarios", type=int, default=20, help="Quantidade de usuários gerados.")
+        parser.add_argument("--seed", type=int, default=42, help="Semente do gerador de dados.")
+        parser.add_argument("--repeticoes", type=int, default=20, help="Medições por view.")
+        parser.add_argument("--aquecimento", type=int, default=2, help="Execuções descartadas por view.")
+        parser.add_argument("--filtro", help="Mede apenas as views cujo nome contém este texto.")
+        parser.add_argument("--saida", help="Arquivo JSON onde o resultado será salvo.")
+        parser.add_argument("--baseline", help="Arquivo JSON de baseline para comparação.")
+        parser.add_argument("--limite", type=float, default=0.2, help="Aumento relativo de p50 tolerado (0.2 = 20%%).")
+
+    def handle(self, *args, **options):
+        baseline = carregar_resultado(options["baseline"]) if options["baseline"] else None
+
+        setup_test_environment()
+        nome_original = connection.settings_dict["NAME"]
+        connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            resultado = executar_benchmark(
+                produtos=options["produtos"],
+                movimentacoes=options["movimentacoes"],
+                usuarios=options["usuarios"],
+                seed=options["seed"],
+                repeticoes=options["repeticoes"],
+                aquecimento=options["aquecimento"],
+                filtro=options["filtro"],
+            )
+        finally:
+            connection.creation.destroy_test_db(nome_original, verbosity=0)
+            teardown_test_environment()
+
+        self.stdout.write(f"{'view':<28}{'status':>7}{'p50 ms':>10}{'p95 ms':>10}{'consultas':>11}{'memória KB':>12}")
+        for nome, dados in resultado["rotas"].items():
+            self.stdout.write(
+                f"{nome:<28}{dados['status']:>7}{dados['p50_ms']:>10}{dados['p95_ms']:>10}"
+                f"{dados['consultas']:>11}{dados['pico_memoria_kb']:>12}"
+            )
+
+        if options["saida"]:
+            salvar_resultado(resultado, options["saida"])
+            self.stdout.write(self.style.SUCCESS(f"Resultado salvo em {options['saida']}"))
+
+        if baseline is not None:
+            regressoes = comparar_com_baseline(resultado, baseline, options["limite"])
+            if regressoes:
+                raise CommandError("Regressões encontradas:\n" + "\n".join(regressoes))
+            self.stdout.write(self.style.SUCCESS("Nenhuma regressão em relação à baseline."))
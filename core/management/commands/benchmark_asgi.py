@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from core.benchmark import executar_benchmark_asgi
+
+
+class Command(BaseCommand):
+    """
+        Compara a concorrência de um worker WSGI com a de um worker ASGI nas leituras de estoque.
+
+        O cenário WSGI usa as views síncronas com um número fixo de threads (como
+        o gunicorn com ``--threads``); o cenário ASGI usa as views assíncronas
+        com muitos clientes simultâneos em um único loop de eventos. Um atraso
+        por consulta simula buscas lentas.
+
+        Uso:
+            python manage.py benchmark_asgi --url /estoque/buscar/?q=Produto --clientes 128 --atraso-ms 100
+    """
+    help = "Compara requisições/segundo de um worker WSGI e de um worker ASGI com consultas lentas."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--url", default="/estoque/", help="Rota medida.")
+        parser.add_argument("--requisicoes", type=int, default=500, help="Requisições por cenário.")
+        parser.add_argument("--threads", type=int, default=4, help="Threads do worker WSGI.")
+        parser.add_argument("--clientes", type=int, default=64, help="Clientes simultâneos no worker ASGI.")
+        parser.add_argument("--atraso-ms", type=float, default=50, help="Atraso simulado por consulta SQL.")
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        nome_original = connection.settings_dict["NAME"]
+        connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            resultados = executar_benchmark_asgi(
+                options["url"], options["requisicoes"], options["threads"], options["clientes"], options["atraso_ms"]
+            )
+        finally:
+            connection.creation.destroy_test_db(nome_original, verbosity=0)
+            teardown_test_environment()
+
+        self.stdout.write(f"{'cenário':<10}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'erros':>8}")
+        for nome, dados in resultados.items():
+            self.stdout.write(
+                f"{nome:<10}{dados['vazao_rps']:>10}{dados['p50_ms']:>10}{dados['p95_ms']:>10}{dados['erros']:>8}"
+            )
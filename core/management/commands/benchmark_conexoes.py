@@ -0,0 +1,65 @@
+from importlib.util import find_spec
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from core.benchmark import executar_benchmark_conexoes
+
+
+class Command(BaseCommand):
+    """
+        Compara requisições/segundo com e sem reaproveitamento de conexões.
+
+        Cenários medidos em um banco de testes descartável:
+            - sem_persistencia: CONN_MAX_AGE=0 (uma conexão nova por requisição);
+            - persistente: CONN_MAX_AGE=--max-age com CONN_HEALTH_CHECKS;
+            - pool: pool do psycopg 3 (apenas PostgreSQL com "psycopg[pool]" instalado).
+
+        A diferença só é significativa no PostgreSQL, onde abrir a conexão tem custo real.
+
+        Uso:
+            python manage.py benchmark_conexoes --requisicoes 2000 --concorrencia 8
+    """
+    help = "Mede a vazão de uma rota com conexões novas, persistentes e em pool."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--url", default="/estoque/", help="Rota medida.")
+        parser.add_argument("--requisicoes", type=int, default=500, help="Requisições por cenário.")
+        parser.add_argument("--concorrencia", type=int, default=4, help="Threads simultâneas.")
+        parser.add_argument("--max-age", type=int, default=600, help="CONN_MAX_AGE do cenário persistente.")
+        parser.add_argument("--pool-max", type=int, default=None,
+                            help="Tamanho máximo do pool (padrão: a concorrência).")
+
+    def handle(self, *args, **options):
+        opcoes = {chave: valor for chave, valor in connection.settings_dict["OPTIONS"].items() if chave != "pool"}
+        cenarios = {
+            "sem_persistencia": {"CONN_MAX_AGE": 0, "OPTIONS": opcoes},
+            "persistente": {"CONN_MAX_AGE": options["max_age"], "CONN_HEALTH_CHECKS": True, "OPTIONS": opcoes},
+        }
+        if connection.vendor == "postgresql" and find_spec("psycopg_pool"):
+            tamanho = options["pool_max"] or options["concorrencia"]
+            cenarios["pool"] = {
+                "CONN_MAX_AGE": 0,
+                "OPTIONS": {**opcoes, "pool": {"min_size": min(2, tamanho), "max_size": tamanho, "timeout": 10}},
+            }
+        else:
+            self.stdout.write(self.style.WARNING("Cenário 'pool' ignorado: requer PostgreSQL e psycopg[pool]."))
+
+        setup_test_environment()
+        nome_original = connection.settings_dict["NAME"]
+        connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            resultados = executar_benchmark_conexoes(
+                cenarios, options["url"], options["requisicoes"], options["concorrencia"]
+            )
+        finally:
+            connection.creation.destroy_test_db(nome_original, verbosity=0)
+            teardown_test_environment()
+
+        self.stdout.write(f"{'cenário':<20}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'conexões':>10}{'erros':>8}")
+        for nome, dados in resultados.items():
+            self.stdout.write(
+                f"{nome:<20}{dados['vazao_rps']:>10}{dados['p50_ms']:>10}{dados['p95_ms']:>10}"
+                f"{dados['conexoes_abertas']:>10}{dados['erros']:>8}"
+            )
@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from core.benchmark import executar_benchmark_sessoes, CENARIOS_SESSAO
+
+
+class Command(BaseCommand):
+    """
+        Compara as consultas por requisição de cada configuração de sessão e mensagens.
+
+        Cenários medidos em um banco de testes descartável:
+            - db: sessões no banco e mensagens na sessão;
+            - db_cookie: sessões no banco e mensagens em cookie;
+            - cached_db: sessões lidas do cache (gravadas também no banco) e mensagens em cookie;
+            - cache: sessões apenas no cache e mensagens em cookie.
+
+        O cache usado é o de ``CACHES['default']``; os cenários com cache só valem
+        em produção com um cache compartilhado entre os workers (ex: Redis).
+
+        Uso:
+            python manage.py benchmark_sessoes --ciclos 100
+    """
+    help = "Mede as consultas totais e à tabela django_session por requisição em cada configuração de sessão."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--ciclos", type=int, default=50,
+                            help="Repetições do fluxo listagem -> movimentação -> mensagem por cenário.")
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        nome_original = connection.settings_dict["NAME"]
+        connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            resultados = executar_benchmark_sessoes(CENARIOS_SESSAO, options["ciclos"])
+        finally:
+            connection.creation.destroy_test_db(nome_original, verbosity=0)
+            teardown_test_environment()
+
+        base = resultados["db"]["consultas_por_requisicao"]
+        self.stdout.write(f"{'cenário':<12}{'consultas':>11}{'sessão':>9}{'economia':>10}{'p50 ms':>10}{'p95 ms':>10}")
+        for nome, dados in resultados.items():
+            self.stdout.write(
+                f"{nome:<12}{dados['consultas_por_requisicao']:>11}{dados['consultas_sessao_por_requisicao']:>9}"
+                f"{round(base - dados['consultas_por_requisicao'], 2):>10}{dados['p50_ms']:>10}{dados['p95_ms']:>10}"
+            )
@@ -0,0 +1,44 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from core.email_fila import processar_fila, limpar_enviados
+
+
+class Command(BaseCommand):
+    """
+        Worker da fila de e-mails: envia os e-mails pendentes em lotes.
+
+        Roda continuamente (ex: um serviço do systemd ou um container dedicado);
+        com ``--uma-vez`` processa apenas um lote, para uso em cron. Vários workers
+        podem rodar ao mesmo tempo no PostgreSQL (``SELECT ... SKIP LOCKED``).
+
+        Uso:
+            python manage.py enviar_emails --lote 100 --intervalo 5
+    """
+    help = "Envia os e-mails da fila com uma conexão SMTP por lote e novas tentativas com espera exponencial."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--lote", type=int, default=100, help="E-mails enviados por conexão SMTP.")
+        parser.add_argument("--intervalo", type=float, default=5, help="Segundos de espera com a fila vazia.")
+        parser.add_argument("--uma-vez", action="store_true", help="Processa um único lote e termina.")
+        parser.add_argument("--limpar-dias", type=int, default=30,
+                            help="Remove e-mails enviados/descartados mais antigos que N dias (0 desativa).")
+
+    def handle(self, *args, **options):
+        if options["limpar_dias"]:
+            removidos = limpar_enviados(options["limpar_dias"])
+            if removidos:
+                self.stdout.write(f"{removidos} e-mail(s) antigo(s) removido(s) da fila.")
+
+        while True:
+            close_old_connections()
+            resultado = processar_fila(options["lote"])
+            if resultado["enviadas"] or resultado["falhas"]:
+                self.stdout.write(f"Enviados: {resultado['enviadas']} | Falhas: {resultado['falhas']}")
+
+            if options["uma_vez"]:
+                break
+            if not (resultado["enviadas"] or resultado["falhas"]):
+                time.sleep(options["intervalo"])
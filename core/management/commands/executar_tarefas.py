@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand
+
+from core.tarefas import executar_worker, reenfileirar_mortas, limpar_concluidas
+
+
+class Command(BaseCommand):
+    """
+        Worker das tarefas em segundo plano: reserva as tarefas vencidas e as executa em um pool de processos.
+
+        Roda continuamente (ex: um serviço do systemd ou um container dedicado).
+        Vários workers podem rodar ao mesmo tempo no PostgreSQL
+        (``SELECT ... SKIP LOCKED``); com SQLite use ``--processos 0``.
+
+        Uso:
+            python manage.py executar_tarefas --processos 4
+            python manage.py executar_tarefas --reenfileirar-mortas
+    """
+    help = "Executa as tarefas em segundo plano com novas tentativas, fila de mortas e métricas por tarefa."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--processos", type=int, default=2,
+                            help="Processos do pool (0 executa as tarefas no próprio processo).")
+        parser.add_argument("--intervalo", type=float, default=1, help="Segundos de espera com a fila vazia.")
+        parser.add_argument("--drenar", action="store_true", help="Termina quando não houver tarefas vencidas.")
+        parser.add_argument("--reenfileirar-mortas", action="store_true",
+                            help="Devolve as tarefas mortas para a fila e termina.")
+        parser.add_argument("--limpar-dias", type=int, default=7,
+                            help="Remove tarefas concluídas mais antigas que N dias (0 desativa).")
+
+    def handle(self, *args, **options):
+        if options["reenfileirar_mortas"]:
+            self.stdout.write(f"{reenfileirar_mortas()} tarefa(s) devolvida(s) para a fila.")
+            return
+
+        if options["limpar_dias"]:
+            removidas = limpar_concluidas(options["limpar_dias"])
+            if removidas:
+                self.stdout.write(f"{removidas} tarefa(s) concluída(s) removida(s).")
+
+        resultados = executar_worker(options["processos"], options["intervalo"], options["drenar"])
+        self.stdout.write(
+            f"Concluídas: {resultados['concluida']} | Falhas: {resultados['falha']} | Mortas: {resultados['morta']}"
+        )
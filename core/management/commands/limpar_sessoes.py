@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from core.sessoes import limpar_sessoes_expiradas
+
+
+class Command(BaseCommand):
+    """
+        Remove as sessões expiradas em lotes, sem um único ``DELETE`` longo.
+
+        Substitui o ``clearsessions`` no cron (ex: uma vez por dia).
+
+        Uso:
+            python manage.py limpar_sessoes --lote 5000
+    """
+    help = "Remove as sessões expiradas da tabela django_session em lotes."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--lote", type=int, default=5000, help="Sessões removidas por comando DELETE.")
+
+    def handle(self, *args, **options):
+        removidas = limpar_sessoes_expiradas(options["lote"])
+        self.stdout.write(f"{removidas} sessão(ões) expirada(s) removida(s).")
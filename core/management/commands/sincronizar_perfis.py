@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from core.permissoes import sincronizar_perfis
+
+
+class Command(BaseCommand):
+    """
+        Cria os perfis (grupos) de ``core.permissoes.PERFIS`` e define suas permissões.
+
+        Pode ser executado novamente após alterar ``PERFIS`` ou criar novos modelos.
+
+        Uso:
+            python manage.py sincronizar_perfis
+    """
+    help = "Cria os perfis de acesso (grupos) e define suas permissões."
+
+    def handle(self, *args, **options):
+        for nome, total in sincronizar_perfis().items():
+            self.stdout.write(f"{nome}: {total} permissão(ões).")
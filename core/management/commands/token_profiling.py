@@ -0,0 +1,28 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from core.profiling import gerar_token_profiling
+
+
+class Command(BaseCommand):
+    """
+        Gera um token de profiling para um usuário da equipe.
+
+        Uso:
+            python manage.py token_profiling <username>
+    """
+    help = "Gera um token assinado para perfilar requisições (cabeçalho X-Profile ou ?_profile=)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("username", help="Usuário da equipe (is_staff) que usará o token.")
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options["username"])
+        except User.DoesNotExist:
+            raise CommandError(f"Usuário '{options['username']}' não encontrado.")
+
+        if not user.is_staff:
+            raise CommandError("O profiling é restrito a usuários da equipe (is_staff).")
+
+        self.stdout.write(gerar_token_profiling(user))
@@ -0,0 +1,224 @@
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+
+from django.conf import settings
+
+# Limites (em segundos) dos buckets padrão dos histogramas de latência
+BUCKETS_PADRAO = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class RegistroMetricas:
+    """
+        Agregador de métricas em memória com exportação no formato texto do Prometheus.
+
+        Cada processo mantém seus próprios contadores e histogramas. Quando
+        ``settings.METRICS_DIR`` está definido, o processo grava periodicamente um
+        snapshot em ``<METRICS_DIR>/metricas_<pid>.json`` e a exportação soma os
+        snapshots de todos os processos (ex: workers do gunicorn).
+
+        Gauges (ex: conexões em uso no pool) são somados entre os processos;
+        snapshots de processos que deixaram de gravar não entram na soma dos gauges.
+
+        Attributes:
+            definicoes (dict): Tipo, descrição e buckets de cada métrica declarada.
+            atualizadores (list): Funções chamadas antes de cada snapshot/exportação para atualizar gauges.
+    """
+
+    def __init__(self):
+        self.definicoes = {}
+        self.atualizadores = []
+        self._contadores = {}
+        self._histogramas = {}
+        self._gauges = {}
+        self._lock = threading.Lock()
+        self._ultimo_flush = time.monotonic()
+
+    def definir(self, nome: str, tipo: str, ajuda: str, buckets: tuple = BUCKETS_PADRAO) -> None:
+        """
+            Declara uma métrica ('counter', 'gauge' ou 'histogram') e sua descrição.
+        """
+        self.definicoes[nome] = (tipo, ajuda, buckets)
+
+    def incrementar(self, nome: str, labels: tuple, valor: float = 1) -> None:
+        """
+            Soma ``valor`` ao contador ``nome`` com os ``labels`` informados.
+
+            Args:
+                nome (str): Nome da métrica declarada com ``definir``.
+                labels (tuple): Pares (label, valor) ordenados.
+                valor (float): Incremento.
+        """
+        chave = (nome, labels)
+        with self._lock:
+            self._contadores[chave] = self._contadores.get(chave, 0) + valor
+
+    def observar(self, nome: str, labels: tuple, valor: float) -> None:
+        """
+            Registra uma observação no histograma ``nome``.
+
+            Args:
+                nome (str): Nome da métrica declarada com ``definir``.
+                labels (tuple): Pares (label, valor) ordenados.
+                valor (float): Valor observado (ex: duração em segundos).
+        """
+        buckets = self.definicoes[nome][2]
+        indice = bisect_left(buckets, valor)
+        chave = (nome, labels)
+        with self._lock:
+            serie = self._histogramas.get(chave)
+            if serie is None:
+                # [contagem por bucket..., +Inf, soma]
+                serie = self._histogramas[chave] = [0] * (len(buckets) + 2)
+            serie[indice] += 1
+            serie[-1] += valor
+
+    def ajustar(self, nome: str, labels: tuple, valor: float) -> None:
+        """
+            Define o valor atual do gauge ``nome`` com os ``labels`` informados.
+        """
+        with self._lock:
+            self._gauges[(nome, labels)] = valor
+
+    def registrar_atualizador(self, atualizador) -> None:
+        """
+            Registra uma função sem argumentos que atualiza gauges antes de cada snapshot/exportação.
+        """
+        self.atualizadores.append(atualizador)
+
+    def _atualizar_gauges(self) -> None:
+        for atualizador in self.atualizadores:
+            atualizador()
+
+    def talvez_gravar(self) -> None:
+        """
+            Grava o snapshot do processo se o intervalo ``METRICS_FLUSH_SEGUNDOS`` já passou.
+
+            Chamado ao final de cada requisição; custa apenas uma comparação quando não há flush.
+        """
+        agora = time.monotonic()
+        if agora - self._ultimo_flush >= settings.METRICS_FLUSH_SEGUNDOS:
+            self._ultimo_flush = agora
+            self.gravar()
+
+    def gravar(self) -> None:
+        """
+            Grava de forma atômica o snapshot deste processo em ``METRICS_DIR``.
+        """
+        diretorio = settings.METRICS_DIR
+        if not diretorio:
+            return
+
+        self._atualizar_gauges()
+        with self._lock:
+            dados = {
+                "contadores": [[n, list(l), v] for (n, l), v in self._contadores.items()],
+                "histogramas": [[n, list(l), list(s)] for (n, l), s in self._histogramas.items()],
+                "gauges": [[n, list(l), v] for (n, l), v in self._gauges.items()],
+            }
+
+        os.makedirs(diretorio, exist_ok=True)
+        destino = os.path.join(diretorio, f"metricas_{os.getpid()}.json")
+        temporario = f"{destino}.tmp"
+        with open(temporario, "w") as arquivo:
+            json.dump(dados, arquivo)
+        os.replace(temporario, destino)
+
+    def _agregar(self) -> tuple[dict, dict, dict]:
+        """
+            Retorna contadores, histogramas e gauges somados de todos os processos.
+        """
+        diretorio = settings.METRICS_DIR
+        if not diretorio:
+            self._atualizar_gauges()
+            with self._lock:
+                return (dict(self._contadores), {k: list(v) for k, v in self._histogramas.items()},
+                        dict(self._gauges))
+
+        self.gravar()
+        contadores, histogramas, gauges = {}, {}, {}
+        limite_gauges = time.time() - 3 * settings.METRICS_FLUSH_SEGUNDOS
+        for nome_arquivo in os.listdir(diretorio):
+            if not (nome_arquivo.startswith("metricas_") and nome_arquivo.endswith(".json")):
+                continue
+            caminho = os.path.join(diretorio, nome_arquivo)
+            try:
+                with open(caminho) as arquivo:
+                    dados = json.load(arquivo)
+                atual = os.path.getmtime(caminho) >= limite_gauges
+            except (OSError, ValueError):
+                continue
+
+            if atual:
+                for nome, labels, valor in dados.get("gauges", []):
+                    chave = (nome, tuple(tuple(par) for par in labels))
+                    gauges[chave] = gauges.get(chave, 0) + valor
+
+            for nome, labels, valor in dados["contadores"]:
+                chave = (nome, tuple(tuple(par) for par in labels))
+                contadores[chave] = contadores.get(chave, 0) + valor
+
+            for nome, labels, serie in dados["histogramas"]:
+                chave = (nome, tuple(tuple(par) for par in labels))
+                atual = histogramas.get(chave)
+                histogramas[chave] = serie if atual is None else [a + b for a, b in zip(atual, serie)]
+
+        return contadores, histogramas, gauges
+
+    def exportar(self) -> str:
+        """
+            Gera o texto de exposição no formato Prometheus (versão 0.0.4).
+
+            Returns:
+                str: Métricas agregadas de todos os processos.
+        """
+        contadores, histogramas, gauges = self._agregar()
+        linhas = []
+
+        for nome, (tipo, ajuda, buckets) in self.definicoes.items():
+            linhas.append(f"# HELP {nome} {ajuda}")
+            linhas.append(f"# TYPE {nome} {tipo}")
+
+            if tipo in ("counter", "gauge"):
+                for (n, labels), valor in sorted((contadores if tipo == "counter" else gauges).items()):
+                    if n == nome:
+                        linhas.append(f"{nome}{_formatar_labels(labels)} {valor}")
+                continue
+
+            for (n, labels), serie in sorted(histogramas.items()):
+                if n != nome:
+                    continue
+                acumulado = 0
+                for limite, quantidade in zip(buckets + ("+Inf",), serie[:-1]):
+                    acumulado += quantidade
+                    linhas.append(f"{nome}_bucket{_formatar_labels(labels + (('le', str(limite)),))} {acumulado}")
+                linhas.append(f"{nome}_sum{_formatar_labels(labels)} {serie[-1]}")
+                linhas.append(f"{nome}_count{_formatar_labels(labels)} {acumulado}")
+
+        return "\n".join(linhas) + "\n"
+
+
+def _formatar_labels(labels: tuple) -> str:
+    """
+        Converte pares (label, valor) para a sintaxe ``{a="1",b="2"}`` do Prometheus.
+    """
+    if not labels:
+        return ""
+    pares = ",".join(
+        '{}="{}"'.format(chave, str(valor).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for chave, valor in labels
+    )
+    return "{" + pares + "}"
+
+
+# Registro global do processo
+registro = RegistroMetricas()
+
+registro.definir("django_http_request_duration_seconds", "histogram",
+                 "Latência das requisições por nome de URL resolvida.")
+registro.definir("django_http_db_queries_total", "counter",
+                 "Quantidade de consultas SQL executadas por nome de URL resolvida.")
+registro.definir("django_http_db_duration_seconds_total", "counter",
+                 "Tempo total gasto no banco de dados por nome de URL resolvida.")
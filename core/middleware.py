@@ -0,0 +1,271 @@
+import time
+from abc import ABC, abstractmethod
+from contextlib import ExitStack, contextmanager, asynccontextmanager
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+from django.http import HttpRequest, HttpResponse
+
+from core.consultas_lentas import CapturaConsultasLentas
+from core.metricas import registro
+from core.n_mais_um import DetectorNMaisUm, ConsultasRepetidasError, logger as logger_n_mais_um
+from core.profiling import PerfilRequisicao, validar_token_profiling
+from core.replicas import aliases_replicas, COOKIE_ESCRITA
+
+
+class ContadorConsultas:
+    """
+        Wrapper de execução SQL (``connection.execute_wrapper``) que acumula
+        a quantidade de consultas e o tempo gasto no banco durante uma requisição.
+    """
+
+    __slots__ = ("quantidade", "duracao")
+
+    def __init__(self):
+        self.quantidade = 0
+        self.duracao = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duracao += time.perf_counter() - inicio
+            self.quantidade += 1
+
+
+@contextmanager
+def instrumentar_conexoes(wrapper):
+    """
+        Instala ``wrapper`` (``connection.execute_wrapper``) em todas as conexões da thread atual.
+    """
+    with ExitStack() as pilha:
+        for conexao in connections.all():
+            pilha.enter_context(conexao.execute_wrapper(wrapper))
+        yield
+
+
+@asynccontextmanager
+async def ainstrumentar_conexoes(wrapper):
+    """
+        Versão assíncrona de ``instrumentar_conexoes``.
+
+        As conexões são locais à thread e o ORM assíncrono executa as consultas da
+        requisição em uma thread dedicada (``sync_to_async`` sensível à thread),
+        por isso o wrapper é instalado e removido nessa mesma thread.
+    """
+    pilha = ExitStack()
+
+    def instalar():
+        for conexao in connections.all():
+            pilha.enter_context(conexao.execute_wrapper(wrapper))
+
+    await sync_to_async(instalar)()
+    try:
+        yield
+    finally:
+        await sync_to_async(pilha.close)()
+
+
+class MiddlewareHibrido(ABC):
+    """
+        Base abstrata dos middlewares do projeto, compatíveis com WSGI e ASGI.
+
+        Em uma cadeia assíncrona (ASGI com views assíncronas) a requisição segue
+        por ``aprocessar`` sem ocupar uma thread; nas demais usa ``processar``.
+        As subclasses implementam os dois métodos.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request: HttpRequest):
+        if iscoroutinefunction(self):
+            return self.aprocessar(request)
+        return self.processar(request)
+
+    @abstractmethod
+    def processar(self, request: HttpRequest) -> HttpResponse:
+        """
+            Atende a requisição em uma cadeia síncrona.
+        """
+
+    @abstractmethod
+    async def aprocessar(self, request: HttpRequest) -> HttpResponse:
+        """
+            Atende a requisição em uma cadeia assíncrona.
+        """
+
+
+class MetricasMiddleware(MiddlewareHibrido):
+    """
+        Middleware que registra latência, quantidade de consultas e tempo de banco
+        por nome de URL resolvida (``request.resolver_match.view_name``).
+
+        Os dados são agregados em memória no ``core.metricas.registro`` e expostos
+        pela rota ``/metrics`` no formato do Prometheus.
+    """
+
+    def processar(self, request: HttpRequest) -> HttpResponse:
+        contador = ContadorConsultas()
+        inicio = time.perf_counter()
+        with instrumentar_conexoes(contador):
+            response = self.get_response(request)
+        self._registrar(request, contador, time.perf_counter() - inicio)
+        return response
+
+    async def aprocessar(self, request: HttpRequest) -> HttpResponse:
+        contador = ContadorConsultas()
+        inicio = time.perf_counter()
+        async with ainstrumentar_conexoes(contador):
+            response = await self.get_response(request)
+        self._registrar(request, contador, time.perf_counter() - inicio)
+        return response
+
+    def _registrar(self, request: HttpRequest, contador: ContadorConsultas, duracao: float) -> None:
+        match = request.resolver_match
+        labels = (("view", match.view_name if match else "<nao_resolvida>"), ("method", request.method))
+
+        registro.observar("django_http_request_duration_seconds", labels, duracao)
+        registro.incrementar("django_http_db_queries_total", labels, contador.quantidade)
+        registro.incrementar("django_http_db_duration_seconds_total", labels, contador.duracao)
+        registro.talvez_gravar()
+
+
+class ConsultasLentasMiddleware(MiddlewareHibrido):
+    """
+        Middleware que captura as consultas SQL acima de ``settings.SLOW_QUERY_MS``.
+
+        As consultas são registradas com impressão digital, view de origem, pilha
+        de chamadas e plano de execução (``EXPLAIN``) obtido em segundo plano.
+        Com ``SLOW_QUERY_MS = 0`` a captura fica desativada.
+    """
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        self.limite = settings.SLOW_QUERY_MS / 1000
+
+    def processar(self, request: HttpRequest) -> HttpResponse:
+        if not self.limite:
+            return self.get_response(request)
+
+        with instrumentar_conexoes(CapturaConsultasLentas(request, self.limite)):
+            return self.get_response(request)
+
+    async def aprocessar(self, request: HttpRequest) -> HttpResponse:
+        if not self.limite:
+            return await self.get_response(request)
+
+        async with ainstrumentar_conexoes(CapturaConsultasLentas(request, self.limite)):
+            return await self.get_response(request)
+
+
+class ProfilingMiddleware(MiddlewareHibrido):
+    """
+        Middleware que perfila uma única requisição sob demanda.
+
+        É ativado pelo cabeçalho ``X-Profile: <token>`` ou pelo parâmetro
+        ``?_profile=<token>``, onde o token é gerado pelo comando
+        ``token_profiling`` para um usuário da equipe. Sem o gatilho, o custo é
+        apenas a verificação de duas chaves no ``request.META``.
+
+        O id do perfil salvo é retornado no cabeçalho ``X-Profile-Id``.
+    """
+
+    @staticmethod
+    def _token(request: HttpRequest) -> str | None:
+        meta = request.META
+        if "HTTP_X_PROFILE" not in meta and "_profile=" not in meta.get("QUERY_STRING", ""):
+            return None
+        return meta.get("HTTP_X_PROFILE") or request.GET.get("_profile", "")
+
+    def processar(self, request: HttpRequest) -> HttpResponse:
+        token = self._token(request)
+        if token is None or not validar_token_profiling(token, request.user):
+            return self.get_response(request)
+
+        with PerfilRequisicao(request) as perfil:
+            response = self.get_response(request)
+        response["X-Profile-Id"] = perfil.perfil_id
+        return response
+
+    async def aprocessar(self, request: HttpRequest) -> HttpResponse:
+        token = self._token(request)
+        if token is None or not validar_token_profiling(token, await request.auser()):
+            return await self.get_response(request)
+
+        with PerfilRequisicao(request, assincrono=True) as perfil:
+            response = await self.get_response(request)
+        response["X-Profile-Id"] = perfil.perfil_id
+        return response
+
+
+class NMaisUmMiddleware(MiddlewareHibrido):
+    """
+        Middleware que detecta consultas N+1 durante a requisição.
+
+        Ativo quando ``settings.N_MAIS_UM_DETECTOR`` é verdadeiro (por padrão em
+        DEBUG e na execução dos testes). Cada detecção é registrada no log com o
+        template e a linha que a originou; com ``N_MAIS_UM_LEVANTAR`` a requisição
+        falha com ``ConsultasRepetidasError``.
+    """
+
+    def processar(self, request: HttpRequest) -> HttpResponse:
+        if not settings.N_MAIS_UM_DETECTOR:
+            return self.get_response(request)
+
+        with DetectorNMaisUm(settings.N_MAIS_UM_LIMITE) as detector:
+            response = self.get_response(request)
+        self._reportar(request, detector)
+        return response
+
+    async def aprocessar(self, request: HttpRequest) -> HttpResponse:
+        if not settings.N_MAIS_UM_DETECTOR:
+            return await self.get_response(request)
+
+        detector = DetectorNMaisUm(settings.N_MAIS_UM_LIMITE)
+        async with ainstrumentar_conexoes(detector):
+            response = await self.get_response(request)
+        self._reportar(request, detector)
+        return response
+
+    def _reportar(self, request: HttpRequest, detector: DetectorNMaisUm) -> None:
+        if not detector.ocorrencias:
+            return
+
+        match = request.resolver_match
+        relatorio = detector.relatorio(match.view_name if match else request.path)
+        if settings.N_MAIS_UM_LEVANTAR:
+            raise ConsultasRepetidasError(relatorio)
+        logger_n_mais_um.warning(relatorio)
+
+
+class LeituraAposEscritaMiddleware(MiddlewareHibrido):
+    """
+        Middleware que marca as sessões que acabaram de escrever no banco.
+
+        Após qualquer requisição que altera dados (POST, PUT, PATCH, DELETE) é
+        enviado o cookie ``escrita_recente`` com validade de
+        ``REPLICA_JANELA_ESCRITA`` segundos; enquanto ele existir, as views com
+        ``LeituraReplicaMixin`` leem do primário (read-your-writes).
+        Sem réplicas configuradas o middleware não faz nada.
+    """
+
+    def processar(self, request: HttpRequest) -> HttpResponse:
+        return self._marcar(request, self.get_response(request))
+
+    async def aprocessar(self, request: HttpRequest) -> HttpResponse:
+        return self._marcar(request, await self.get_response(request))
+
+    def _marcar(self, request: HttpRequest, response: HttpResponse) -> HttpResponse:
+        if request.method not in ("GET", "HEAD", "OPTIONS", "TRACE") and aliases_replicas():
+            response.set_cookie(
+                COOKIE_ESCRITA, "1", max_age=settings.REPLICA_JANELA_ESCRITA, httponly=True, samesite="Lax"
+            )
+        return response
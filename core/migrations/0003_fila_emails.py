@@ -0,0 +1,33 @@
+# Generated by Django 5.2.7 on 2026-10-19 07:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_alter_logsystem_message_alter_logsystem_user'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EmailFila',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('destinatario', models.EmailField(max_length=254)),
+                ('remetente', models.CharField(blank=True, max_length=254)),
+                ('assunto', models.CharField(max_length=200)),
+                ('corpo', models.TextField()),
+                ('status', models.CharField(choices=[('pendente', 'Pendente'), ('enviado', 'Enviado'), ('falhou', 'Falhou')], default='pendente', max_length=10)),
+                ('tentativas', models.PositiveIntegerField(default=0)),
+                ('proxima_tentativa', models.DateTimeField()),
+                ('criado_em', models.DateTimeField(auto_now_add=True)),
+                ('enviado_em', models.DateTimeField(blank=True, null=True)),
+                ('erro', models.TextField(blank=True)),
+            ],
+            options={
+                'db_table': 'fila_emails',
+                'indexes': [models.Index(fields=['status', 'proxima_tentativa'], name='fila_emails_pendentes'), models.Index(fields=['destinatario', 'criado_em'], name='fila_emails_destinatario')],
+            },
+        ),
+    ]
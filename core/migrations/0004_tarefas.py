@@ -0,0 +1,35 @@
+# Generated by Django 5.2.7 on 2026-10-19 07:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_fila_emails'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tarefa',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nome', models.CharField(max_length=200)),
+                ('argumentos', models.JSONField(default=dict)),
+                ('prioridade', models.SmallIntegerField(default=0)),
+                ('executar_em', models.DateTimeField()),
+                ('status', models.CharField(choices=[('pendente', 'Pendente'), ('executando', 'Executando'), ('concluida', 'Concluída'), ('morta', 'Morta')], default='pendente', max_length=10)),
+                ('tentativas', models.PositiveSmallIntegerField(default=0)),
+                ('max_tentativas', models.PositiveSmallIntegerField(default=3)),
+                ('reservada_ate', models.DateTimeField(blank=True, null=True)),
+                ('duracao_ms', models.FloatField(blank=True, null=True)),
+                ('erro', models.TextField(blank=True)),
+                ('criado_em', models.DateTimeField(auto_now_add=True)),
+                ('concluida_em', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'db_table': 'tarefas',
+                'indexes': [models.Index(fields=['status', '-prioridade', 'executar_em'], name='tarefas_fila')],
+            },
+        ),
+    ]
@@ -0,0 +1,61 @@
+from django.contrib.auth.management import create_permissions
+from django.db import migrations
+from django.db.models import Q
+
+# Cópia de core.permissoes.PERFIS na data da migração (alterações posteriores: comando sincronizar_perfis)
+PERFIS = {
+    "Operador de estoque": [
+        "estoque.view_produto", "estoque.add_produto", "estoque.change_produto",
+        "estoque.view_movimentacao", "estoque.add_movimentacao",
+        "estoque.view_inventario", "estoque.add_inventario", "estoque.change_inventario",
+    ],
+    "Auditor": [
+        "estoque.view_produto", "estoque.view_movimentacao", "estoque.view_inventario",
+        "auth.view_user", "core.view_logsystem",
+    ],
+}
+
+# Perfil dos usuários existentes, que antes das permissões podiam cadastrar produtos e registrar movimentações
+PERFIL_USUARIOS_EXISTENTES = "Operador de estoque"
+
+
+def criar_perfis(apps, schema_editor):
+    """
+        Cria os perfis e atribui os usuários ativos (exceto superusuários) ao ``PERFIL_USUARIOS_EXISTENTES``.
+
+        As permissões são criadas apenas após o ``migrate`` (sinal ``post_migrate``);
+        em um banco novo são criadas aqui para que os perfis já tenham suas permissões.
+    """
+    banco = schema_editor.connection.alias
+    for app_config in apps.get_app_configs():
+        app_config.models_module = True
+        create_permissions(app_config, apps=apps, verbosity=0, using=banco)
+        app_config.models_module = None
+
+    Group = apps.get_model("auth", "Group")
+    Permission = apps.get_model("auth", "Permission")
+    User = apps.get_model("auth", "User")
+    for nome, codigos in PERFIS.items():
+        condicao = Q(pk__in=[])
+        for codigo in codigos:
+            app_label, codename = codigo.split(".")
+            condicao |= Q(content_type__app_label=app_label, codename=codename)
+        perfil, _ = Group.objects.using(banco).get_or_create(name=nome)
+        perfil.permissions.add(*Permission.objects.using(banco).filter(condicao))
+
+    operador = Group.objects.using(banco).get(name=PERFIL_USUARIOS_EXISTENTES)
+    operador.user_set.add(*User.objects.using(banco).filter(is_active=True, is_superuser=False))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_tarefas'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('estoque', '0008_sequencia_outbox'),
+    ]
+
+    operations = [
+        migrations.RunPython(criar_perfis, migrations.RunPython.noop),
+    ]
@@ -30,4 +30,104 @@ class LogSystem(models.Model):
         return f"{self.timestamp} - {self.user.username} - {self.action} - {self.status}"
 
     class Meta:
-        db_table = 'log_system'
\ No newline at end of file
+        db_table = 'log_system'
+
+class EmailFila(models.Model):
+    """
+        Fila de e-mails de saída, enviados em lotes pelo comando ``enviar_emails``.
+
+        Attributes
+        ----------
+        destinatario : EmailField
+            Endereço de destino (também usado no limite de envios por destinatário).
+        status : CharField
+            'pendente' até ser enviado ('enviado') ou esgotar as tentativas ('falhou').
+        tentativas : PositiveIntegerField
+            Quantidade de envios que falharam.
+        proxima_tentativa : DateTimeField
+            Momento a partir do qual o e-mail pode ser (re)enviado, com espera exponencial entre as falhas.
+        erro : TextField
+            Última falha de envio.
+    """
+
+    STATUS = [
+        ("pendente", "Pendente"),
+        ("enviado", "Enviado"),
+        ("falhou", "Falhou"),
+    ]
+
+    destinatario = models.EmailField()
+    remetente = models.CharField(max_length=254, blank=True)
+    assunto = models.CharField(max_length=200)
+    corpo = models.TextField()
+    status = models.CharField(max_length=10, choices=STATUS, default="pendente")
+    tentativas = models.PositiveIntegerField(default=0)
+    proxima_tentativa = models.DateTimeField()
+    criado_em = models.DateTimeField(auto_now_add=True)
+    enviado_em = models.DateTimeField(null=True, blank=True)
+    erro = models.TextField(blank=True)
+
+    def __str__(self):
+        return f"{self.destinatario} - {self.assunto} ({self.status})"
+
+    class Meta:
+        db_table = 'fila_emails'
+        indexes = [
+            # Leitura do worker: pendentes cuja próxima tentativa já venceu
+            models.Index(fields=["status", "proxima_tentativa"], name="fila_emails_pendentes"),
+            # Limite de envios por destinatário em uma janela de tempo
+            models.Index(fields=["destinatario", "criado_em"], name="fila_emails_destinatario"),
+        ]
+
+
+class Tarefa(models.Model):
+    """
+        Tarefa em segundo plano executada pelo worker ``executar_tarefas``.
+
+        Attributes
+        ----------
+        nome : CharField
+            Caminho da função registrada com ``@tarefa`` (ex: 'estoque.tarefas.otimizar_imagem_produto').
+        argumentos : JSONField
+            Argumentos nomeados da função.
+        prioridade : SmallIntegerField
+            Tarefas com prioridade maior são executadas primeiro.
+        executar_em : DateTimeField
+            Momento a partir do qual a tarefa pode ser executada (agendamento e espera entre tentativas).
+        status : CharField
+            'pendente', 'executando', 'concluida' ou 'morta' (tentativas esgotadas).
+        reservada_ate : DateTimeField
+            Fim da reserva do worker; reservas vencidas (worker interrompido) voltam para a fila.
+        duracao_ms : FloatField
+            Duração da última execução.
+    """
+
+    STATUS = [
+        ("pendente", "Pendente"),
+        ("executando", "Executando"),
+        ("concluida", "Concluída"),
+        ("morta", "Morta"),
+    ]
+
+    nome = models.CharField(max_length=200)
+    argumentos = models.JSONField(default=dict)
+    prioridade = models.SmallIntegerField(default=0)
+    executar_em = models.DateTimeField()
+    status = models.CharField(max_length=10, choices=STATUS, default="pendente")
+    tentativas = models.PositiveSmallIntegerField(default=0)
+    max_tentativas = models.PositiveSmallIntegerField(default=3)
+    reservada_ate = models.DateTimeField(null=True, blank=True)
+    duracao_ms = models.FloatField(null=True, blank=True)
+    erro = models.TextField(blank=True)
+    criado_em = models.DateTimeField(auto_now_add=True)
+    concluida_em = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"#{self.id} {self.nome} ({self.status})"
+
+    class Meta:
+        db_table = 'tarefas'
+        indexes = [
+            # Ordem de reserva do worker: pendentes por prioridade e horário
+            models.Index(fields=["status", "-prioridade", "executar_em"], name="tarefas_fila"),
+        ]
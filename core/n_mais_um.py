@@ -0,0 +1,99 @@
+import logging
+import sys
+
+from django.db import connections
+from django.template.base import Node
+
+from core.consultas_lentas import fingerprint_sql, pilha_do_projeto
+
+logger = logging.getLogger(__name__)
+
+
+class ConsultasRepetidasError(Exception):
+    """
+        Levantada quando o detector encontra consultas N+1 e ``N_MAIS_UM_LEVANTAR`` está ativo.
+    """
+
+
+def _linha_do_template() -> str | None:
+    """
+        Procura na pilha o nó de template sendo renderizado e retorna "template, linha N".
+    """
+    quadro = sys._getframe(2)
+    while quadro is not None:
+        no = quadro.f_locals.get("self")
+        if isinstance(no, Node) and getattr(no, "token", None) is not None and getattr(no, "origin", None):
+            return f"{no.origin.template_name or no.origin.name}, linha {no.token.lineno}"
+        quadro = quadro.f_back
+    return None
+
+
+class DetectorNMaisUm:
+    """
+        Wrapper de execução SQL que detecta consultas com o mesmo formato repetidas
+        durante uma requisição (padrão N+1).
+
+        Pode ser usado como gerenciador de contexto em testes::
+
+            with DetectorNMaisUm() as detector:
+                client.get(url)
+            self.assertEqual(detector.ocorrencias, [])
+
+        Attributes:
+            limite (int): Quantidade de repetições a partir da qual a consulta é sinalizada.
+            contagem (dict): Quantidade de execuções por impressão digital.
+            ocorrencias (list): Consultas sinalizadas com SQL, local no template e pilha.
+    """
+
+    def __init__(self, limite: int = 5, conexoes=None):
+        self.limite = limite
+        self.contagem = {}
+        self.ocorrencias = []
+        self._conexoes = conexoes
+        self._contextos = []
+
+    def __call__(self, execute, sql, params, many, context):
+        fingerprint = fingerprint_sql(sql)
+        quantidade = self.contagem.get(fingerprint, 0) + 1
+        self.contagem[fingerprint] = quantidade
+        if quantidade == self.limite:
+            self.ocorrencias.append({
+                "fingerprint": fingerprint,
+                "template": _linha_do_template(),
+                "pilha": pilha_do_projeto(),
+            })
+        return execute(sql, params, many, context)
+
+    def __enter__(self):
+        for conexao in self._conexoes or connections.all():
+            contexto = conexao.execute_wrapper(self)
+            contexto.__enter__()
+            self._contextos.append(contexto)
+        return self
+
+    def __exit__(self, *exc_info):
+        while self._contextos:
+            self._contextos.pop().__exit__(*exc_info)
+
+    def relatorio(self, origem: str = "") -> str:
+        """
+            Monta um relatório legível das consultas repetidas.
+
+            Args:
+                origem (str): Identificação da requisição (ex: nome da view).
+
+            Returns:
+                str: Texto do relatório, vazio se nada foi detectado.
+        """
+        linhas = []
+        for ocorrencia in self.ocorrencias:
+            linhas.append(
+                f"N+1 detectado{f' em {origem}' if origem else ''}: "
+                f"{self.contagem[ocorrencia['fingerprint']]} consultas com o mesmo formato"
+            )
+            linhas.append(f"  SQL: {ocorrencia['fingerprint']}")
+            if ocorrencia["template"]:
+                linhas.append(f"  Template: {ocorrencia['template']}")
+            for quadro in ocorrencia["pilha"]:
+                linhas.append(f"    {quadro}")
+        return "\n".join(linhas)
@@ -0,0 +1,215 @@
+import uuid
+
+from django.conf import settings
+from django.contrib import messages
+from django.contrib.auth.backends import ModelBackend
+from django.contrib.auth.models import Group, Permission, User
+from django.core.cache import cache
+from django.db.models import Q
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from django.http import HttpRequest, HttpResponse
+from django.shortcuts import redirect
+
+from core.metricas import registro
+
+registro.definir("permissoes_resolucoes_total", "counter",
+                 "Resoluções do conjunto de permissões por usuário, por resultado no cache (acerto/falha).")
+
+# Perfis (grupos do Django) e suas permissões, criados/atualizados pelo comando ``sincronizar_perfis``
+PERFIS = {
+    "Operador de estoque": [
+        "estoque.view_produto", "estoque.add_produto", "estoque.change_produto",
+        "estoque.view_movimentacao", "estoque.add_movimentacao",
+        "estoque.view_inventario", "estoque.add_inventario", "estoque.change_inventario",
+    ],
+    "Auditor": [
+        "estoque.view_produto", "estoque.view_movimentacao", "estoque.view_inventario",
+        "auth.view_user", "core.view_logsystem",
+    ],
+}
+
+CHAVE_VERSAO = "permissoes:versao"
+
+# Atributo do usuário com as permissões já resolvidas na requisição
+ATRIBUTO_CACHE = "_permissoes_resolvidas"
+
+
+def _chave_versao(usuario_id: int) -> str:
+    return f"permissoes:versao:{usuario_id}"
+
+
+def _chave(usuario_id: int) -> str:
+    return f"permissoes:usuario:{usuario_id}"
+
+
+def _calcular(usuario: User) -> frozenset:
+    """
+        Permissões do usuário (diretas e dos grupos) no formato ``app_label.codename``, em uma consulta.
+    """
+    permissoes = Permission.objects.all()
+    if not usuario.is_superuser:
+        permissoes = permissoes.filter(Q(user=usuario) | Q(group__user=usuario))
+    return frozenset(
+        f"{app_label}.{codename}"
+        for app_label, codename in permissoes.values_list("content_type__app_label", "codename").distinct()
+    )
+
+
+def permissoes_usuario(usuario: User) -> frozenset:
+    """
+        Conjunto de permissões do usuário, calculado uma vez e guardado no cache.
+
+        A entrada do cache guarda, junto com as permissões, a versão global e a
+        versão do usuário vigentes no cálculo; as três chaves são lidas com um
+        único ``get_many``. Alterações de perfis trocam uma das versões
+        (``invalidar_permissoes``), e a entrada antiga deixa de valer sem
+        precisar ser apagada. As versões são tokens aleatórios, então uma
+        versão removida do cache nunca volta a coincidir com uma entrada antiga.
+
+        Na mesma requisição o resultado fica no próprio objeto do usuário, então
+        o mixin e as verificações dos templates não repetem a leitura do cache.
+
+        Args:
+            usuario (User): Usuário autenticado.
+
+        Returns:
+            frozenset: Permissões no formato ``app_label.codename`` (vazio para inativos e anônimos).
+    """
+    if not usuario.is_active or usuario.is_anonymous:
+        return frozenset()
+    if hasattr(usuario, ATRIBUTO_CACHE):
+        return getattr(usuario, ATRIBUTO_CACHE)
+
+    chaves = (CHAVE_VERSAO, _chave_versao(usuario.pk), _chave(usuario.pk))
+    valores = cache.get_many(chaves)
+    versoes = (valores.get(chaves[0]), valores.get(chaves[1]))
+    entrada = valores.get(chaves[2])
+
+    if None not in versoes and entrada is not None and entrada[:2] == versoes:
+        permissoes = entrada[2]
+        registro.incrementar("permissoes_resolucoes_total", (("resultado", "acerto"),))
+    else:
+        # Versões lidas antes do cálculo: uma invalidação concorrente invalida também esta entrada
+        for chave, versao in zip(chaves[:2], versoes):
+            if versao is None:
+                cache.add(chave, uuid.uuid4().hex, None)
+        versoes = tuple(cache.get_many(chaves[:2]).get(chave) for chave in chaves[:2])
+        permissoes = _calcular(usuario)
+        cache.set(chaves[2], (*versoes, permissoes), settings.PERMISSOES_CACHE_TEMPO)
+        registro.incrementar("permissoes_resolucoes_total", (("resultado", "falha"),))
+
+    setattr(usuario, ATRIBUTO_CACHE, permissoes)
+    return permissoes
+
+
+def invalidar_permissoes(usuario_ids=None) -> None:
+    """
+        Invalida as permissões em cache dos usuários informados (ou de todos, com ``None``).
+
+        Chamada pelos sinais de alteração de grupos, permissões e usuários
+        (``save()``). Chame-a diretamente ao alterar as tabelas sem sinais:
+        ``QuerySet.update()`` (ex: ``User.objects.filter(...).update(is_active=False)``),
+        ``bulk_update`` ou SQL.
+
+        As versões ficam no cache ``default``, que precisa ser compartilhado
+        entre os workers (ver ``core.apps.verificar_cache_compartilhado``).
+    """
+    if usuario_ids is None:
+        cache.set(CHAVE_VERSAO, uuid.uuid4().hex, None)
+    else:
+        cache.set_many({_chave_versao(usuario_id): uuid.uuid4().hex for usuario_id in usuario_ids}, None)
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+@receiver(m2m_changed, sender=User.user_permissions.through)
+def _usuario_alterado(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    if not reverse:
+        invalidar_permissoes([instance.pk])
+    else:
+        # Alterado pelo lado do grupo/permissão: ``pk_set`` são os usuários (None ao limpar)
+        invalidar_permissoes(pk_set)
+
+
+@receiver(post_save, sender=User)
+def _usuario_salvo(sender, instance, created, update_fields, **kwargs):
+    # is_superuser e is_active alteram o conjunto; o login grava apenas "last_login"
+    if created or (update_fields is not None and not {"is_superuser", "is_active"} & set(update_fields)):
+        return
+    instance.__dict__.pop(ATRIBUTO_CACHE, None)
+    invalidar_permissoes([instance.pk])
+
+
+@receiver(m2m_changed, sender=Group.permissions.through)
+def _perfil_alterado(sender, action, **kwargs):
+    if action in ("post_add", "post_remove", "post_clear"):
+        invalidar_permissoes()
+
+
+@receiver(post_delete, sender=Group)
+@receiver(post_delete, sender=Permission)
+def _perfil_removido(sender, **kwargs):
+    invalidar_permissoes()
+
+
+def sincronizar_perfis() -> dict:
+    """
+        Cria os grupos de ``PERFIS`` e define suas permissões.
+
+        Returns:
+            dict: Quantidade de permissões atribuídas por perfil.
+    """
+    resultado = {}
+    for nome, codigos in PERFIS.items():
+        condicao = Q(pk__in=[])
+        for codigo in codigos:
+            app_label, codename = codigo.split(".")
+            condicao |= Q(content_type__app_label=app_label, codename=codename)
+        perfil, _ = Group.objects.get_or_create(name=nome)
+        permissoes = list(Permission.objects.filter(condicao))
+        perfil.permissions.set(permissoes)
+        resultado[nome] = len(permissoes)
+    return resultado
+
+
+class BackendPermissoes(ModelBackend):
+    """
+        ``ModelBackend`` com o conjunto de permissões resolvido por ``permissoes_usuario``.
+
+        ``user.has_perm``, a variável ``perms`` dos templates e o
+        ``PermissaoRequeridaMixin`` passam por aqui, sem consultas ao banco
+        enquanto a entrada do cache for válida.
+    """
+
+    def get_all_permissions(self, user_obj, obj=None):
+        if obj is not None:
+            return set()
+        return permissoes_usuario(user_obj)
+
+
+class PermissaoRequeridaMixin:
+    """
+        Mixin que exige permissões para acessar a view (usar após o ``LoginRequiredMixin``).
+
+        ``permissao_requerida`` é uma permissão (``app_label.codename``), uma
+        tupla delas ou um dicionário método HTTP -> permissão(ões); métodos
+        ausentes do dicionário não exigem permissão. Sem permissão, exibe
+        ``mensagem_sem_permissao`` e redireciona para ``url_sem_permissao``.
+    """
+    permissao_requerida = ()
+    mensagem_sem_permissao = "Você não tem permissão para acessar esta página."
+    url_sem_permissao = "home"
+
+    def permissoes_requeridas(self, request: HttpRequest) -> tuple:
+        permissoes = self.permissao_requerida
+        if isinstance(permissoes, dict):
+            permissoes = permissoes.get(request.method, ())
+        return (permissoes,) if isinstance(permissoes, str) else tuple(permissoes)
+
+    def dispatch(self, request: HttpRequest, *args, **kwargs) -> HttpResponse:
+        if request.user.is_authenticated and not request.user.has_perms(self.permissoes_requeridas(request)):
+            messages.error(request, self.mensagem_sem_permissao)
+            return redirect(self.url_sem_permissao)
+        return super().dispatch(request, *args, **kwargs)
@@ -0,0 +1,215 @@
+import cProfile
+import io
+import os
+import pstats
+import re
+import uuid
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core import signing
+
+try:
+    from pyinstrument import Profiler as ProfilerAmostragem
+except ImportError:  # pyinstrument é opcional; sem ele usamos o cProfile
+    ProfilerAmostragem = None
+
+_SALT = "core.profiling"
+_RE_PERFIL_ID = re.compile(r"^[0-9a-f]{32}$")
+
+# Formatos disponíveis para download: extensão do arquivo e content-type
+FORMATOS = {
+    "txt": ("txt", "text/plain; charset=utf-8"),
+    "colapsado": ("folded", "text/plain; charset=utf-8"),
+    "prof": ("prof", "application/octet-stream"),
+    "html": ("html", "text/html; charset=utf-8"),
+}
+
+
+def gerar_token_profiling(user: User) -> str:
+    """
+        Gera um token assinado que permite ao usuário da equipe perfilar uma requisição.
+
+        Args:
+            user (User): Usuário da equipe que usará o token.
+
+        Returns:
+            str: Token para o cabeçalho ``X-Profile`` ou o parâmetro ``?_profile=``.
+    """
+    return signing.TimestampSigner(salt=_SALT).sign(str(user.pk))
+
+
+def validar_token_profiling(token: str, user: User) -> bool:
+    """
+        Verifica se o token é válido, não expirou e pertence ao usuário (da equipe) autenticado.
+
+        Args:
+            token (str): Token recebido na requisição.
+            user (User): Usuário autenticado na requisição.
+
+        Returns:
+            bool: True se o profiling pode ser executado.
+    """
+    if not user.is_authenticated or not user.is_staff:
+        return False
+    try:
+        user_id = signing.TimestampSigner(salt=_SALT).unsign(token, max_age=settings.PROFILING_TOKEN_MAX_AGE)
+    except signing.BadSignature:
+        return False
+    return user_id == str(user.pk)
+
+
+def caminho_perfil(perfil_id: str, formato: str) -> str | None:
+    """
+        Retorna o caminho do arquivo de um perfil salvo, ou None se o id/formato for inválido.
+    """
+    if not _RE_PERFIL_ID.match(perfil_id) or formato not in FORMATOS:
+        return None
+    return os.path.join(settings.PROFILING_DIR, f"{perfil_id}.{FORMATOS[formato][0]}")
+
+
+class PerfilRequisicao:
+    """
+        Gerenciador de contexto que perfila uma requisição e salva os resultados em ``PROFILING_DIR``.
+
+        Usa o profiler por amostragem (pyinstrument) quando instalado; caso
+        contrário usa o ``cProfile`` e gera o resumo textual e as pilhas colapsadas.
+
+        Em requisições assíncronas o perfil cobre o código executado no loop de
+        eventos; o ``cProfile`` também registra as demais tarefas que rodarem
+        no loop durante a requisição.
+
+        Uso::
+
+            with PerfilRequisicao(request) as perfil:
+                response = get_response(request)
+            response["X-Profile-Id"] = perfil.perfil_id
+
+        Attributes:
+            perfil_id (str): Id do perfil salvo.
+    """
+
+    def __init__(self, request, assincrono: bool = False):
+        self.request = request
+        self.assincrono = assincrono
+        self.perfil_id = uuid.uuid4().hex
+        self._profiler = None
+
+    def __enter__(self):
+        os.makedirs(settings.PROFILING_DIR, exist_ok=True)
+        if ProfilerAmostragem is not None:
+            self._profiler = ProfilerAmostragem(async_mode="enabled" if self.assincrono else "disabled")
+            self._profiler.start()
+        else:
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        return self
+
+    def __exit__(self, *exc_info):
+        try:
+            self._salvar()
+        finally:
+            podar_perfis()
+
+    def _salvar(self) -> None:
+        if ProfilerAmostragem is not None:
+            self._profiler.stop()
+            _gravar(self.perfil_id, "txt", self._profiler.output_text(unicode=True))
+            _gravar(self.perfil_id, "html", self._profiler.output_html())
+            return
+
+        self._profiler.disable()
+        self._profiler.dump_stats(caminho_perfil(self.perfil_id, "prof"))
+
+        saida = io.StringIO()
+        estatisticas = pstats.Stats(self._profiler, stream=saida).strip_dirs().sort_stats("cumulative")
+        saida.write(f"{self.request.method} {self.request.get_full_path()}\n")
+        estatisticas.print_stats(40)
+        estatisticas.print_callees(20)
+        _gravar(self.perfil_id, "txt", saida.getvalue())
+        _gravar(self.perfil_id, "colapsado", pilhas_colapsadas(pstats.Stats(self._profiler)))
+
+
+def podar_perfis() -> int:
+    """
+        Remove os perfis mais antigos de ``PROFILING_DIR`` além dos ``PROFILING_MAX_PERFIS`` mais recentes.
+
+        Returns:
+            int: Quantidade de perfis removidos.
+    """
+    arquivos = {}
+    for entrada in os.scandir(settings.PROFILING_DIR):
+        perfil_id = entrada.name.split(".", 1)[0]
+        if _RE_PERFIL_ID.match(perfil_id):
+            arquivos.setdefault(perfil_id, []).append(entrada)
+
+    # O perfil mais recente de cada id é o do arquivo gravado por último
+    ordenados = sorted(arquivos, key=lambda perfil_id: max(e.stat().st_mtime for e in arquivos[perfil_id]),
+                       reverse=True)
+    antigos = ordenados[settings.PROFILING_MAX_PERFIS:]
+    for perfil_id in antigos:
+        for entrada in arquivos[perfil_id]:
+            try:
+                os.remove(entrada.path)
+            except FileNotFoundError:  # removido por outro worker
+                pass
+    return len(antigos)
+
+
+def _gravar(perfil_id: str, formato: str, conteudo: str) -> None:
+    """
+        Salva o conteúdo textual de um perfil no formato informado.
+    """
+    with open(caminho_perfil(perfil_id, formato), "w", encoding="utf-8") as arquivo:
+        arquivo.write(conteudo)
+
+
+def pilhas_colapsadas(estatisticas: pstats.Stats, profundidade_maxima: int = 60, limite_visitas: int = 50000) -> str:
+    """
+        Converte estatísticas do cProfile em pilhas colapsadas (``a;b;c microssegundos``).
+
+        O cProfile guarda apenas arestas chamador → chamado, então o tempo de cada
+        caminho é aproximado pelo tempo cumulativo da aresta. O resultado pode ser
+        aberto em ferramentas de flame graph (speedscope, flamegraph.pl).
+
+        Args:
+            estatisticas (pstats.Stats): Estatísticas coletadas.
+            profundidade_maxima (int): Limite de profundidade das pilhas.
+            limite_visitas (int): Quantidade máxima de nós percorridos no grafo de chamadas.
+
+        Returns:
+            str: Uma pilha por linha.
+    """
+    dados = estatisticas.stats
+    chamados = {}
+    for funcao, (_, _, _, _, chamadores) in dados.items():
+        for chamador, (_, _, _, tempo_cumulativo) in chamadores.items():
+            chamados.setdefault(chamador, []).append((funcao, tempo_cumulativo))
+
+    def rotulo(funcao):
+        arquivo, linha, nome = funcao
+        return f"{nome} ({os.path.basename(arquivo)}:{linha})" if linha else nome
+
+    linhas = []
+    visitas = [0]
+
+    def percorrer(funcao, caminho, tempo, visitados):
+        visitas[0] += 1
+        if visitas[0] > limite_visitas:
+            return
+        caminho = caminho + [rotulo(funcao)]
+        # Arestas abaixo de 10µs entram no tempo próprio para limitar o número de caminhos
+        filhos = [] if len(caminho) >= profundidade_maxima else [
+            (f, t) for f, t in chamados.get(funcao, []) if f not in visitados and t >= 0.00001
+        ]
+        tempo_proprio = tempo - sum(t for _, t in filhos)
+        if tempo_proprio > 0:
+            linhas.append(f"{';'.join(caminho)} {int(tempo_proprio * 1_000_000)}")
+        for filho, tempo_filho in filhos:
+            percorrer(filho, caminho, min(tempo_filho, tempo), visitados | {filho})
+
+    for funcao, (_, _, _, tempo_cumulativo, chamadores) in dados.items():
+        if not chamadores:
+            percorrer(funcao, [], tempo_cumulativo, {funcao})
+
+    return "\n".join(linhas) + "\n"
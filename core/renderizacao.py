@@ -0,0 +1,65 @@
+import time
+
+from django.template import TemplateDoesNotExist
+from django.template.backends.django import DjangoTemplates, Template, reraise
+from django.urls import reverse
+
+from core.metricas import registro
+
+# Buckets em segundos: de 0,5 ms (páginas simples) a 2,5 s (tabelas com milhares de linhas)
+BUCKETS_RENDERIZACAO = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+registro.definir("template_renderizacao_seconds", "histogram",
+                 "Duração da renderização de cada template, por template.", BUCKETS_RENDERIZACAO)
+registro.definir("template_bloco_seconds", "histogram",
+                 "Duração dos trechos marcados com {% medir %}, por template e trecho.", BUCKETS_RENDERIZACAO)
+
+
+class TemplateMedido(Template):
+    """
+        Template do backend do Django que registra a duração de cada renderização.
+    """
+
+    def render(self, context=None, request=None):
+        inicio = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            registro.observar("template_renderizacao_seconds", (("template", self.origin.template_name or ""),),
+                              time.perf_counter() - inicio)
+
+
+class TemplatesMedidos(DjangoTemplates):
+    """
+        Backend ``DjangoTemplates`` que mede a renderização de cada template (``template_renderizacao_seconds``).
+
+        Configurado em ``TEMPLATES['BACKEND']``; os trechos internos de um
+        template (ex: o corpo de uma tabela) são medidos com a tag ``{% medir %}``
+        da biblioteca ``renderizacao``.
+    """
+
+    def from_string(self, template_code):
+        return TemplateMedido(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        try:
+            return TemplateMedido(self.engine.get_template(template_name), self)
+        except TemplateDoesNotExist as exc:
+            reraise(exc, self)
+
+
+def url_por_id(nome: str):
+    """
+        Resolve uma rota com um único argumento inteiro uma vez e devolve uma função ``id -> URL``.
+
+        Evita um ``reverse`` (e um ``{% url %}``) por linha ao montar tabelas grandes.
+
+        Args:
+            nome (str): Nome da rota (ex: ``"editar_produto"``).
+
+        Returns:
+            Callable[[int], str]: Função que monta a URL do objeto.
+    """
+    marcador = 2147483647
+    prefixo, sufixo = reverse(nome, args=[marcador]).split(str(marcador))
+    return lambda objeto_id: f"{prefixo}{objeto_id}{sufixo}"
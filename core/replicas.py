@@ -0,0 +1,119 @@
+import random
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections, DatabaseError
+from django.http import HttpRequest, HttpResponse
+
+# Indica se as leituras do contexto atual (requisição/thread/tarefa) podem ir para uma réplica
+_leitura_em_replica = ContextVar("leitura_em_replica", default=False)
+
+# Cache do atraso de replicação por alias: {alias: (momento da verificação, atraso em segundos)}
+_atrasos = {}
+
+COOKIE_ESCRITA = "escrita_recente"
+
+
+def aliases_replicas() -> list[str]:
+    """
+        Retorna os aliases de ``settings.DATABASES`` configurados como réplicas de leitura.
+    """
+    return [alias for alias in settings.DATABASES if alias.startswith("replica_")]
+
+
+def atraso_replica(alias: str) -> float:
+    """
+        Retorna o atraso de replicação (em segundos) de uma réplica.
+
+        O valor é consultado no máximo uma vez a cada ``REPLICA_INTERVALO_VERIFICACAO``
+        segundos. Bancos sem replicação nativa (ex: SQLite) retornam 0 e réplicas
+        inacessíveis retornam infinito.
+
+        Args:
+            alias (str): Alias da réplica.
+
+        Returns:
+            float: Atraso em segundos.
+    """
+    agora = time.monotonic()
+    verificado = _atrasos.get(alias)
+    if verificado and agora - verificado[0] < settings.REPLICA_INTERVALO_VERIFICACAO:
+        return verificado[1]
+
+    if "postgresql" not in settings.DATABASES[alias]["ENGINE"]:
+        atraso = 0.0
+    else:
+        try:
+            with connections[alias].cursor() as cursor:
+                cursor.execute(
+                    "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+                    "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+                )
+                atraso = float(cursor.fetchone()[0])
+        except DatabaseError:
+            atraso = float("inf")
+
+    _atrasos[alias] = (agora, atraso)
+    return atraso
+
+
+class RoteadorReplicas:
+    """
+        Roteador de banco que envia as leituras marcadas com ``LeituraReplicaMixin``
+        para uma réplica saudável.
+
+        Escritas, migrações e leituras fora das views marcadas usam sempre o
+        banco ``default``. Réplicas com atraso acima de ``REPLICA_ATRASO_MAXIMO``
+        são ignoradas; sem réplicas disponíveis a leitura volta para o primário.
+    """
+
+    def db_for_read(self, model, **hints):
+        if not _leitura_em_replica.get():
+            return None
+
+        saudaveis = [a for a in aliases_replicas() if atraso_replica(a) <= settings.REPLICA_ATRASO_MAXIMO]
+        return random.choice(saudaveis) if saudaveis else "default"
+
+    def db_for_write(self, model, **hints):
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Primário e réplicas contêm os mesmos dados
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return not db.startswith("replica_")
+
+
+class LeituraReplicaMixin:
+    """
+        Mixin para views somente leitura cujas consultas podem ir para uma réplica.
+
+        Requisições GET/HEAD usam a réplica, exceto quando a sessão escreveu
+        recentemente (cookie ``escrita_recente``, válido por ``REPLICA_JANELA_ESCRITA``
+        segundos), garantindo que o usuário veja as próprias alterações.
+
+        Em views assíncronas a marcação vale para a corrotina da view e é
+        propagada às threads do ORM assíncrono junto com o contexto.
+    """
+
+    def dispatch(self, request: HttpRequest, *args, **kwargs) -> HttpResponse:
+        if request.method not in ("GET", "HEAD") or COOKIE_ESCRITA in request.COOKIES:
+            return super().dispatch(request, *args, **kwargs)
+
+        if self.view_is_async:
+            return self._dispatch_assincrono(request, *args, **kwargs)
+
+        token = _leitura_em_replica.set(True)
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        finally:
+            _leitura_em_replica.reset(token)
+
+    async def _dispatch_assincrono(self, request: HttpRequest, *args, **kwargs) -> HttpResponse:
+        token = _leitura_em_replica.set(True)
+        try:
+            return await super().dispatch(request, *args, **kwargs)
+        finally:
+            _leitura_em_replica.reset(token)
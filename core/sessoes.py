@@ -0,0 +1,36 @@
+from django.conf import settings
+from django.contrib.sessions.models import Session
+from django.utils import timezone
+
+# Engines que gravam as sessões na tabela django_session
+ENGINES_BANCO = ("django.contrib.sessions.backends.db", "django.contrib.sessions.backends.cached_db")
+
+
+def limpar_sessoes_expiradas(lote: int = 5000) -> int:
+    """
+        Remove as sessões expiradas da tabela ``django_session`` em lotes.
+
+        O ``clearsessions`` do Django apaga todas as expiradas com um único
+        ``DELETE``, que em tabelas grandes mantém bloqueios e gera WAL por muito
+        tempo. Aqui cada lote seleciona até ``lote`` chaves e as apaga pela
+        chave primária, em transações curtas.
+
+        Com sessões apenas em cache (``SESSION_ENGINE`` ``cache``) não há nada a
+        remover: as entradas expiram sozinhas.
+
+        Args:
+            lote (int): Sessões removidas por comando ``DELETE``.
+
+        Returns:
+            int: Quantidade de sessões removidas.
+    """
+    if settings.SESSION_ENGINE not in ENGINES_BANCO:
+        return 0
+
+    removidas = 0
+    agora = timezone.now()
+    while chaves := list(
+        Session.objects.filter(expire_date__lt=agora).values_list("session_key", flat=True)[:lote]
+    ):
+        removidas += Session.objects.filter(session_key__in=chaves).delete()[0]
+    return removidas
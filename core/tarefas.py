@@ -0,0 +1,330 @@
+import multiprocessing
+import os
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from concurrent.futures.process import BrokenProcessPool
+from datetime import timedelta
+from importlib import import_module
+
+from django.conf import settings
+from django.db import connection, connections, close_old_connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from core.metricas import registro
+from core.models import Tarefa
+
+# Funções que podem ser executadas pelo worker, por caminho completo
+_registro_tarefas = {}
+
+ERRO_RESERVA_VENCIDA = "Reserva vencida: o worker foi interrompido ou a execução passou de TAREFAS_ARRENDAMENTO."
+
+registro.definir("tarefas_duracao_seconds", "histogram", "Duração da execução das tarefas em segundo plano.",
+                 buckets=(0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 300.0))
+registro.definir("tarefas_total", "counter", "Execuções de tarefas por resultado (concluida/falha/morta).")
+
+
+def tarefa(funcao):
+    """
+        Decorador que registra uma função como tarefa executável pelo worker.
+
+        Apenas funções registradas são executadas, então um nome gravado na
+        tabela não permite chamar código arbitrário.
+    """
+    _registro_tarefas[f"{funcao.__module__}.{funcao.__qualname__}"] = funcao
+    return funcao
+
+
+def _resolver(nome: str):
+    modulo, _, _ = nome.rpartition(".")
+    import_module(modulo)
+    return _registro_tarefas[nome]
+
+
+def enfileirar(funcao, prioridade: int = 0, executar_em=None, max_tentativas: int = 3, **argumentos) -> Tarefa:
+    """
+        Agenda a execução de uma tarefa em segundo plano.
+
+        Chamada dentro de uma transação, a tarefa só fica visível para o worker
+        após o commit, junto com os dados que ela usa.
+
+        Args:
+            funcao (Callable | str): Função decorada com ``@tarefa`` ou seu caminho completo.
+            prioridade (int): Tarefas com prioridade maior são executadas primeiro.
+            executar_em (datetime | None): Agendamento (padrão: imediatamente).
+            max_tentativas (int): Execuções antes de a tarefa ir para a fila de mortas.
+            **argumentos: Argumentos nomeados (serializáveis em JSON) da função.
+
+        Returns:
+            Tarefa: Registro criado.
+    """
+    nome = funcao if isinstance(funcao, str) else f"{funcao.__module__}.{funcao.__qualname__}"
+    if nome not in _registro_tarefas:
+        raise ValueError(f"Função '{nome}' não registrada com @tarefa.")
+
+    return Tarefa.objects.create(
+        nome=nome, argumentos=argumentos, prioridade=prioridade, max_tentativas=max_tentativas,
+        executar_em=executar_em or timezone.now(),
+    )
+
+
+def reservar_tarefas(quantidade: int) -> list[Tarefa]:
+    """
+        Reserva até ``quantidade`` tarefas vencidas, em ordem de prioridade e horário.
+
+        No PostgreSQL usa ``SELECT ... FOR UPDATE SKIP LOCKED``: workers
+        simultâneos pulam as linhas já reservadas em vez de esperar por elas.
+        Bancos sem ``SKIP LOCKED`` (ex: SQLite) reservam cada candidata com um
+        ``UPDATE`` condicional ao status, e quem perde a disputa pula a linha.
+
+        Reservas vencidas (worker interrompido ou travado) contam como uma
+        tentativa com falha: voltam antes para a fila ou, ao esgotar
+        ``max_tentativas``, vão para a fila de mortas. Assim uma tarefa que
+        derruba o worker não é repetida indefinidamente.
+    """
+    agora = timezone.now()
+    vencidas = Tarefa.objects.filter(status="executando", reservada_ate__lt=agora)
+    falha = {"tentativas": F("tentativas") + 1, "reservada_ate": None, "erro": ERRO_RESERVA_VENCIDA}
+    vencidas.filter(tentativas__gte=F("max_tentativas") - 1).update(status="morta", **falha)
+    vencidas.update(status="pendente", **falha)
+
+    candidatas = (
+        Tarefa.objects.filter(status="pendente", executar_em__lte=agora)
+        .order_by("-prioridade", "executar_em", "id")
+    )
+    reserva = {"status": "executando", "reservada_ate": agora + timedelta(seconds=settings.TAREFAS_ARRENDAMENTO)}
+
+    if connection.features.has_select_for_update_skip_locked:
+        with transaction.atomic():
+            tarefas = list(candidatas.select_for_update(skip_locked=True)[:quantidade])
+            Tarefa.objects.filter(id__in=[t.id for t in tarefas]).update(**reserva)
+        return tarefas
+
+    return [t for t in candidatas[:quantidade] if Tarefa.objects.filter(id=t.id, status="pendente").update(**reserva)]
+
+
+def devolver(tarefas: list[Tarefa]) -> int:
+    """
+        Devolve para a fila, sem contar tentativa, tarefas reservadas que não chegaram a terminar por causa do worker.
+    """
+    return Tarefa.objects.filter(id__in=[t.id for t in tarefas], status="executando").update(
+        status="pendente", reservada_ate=None
+    )
+
+
+def _executar(nome: str, argumentos: dict) -> tuple[float, str | None]:
+    """
+        Executa uma tarefa e retorna (duração em segundos, traceback da falha ou ``None``).
+
+        Roda no processo do pool: a falha volta como texto, já que nem toda exceção pode ser serializada.
+    """
+    close_old_connections()
+    inicio = time.perf_counter()
+    try:
+        _resolver(nome)(**argumentos)
+        erro = None
+    except Exception:
+        erro = traceback.format_exc()
+    finally:
+        close_old_connections()
+    return time.perf_counter() - inicio, erro
+
+
+def finalizar(tarefa_: Tarefa, duracao: float, erro: str | None) -> str:
+    """
+        Grava o resultado de uma execução e as métricas da tarefa.
+
+        Falhas voltam para a fila com espera exponencial
+        (``TAREFAS_ESPERA_BASE`` * 2^(tentativas - 1)); ao esgotar
+        ``max_tentativas`` a tarefa fica com status 'morta' (fila de mortas)
+        para análise e reexecução manual.
+
+        Returns:
+            str: Resultado ('concluida', 'falha' ou 'morta').
+    """
+    agora = timezone.now()
+    campos = {"duracao_ms": round(duracao * 1000, 3), "reservada_ate": None}
+
+    if erro is None:
+        resultado = "concluida"
+        campos.update(status="concluida", concluida_em=agora, erro="")
+    else:
+        tentativas = tarefa_.tentativas + 1
+        resultado = "morta" if tentativas >= tarefa_.max_tentativas else "falha"
+        espera = settings.TAREFAS_ESPERA_BASE * 2 ** (tentativas - 1)
+        campos.update(
+            tentativas=tentativas, erro=erro[-5000:],
+            status="morta" if resultado == "morta" else "pendente",
+            executar_em=agora + timedelta(seconds=espera),
+        )
+
+    Tarefa.objects.filter(id=tarefa_.id).update(**campos)
+    labels = (("tarefa", tarefa_.nome),)
+    registro.observar("tarefas_duracao_seconds", labels, duracao)
+    registro.incrementar("tarefas_total", (("resultado", resultado),) + labels)
+    return resultado
+
+
+def _criar_pool(processos: int) -> ProcessPoolExecutor:
+    # Os processos são criados por fork com o Django já carregado. Com "fork" o
+    # executor cria todo o pool no primeiro envio, então as conexões são fechadas
+    # antes dele: cada processo abre a sua e nenhum herda o socket do processo pai.
+    connections.close_all()
+    pool = ProcessPoolExecutor(processos, mp_context=multiprocessing.get_context("fork"))
+    pool.submit(os.getpid).result(timeout=settings.TAREFAS_TIMEOUT)
+    return pool
+
+
+def _encerrar_pool(pool: ProcessPoolExecutor) -> None:
+    """
+        Encerra o pool sem esperar as tarefas em execução, matando os processos.
+    """
+    # ProcessPoolExecutor não interrompe uma tarefa em execução; o Python 3.14 tem terminate_workers()
+    for processo in list((pool._processes or {}).values()):
+        processo.terminate()
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _recriar_pool(pool: ProcessPoolExecutor, processos: int) -> ProcessPoolExecutor:
+    _encerrar_pool(pool)
+    return _criar_pool(processos)
+
+
+def executar_worker(processos: int = 2, intervalo: float = 1.0, drenar: bool = False) -> dict:
+    """
+        Reserva e executa tarefas continuamente em um pool de processos.
+
+        Cada processo executa uma tarefa por vez; novas tarefas são reservadas
+        assim que há processos livres. Com ``processos=0`` as tarefas rodam no
+        próprio processo (desenvolvimento com SQLite e testes), sem limite de tempo.
+
+        Uma tarefa que passa de ``TAREFAS_TIMEOUT`` segundos conta como falha e
+        o pool é recriado, já que o processo dela não pode ser interrompido
+        sozinho; as demais tarefas em execução voltam para a fila sem contar
+        tentativa. Se um processo do pool morre (ex: encerrado pelo sistema),
+        o pool não informa qual tarefa o matou: todas as tarefas em execução
+        voltam para a fila sem contar tentativa, o pool é recriado e cada uma
+        delas (suspeita) é executada sozinha no pool na próxima reserva. Apenas
+        quando o processo morre com uma única tarefa em execução ela conta
+        como falha, então uma tarefa que sempre derruba o processo chega à fila
+        de mortas sem consumir as tentativas das demais.
+
+        Args:
+            processos (int): Tamanho do pool (0 = sem pool).
+            intervalo (float): Segundos de espera com a fila vazia.
+            drenar (bool): Termina quando não houver tarefas vencidas nem em execução.
+
+        Returns:
+            dict: Quantidade de execuções por resultado.
+    """
+    resultados = {"concluida": 0, "falha": 0, "morta": 0}
+
+    if processos == 0:
+        while True:
+            tarefas = reservar_tarefas(1)
+            if not tarefas:
+                if drenar:
+                    return resultados
+                time.sleep(intervalo)
+                continue
+            resultados[finalizar(tarefas[0], *_executar(tarefas[0].nome, tarefas[0].argumentos))] += 1
+            registro.talvez_gravar()
+
+    # Futuro -> (tarefa, início da execução)
+    em_execucao = {}
+    # Ids das tarefas em execução quando um processo do pool morreu, executadas depois sozinhas no pool
+    suspeitas = set()
+    aguardando_isolamento = False
+    pool = _criar_pool(processos)
+    try:
+        while True:
+            isolando = any(tarefa_.id in suspeitas for tarefa_, _ in em_execucao.values())
+            aguardando_isolamento = aguardando_isolamento and bool(em_execucao)
+            livres = 0 if isolando or aguardando_isolamento else processos - len(em_execucao)
+            reservadas = reservar_tarefas(livres) if livres else []
+
+            suspeita = next((tarefa_ for tarefa_ in reservadas if tarefa_.id in suspeitas), None)
+            if suspeita is not None:
+                # A suspeita espera o pool esvaziar; as demais reservadas voltam para a fila se ela roda agora
+                adiadas = [suspeita] if em_execucao else [t for t in reservadas if t is not suspeita]
+                devolver(adiadas)
+                reservadas = [t for t in reservadas if t not in adiadas]
+                aguardando_isolamento = bool(em_execucao)
+
+            for indice, tarefa_ in enumerate(reservadas):
+                try:
+                    futuro = pool.submit(_executar, tarefa_.nome, tarefa_.argumentos)
+                except BrokenProcessPool:
+                    # Um processo morreu depois da última verificação: as tarefas não enviadas voltam para a fila
+                    devolver(reservadas[indice:])
+                    pool = _recriar_pool(pool, processos)
+                    break
+                em_execucao[futuro] = (tarefa_, time.monotonic())
+
+            if not em_execucao:
+                if drenar and not reservadas:
+                    return resultados
+                if not reservadas:
+                    time.sleep(intervalo)
+                continue
+
+            concluidas, _ = wait(em_execucao, timeout=intervalo, return_when=FIRST_COMPLETED)
+            quebra = next((f.exception() for f in concluidas if isinstance(f.exception(), BrokenProcessPool)), None)
+            if quebra is not None:
+                # Com o pool quebrado, os futuros já concluídos com resultado valem; os demais não terminaram
+                afetadas = [tarefa_ for futuro, (tarefa_, _) in em_execucao.items()
+                            if not futuro.done() or futuro.exception() is not None]
+                concluidas = [futuro for futuro in em_execucao if futuro.done() and futuro.exception() is None]
+            for futuro in concluidas:
+                tarefa_, _ = em_execucao.pop(futuro)
+                suspeitas.discard(tarefa_.id)
+                # Uma exceção aqui é do próprio pool
+                erro = futuro.exception()
+                duracao, falha = (0.0, repr(erro)) if erro else futuro.result()
+                resultados[finalizar(tarefa_, duracao, falha)] += 1
+
+            agora = time.monotonic()
+            expiradas = [] if quebra else [
+                f for f, (_, inicio) in em_execucao.items() if agora - inicio > settings.TAREFAS_TIMEOUT
+            ]
+            for futuro in expiradas:
+                tarefa_, inicio = em_execucao.pop(futuro)
+                suspeitas.discard(tarefa_.id)
+                resultados[finalizar(tarefa_, agora - inicio,
+                                     f"Tempo limite excedido ({settings.TAREFAS_TIMEOUT:g} s).")] += 1
+            if quebra is not None and len(afetadas) == 1:
+                # Única tarefa em execução: o processo morreu com ela
+                suspeitas.discard(afetadas[0].id)
+                resultados[finalizar(afetadas[0], 0.0, repr(quebra))] += 1
+            elif quebra is not None:
+                devolver(afetadas)
+                suspeitas.update(tarefa_.id for tarefa_ in afetadas)
+            if expiradas or quebra is not None:
+                # As demais tarefas em execução morreriam com o pool: voltam para a fila sem contar tentativa
+                devolver([tarefa_ for tarefa_, _ in em_execucao.values()])
+                em_execucao.clear()
+                pool = _recriar_pool(pool, processos)
+            registro.talvez_gravar()
+    finally:
+        _encerrar_pool(pool)
+        devolver([tarefa_ for tarefa_, _ in em_execucao.values()])
+
+
+def reenfileirar_mortas() -> int:
+    """
+        Devolve as tarefas mortas para a fila, com as tentativas zeradas.
+
+        Returns:
+            int: Quantidade de tarefas reenfileiradas.
+    """
+    return Tarefa.objects.filter(status="morta").update(
+        status="pendente", tentativas=0, executar_em=timezone.now(), erro=""
+    )
+
+
+def limpar_concluidas(dias: int) -> int:
+    """
+        Remove as tarefas concluídas há mais de ``dias`` dias.
+    """
+    return Tarefa.objects.filter(status="concluida", concluida_em__lt=timezone.now() - timedelta(days=dias)).delete()[0]
@@ -0,0 +1,38 @@
+import time
+
+from django import template
+
+from core.metricas import registro
+
+register = template.Library()
+
+
+class MedirNode(template.Node):
+    def __init__(self, nome: str, nodelist):
+        self.nome = nome
+        self.nodelist = nodelist
+
+    def render(self, context):
+        inicio = time.perf_counter()
+        try:
+            return self.nodelist.render(context)
+        finally:
+            labels = (("bloco", self.nome), ("template", context.template_name or ""))
+            registro.observar("template_bloco_seconds", labels, time.perf_counter() - inicio)
+
+
+@register.tag
+def medir(parser, token):
+    """
+        Mede a renderização do trecho até ``{% endmedir %}`` (histograma ``template_bloco_seconds``).
+
+        Uso:
+            {% load renderizacao %}
+            {% medir "linhas" %} ... {% endmedir %}
+    """
+    partes = token.split_contents()
+    if len(partes) != 2 or partes[1][0] not in "\"'" or partes[1][0] != partes[1][-1]:
+        raise template.TemplateSyntaxError("Uso: {% medir \"nome\" %} ... {% endmedir %}")
+    nodelist = parser.parse(("endmedir",))
+    parser.delete_first_token()
+    return MedirNode(partes[1][1:-1], nodelist)
@@ -1,3 +1,863 @@
-from django.test import TestCase
+import importlib
+import os
+import socketserver
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth.models import Group, Permission, User
+from django.contrib.sessions.backends.db import SessionStore
+from django.contrib.sessions.models import Session
+from django.core import checks
+from django.core.cache import cache
+from django.db import connection
+from django.http import HttpResponse
+from django.template import Template, Context, engines
+from django.test import TestCase, RequestFactory, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from django.views import View
+
+from core.apps import verificar_cache_compartilhado
+from core.aquecimento import abrir_conexoes, aquecer, modulos_servidor
+from core.benchmark import executar_benchmark, comparar_com_baseline, carregar_resultado
+from core.consultas_lentas import RegistroConsultasLentas
+from core.email_fila import enfileirar_email, processar_fila, _reservar
+from core.importacoes import MedidorImportacoes, medidor
+from core.limite_login import consumir_tentativa, ip_cliente
+from core.metricas import RegistroMetricas, registro
+from core.models import EmailFila, Tarefa
+from core.permissoes import sincronizar_perfis
+from core.profiling import gerar_token_profiling
+from core.n_mais_um import DetectorNMaisUm, ConsultasRepetidasError
+from core.replicas import RoteadorReplicas, LeituraReplicaMixin, COOKIE_ESCRITA
+from core.sessoes import limpar_sessoes_expiradas
+from core.tarefas import tarefa, enfileirar, reservar_tarefas, executar_worker, reenfileirar_mortas
+from estoque.models import Produto, Movimentacao
+
+
+class BenchmarkViewsTest(TestCase):
+    """
+        Executa o harness de benchmark sobre todas as views de ``core``, ``estoque`` e ``user``.
+
+        O teste de regressão só roda quando ``BENCHMARK_BASELINE`` aponta para um
+        JSON gerado por ``python manage.py benchmark --saida``.
+    """
+
+    def test_todas_as_views_respondem_sem_erro(self):
+        resultado = executar_benchmark(produtos=5, movimentacoes=20, usuarios=3, repeticoes=1, aquecimento=0)
+
+        self.assertIn("listar_estoque", resultado["rotas"])
+        self.assertIn("listar_usuarios", resultado["rotas"])
+        self.assertIn("home", resultado["rotas"])
+        for nome, dados in resultado["rotas"].items():
+            self.assertLess(dados["status"], 500, nome)
+            self.assertGreaterEqual(dados["p95_ms"], dados["p50_ms"], nome)
+
+    def test_comparacao_detecta_regressao(self):
+        baseline = {"rotas": {"home": {"p50_ms": 10.0, "consultas": 2}}}
+        atual = {"rotas": {"home": {"p50_ms": 20.0, "consultas": 3}}}
+
+        self.assertEqual(len(comparar_com_baseline(atual, baseline, limite=0.2)), 2)
+        self.assertEqual(comparar_com_baseline(baseline, baseline, limite=0.2), [])
+
+    @unittest.skipUnless(os.getenv("BENCHMARK_BASELINE"), "Defina BENCHMARK_BASELINE para comparar com uma baseline.")
+    def test_sem_regressao_em_relacao_a_baseline(self):
+        baseline = carregar_resultado(os.environ["BENCHMARK_BASELINE"])
+        dados = baseline["metadados"]["dados"]
+        resultado = executar_benchmark(
+            produtos=dados["produtos"],
+            movimentacoes=dados["movimentacoes"],
+            usuarios=dados["usuarios"],
+            seed=dados["seed"],
+            repeticoes=baseline["metadados"]["repeticoes"],
+        )
+
+        regressoes = comparar_com_baseline(resultado, baseline, float(os.getenv("BENCHMARK_LIMITE", "0.2")))
+        self.assertEqual(regressoes, [], "\n".join(regressoes))
+
+
+class DetectorNMaisUmTest(TestCase):
+    """
+        Verifica a detecção de consultas N+1 e o relatório com a linha do template.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = User.objects.create_superuser("admin_teste", "admin@example.com", "senha-teste")
+        produtos = Produto.objects.bulk_create([Produto(nome=f"Produto {i}") for i in range(10)])
+        Movimentacao.objects.bulk_create(
+            [Movimentacao(usuario=cls.usuario, produto=p, quantidade=1, tipo="entrada") for p in produtos]
+        )
+
+    def test_detecta_acesso_por_linha_no_template(self):
+        template = Template("{% for m in movimentacoes %}\n{{ m.produto.nome }}\n{% endfor %}")
+
+        with DetectorNMaisUm(limite=5) as detector:
+            template.render(Context({"movimentacoes": Movimentacao.objects.all()}))
+
+        self.assertEqual(len(detector.ocorrencias), 1)
+        self.assertIn("linha 2", detector.relatorio())
+        self.assertIn('"produtos"', detector.relatorio())
+
+    def test_select_related_nao_e_sinalizado(self):
+        template = Template("{% for m in movimentacoes %}{{ m.produto.nome }}{% endfor %}")
+
+        with DetectorNMaisUm(limite=5) as detector:
+            template.render(Context({"movimentacoes": Movimentacao.objects.select_related("produto")}))
+
+        self.assertEqual(detector.ocorrencias, [])
+
+    @override_settings(N_MAIS_UM_DETECTOR=True, N_MAIS_UM_LEVANTAR=True, N_MAIS_UM_LIMITE=3)
+    def test_middleware_falha_a_requisicao(self):
+        self.client.force_login(self.usuario)
+        with self.assertRaises(ConsultasRepetidasError):
+            self.client.get("/admin/estoque/movimentacao/")
+
+
+class RoteadorReplicasTest(TestCase):
+    """
+        Verifica o roteamento de leituras entre primário e réplica.
+
+        A réplica ``replica_0`` é simulada; o atraso é fixado em 0 como em um arquivo SQLite local.
+    """
+
+    class ViewLeitura(LeituraReplicaMixin, View):
+        def get(self, request):
+            return HttpResponse(RoteadorReplicas().db_for_read(Produto) or "default")
+
+    def setUp(self):
+        for alvo, valor in (("core.replicas.aliases_replicas", ["replica_0"]),
+                            ("core.middleware.aliases_replicas", ["replica_0"]),
+                            ("core.replicas.atraso_replica", 0.0)):
+            patcher = mock.patch(alvo, return_value=valor)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def ler(self, **cookies) -> str:
+        request = RequestFactory().get("/")
+        request.COOKIES.update(cookies)
+        return self.ViewLeitura.as_view()(request).content.decode()
+
+    def test_view_de_leitura_usa_replica(self):
+        self.assertEqual(self.ler(), "replica_0")
+
+    def test_leituras_fora_das_views_marcadas_usam_primario(self):
+        self.assertIsNone(RoteadorReplicas().db_for_read(Produto))
+        self.assertEqual(RoteadorReplicas().db_for_write(Produto), "default")
+
+    def test_le_do_primario_apos_escrita(self):
+        self.assertEqual(self.ler(**{COOKIE_ESCRITA: "1"}), "default")
+
+    def test_replica_atrasada_volta_para_primario(self):
+        with mock.patch("core.replicas.atraso_replica", return_value=settings.REPLICA_ATRASO_MAXIMO + 1):
+            self.assertEqual(self.ler(), "default")
+
+    def test_sem_replicas_usa_primario(self):
+        with mock.patch("core.replicas.aliases_replicas", return_value=[]):
+            self.assertEqual(self.ler(), "default")
+
+    def test_post_marca_escrita_recente(self):
+        self.client.force_login(User.objects.create_user("operador", "op@example.com", "senha-teste"))
+        response = self.client.post(reverse("registrar_movimentacao"), {"quantidade": "0"})
+        self.assertIn(COOKIE_ESCRITA, response.cookies)
+
+
+@override_settings(METRICS_DIR="")
+class MetricasGaugeTest(TestCase):
+    """
+        Gauges são atualizados antes da exportação e exportados com o tipo correto.
+    """
+
+    def test_atualizador_preenche_gauge(self):
+        registro = RegistroMetricas()
+        registro.definir("django_db_pool_connections", "gauge", "Conexões do pool.")
+        registro.registrar_atualizador(
+            lambda: registro.ajustar("django_db_pool_connections", (("alias", "default"), ("estado", "em_uso")), 3)
+        )
+
+        texto = registro.exportar()
+
+        self.assertIn("# TYPE django_db_pool_connections gauge", texto)
+        self.assertIn('django_db_pool_connections{alias="default",estado="em_uso"} 3', texto)
+
+
+@override_settings(METRICS_DIR="")
+class MetricasRotaTest(TestCase):
+    """
+        A rota ``/metrics`` exige o token e o ``MetricasMiddleware`` mede as requisições por view.
+    """
+
+    @override_settings(METRICS_TOKEN="")
+    def test_sem_token_configurado_responde_404(self):
+        response = self.client.get(reverse("metrics"))
+
+        self.assertEqual(response.status_code, 404)
+
+    @override_settings(METRICS_TOKEN="segredo")
+    def test_token_invalido_responde_403(self):
+        response = self.client.get(reverse("metrics"), HTTP_AUTHORIZATION="Bearer errado")
+
+        self.assertEqual(response.status_code, 403)
+
+    @override_settings(METRICS_TOKEN="segredo")
+    def test_token_valido_exporta_metricas(self):
+        response = self.client.get(reverse("metrics"), HTTP_AUTHORIZATION="Bearer segredo")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("# TYPE django_http_request_duration_seconds histogram", response.content.decode())
+
+    def test_middleware_registra_duracao_da_view(self):
+        chave = ("django_http_request_duration_seconds", (("view", "login"), ("method", "GET")))
+        antes = sum(registro._histogramas.get(chave, [0])[:-1])
+
+        self.client.get(reverse("login"))
+
+        self.assertEqual(sum(registro._histogramas[chave][:-1]), antes + 1)
+
+
+@override_settings(METRICS_DIR="", SLOW_QUERY_AGREGADOS=2)
+class ConsultasLentasTest(TestCase):
+    """
+        O middleware registra as consultas acima do limite e os agregados por impressão digital são limitados.
+    """
+
+    @override_settings(SLOW_QUERY_MS=0.000001)
+    def test_middleware_registra_consultas_da_view(self):
+        registro_lentas = RegistroConsultasLentas()
+        self.client.force_login(User.objects.create_user("lento", password="senha"))
+
+        with mock.patch("core.consultas_lentas.consultas_lentas", registro_lentas):
+            self.client.get(reverse("home"))
+
+        self.assertTrue(registro_lentas.ultimas())
+        self.assertEqual({entrada["view"] for entrada in registro_lentas.ultimas()}, {"home"})
+
+    def test_agregados_descartam_a_impressao_digital_menos_frequente(self):
+        registro_lentas = RegistroConsultasLentas()
+        for sql in ("UPDATE a SET x = 1", "UPDATE a SET x = 2", "UPDATE b SET x = 1", "UPDATE c SET x = 1"):
+            registro_lentas.registrar("default", sql, None, 0.5, "home")
+
+        fingerprints = {agregado["fingerprint"] for agregado in registro_lentas.mais_frequentes()}
+        self.assertEqual(fingerprints, {"UPDATE a SET x = ?", "UPDATE c SET x = ?"})
+
+
+@override_settings(METRICS_DIR="", PROFILING_MAX_PERFIS=2)
+class ProfilingTest(TestCase):
+    """
+        O middleware perfila a requisição com token válido e mantém apenas os perfis mais recentes.
+    """
+
+    def setUp(self):
+        diretorio = tempfile.TemporaryDirectory()
+        self.addCleanup(diretorio.cleanup)
+        configuracao = override_settings(PROFILING_DIR=diretorio.name)
+        configuracao.enable()
+        self.addCleanup(configuracao.disable)
+        self.diretorio = diretorio.name
+        self.usuario = User.objects.create_user("perfil", password="senha", is_staff=True)
+        self.client.force_login(self.usuario)
+
+    def test_sem_token_valido_nao_perfila(self):
+        response = self.client.get(reverse("home"), HTTP_X_PROFILE="invalido")
+
+        self.assertNotIn("X-Profile-Id", response)
+        self.assertEqual(os.listdir(self.diretorio), [])
+
+    def test_mantem_apenas_os_perfis_mais_recentes(self):
+        token = gerar_token_profiling(self.usuario)
+
+        ids = [self.client.get(reverse("home"), HTTP_X_PROFILE=token)["X-Profile-Id"] for _ in range(3)]
+
+        restantes = {nome.split(".", 1)[0] for nome in os.listdir(self.diretorio)}
+        self.assertEqual(restantes, set(ids[1:]))
+        response = self.client.get(reverse("download_perfil", args=[ids[-1]]))
+        self.assertEqual(response.status_code, 200)
+
+
+class _SessaoSMTP(socketserver.StreamRequestHandler):
+    """
+        Atende uma conexão do servidor SMTP de testes (subconjunto do RFC 5321 usado pelo smtplib).
+    """
+
+    def responder(self, linha: str) -> None:
+        self.wfile.write(f"{linha}\r\n".encode())
+
+    def handle(self):
+        servidor = self.server
+        servidor.conexoes += 1
+        self.responder("220 localhost SMTP de testes")
+        destinatarios = []
+        while linha := self.rfile.readline().decode().strip():
+            comando = linha[:4].upper()
+            if comando in ("EHLO", "HELO"):
+                self.responder("250 localhost")
+            elif comando == "MAIL":
+                destinatarios = []
+                self.responder("250 OK")
+            elif comando == "RCPT":
+                endereco = linha.split(":", 1)[1].strip(" <>")
+                if endereco in servidor.recusados:
+                    self.responder("550 Destinatário recusado")
+                else:
+                    destinatarios.append(endereco)
+                    self.responder("250 OK")
+            elif comando == "DATA":
+                self.responder("354 Envie a mensagem")
+                while self.rfile.readline() not in (b".\r\n", b""):
+                    pass
+                servidor.entregues.extend(destinatarios)
+                self.responder("250 OK")
+            elif comando == "QUIT":
+                self.responder("221 Tchau")
+                break
+            else:
+                self.responder("250 OK")
+
+
+class ServidorSMTPTeste(socketserver.ThreadingTCPServer):
+    """
+        Servidor SMTP local que registra as conexões e os destinatários entregues.
+    """
+    daemon_threads = True
+
+    def __init__(self, recusados=()):
+        super().__init__(("127.0.0.1", 0), _SessaoSMTP)
+        self.recusados = set(recusados)
+        self.conexoes = 0
+        self.entregues = []
+
+    def __enter__(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *args):
+        self.shutdown()
+        self.server_close()
+
+
+class FilaEmailsTest(TestCase):
+    """
+        Fila de e-mails: enfileiramento na requisição, envio em lote e novas tentativas.
+    """
+
+    def smtp(self, servidor: ServidorSMTPTeste):
+        return override_settings(
+            EMAIL_BACKEND="django.core.mail.backends.smtp.EmailBackend", EMAIL_HOST="127.0.0.1",
+            EMAIL_PORT=servidor.server_address[1], EMAIL_USE_TLS=False, EMAIL_HOST_USER="", EMAIL_HOST_PASSWORD="",
+        )
+
+    def test_reset_de_senha_apenas_enfileira(self):
+        User.objects.create_user("maria", "maria@example.com", "senha-teste")
+
+        self.client.post(reverse("pedido_reset_senha"), {"email": "maria@example.com"})
+
+        mensagem = EmailFila.objects.get()
+        self.assertEqual((mensagem.destinatario, mensagem.status), ("maria@example.com", "pendente"))
+        self.assertIn("/user/", mensagem.corpo)
+
+    def test_lote_usa_uma_conexao_e_reagenda_falhas(self):
+        for destinatario in ("a@example.com", "recusado@example.com", "b@example.com"):
+            enfileirar_email("Assunto", "Corpo", destinatario)
+
+        with ServidorSMTPTeste(recusados={"recusado@example.com"}) as servidor, self.smtp(servidor):
+            resultado = processar_fila(lote=10)
+
+        self.assertEqual(resultado, {"enviadas": 2, "falhas": 1})
+        self.assertEqual(servidor.conexoes, 1)
+        self.assertEqual(sorted(servidor.entregues), ["a@example.com", "b@example.com"])
+
+        recusado = EmailFila.objects.get(destinatario="recusado@example.com")
+        self.assertEqual((recusado.status, recusado.tentativas), ("pendente", 1))
+        self.assertGreater(recusado.proxima_tentativa, timezone.now() + timedelta(seconds=20))
+
+    @override_settings(EMAIL_FILA_TENTATIVAS=2)
+    def test_servidor_indisponivel_mantem_lote_ate_esgotar_tentativas(self):
+        enfileirar_email("Assunto", "Corpo", "a@example.com")
+        servidor = ServidorSMTPTeste()
+        servidor.server_close()
+
+        with self.smtp(servidor), self.assertLogs("core.email_fila", "ERROR"):
+            processar_fila()
+            EmailFila.objects.update(proxima_tentativa=timezone.now())
+            processar_fila()
+
+        self.assertEqual(EmailFila.objects.get().status, "falhou")
+
+    @override_settings(EMAIL_LIMITE_DESTINATARIO=2)
+    def test_limite_por_destinatario(self):
+        with self.assertLogs("core.email_fila", "WARNING"):
+            enviados = [enfileirar_email("Assunto", "Corpo", "a@example.com") for _ in range(3)]
+
+        self.assertIsNone(enviados[2])
+        self.assertIsNotNone(enfileirar_email("Assunto", "Corpo", "b@example.com"))
+        self.assertEqual(EmailFila.objects.count(), 3)
+
+    def test_workers_simultaneos_sem_skip_locked_nao_reservam_a_mesma_mensagem(self):
+        for destinatario in ("a@example.com", "b@example.com"):
+            enfileirar_email("Assunto", "Corpo", destinatario)
+        filtrar, concorrente = EmailFila.objects.filter, []
+
+        def filtro(*args, **kwargs):
+            # Outro worker reserva a fila depois que este já leu as candidatas
+            if "id" in kwargs and not concorrente:
+                concorrente.append(None)
+                concorrente.extend(_reservar(10))
+            return filtrar(*args, **kwargs)
+
+        with mock.patch.object(connection.features, "has_select_for_update_skip_locked", False), \
+                mock.patch.object(EmailFila.objects, "filter", side_effect=filtro):
+            reservadas = _reservar(10)
+
+        self.assertEqual(reservadas, [])
+        self.assertEqual(len(concorrente[1:]), 2)
+
+
+
+# Execuções das tarefas de teste, na ordem
+_executadas = []
+
+
+@tarefa
+def _registrar_execucao(valor):
+    _executadas.append(valor)
+
+
+@tarefa
+def _falhar():
+    raise RuntimeError("falha de teste")
+
+
+@tarefa
+def _dormir(segundos):
+    time.sleep(segundos)
+
+
+@tarefa
+def _encerrar_processo():
+    os._exit(1)
+
+
+@override_settings(METRICS_DIR="", TAREFAS_ESPERA_BASE=10)
+class TarefasTest(TestCase):
+    """
+        Tarefas em segundo plano: ordem de reserva, novas tentativas, fila de mortas e métricas.
+    """
+
+    def setUp(self):
+        _executadas.clear()
+
+    def test_reserva_por_prioridade_e_horario(self):
+        enfileirar(_registrar_execucao, valor="normal")
+        enfileirar(_registrar_execucao, prioridade=5, valor="urgente")
+        enfileirar(_registrar_execucao, executar_em=timezone.now() + timedelta(hours=1), valor="agendada")
+
+        reservadas = reservar_tarefas(10)
+
+        self.assertEqual([t.argumentos["valor"] for t in reservadas], ["urgente", "normal"])
+        self.assertEqual(reservar_tarefas(10), [])
+        self.assertEqual(Tarefa.objects.filter(status="executando").count(), 2)
+
+    def test_reserva_vencida_volta_para_a_fila(self):
+        enfileirar(_registrar_execucao, valor=1)
+        reservar_tarefas(1)
+        Tarefa.objects.update(reservada_ate=timezone.now() - timedelta(seconds=1))
+
+        self.assertEqual(len(reservar_tarefas(1)), 1)
+        self.assertEqual(Tarefa.objects.get().tentativas, 1)
+
+    def test_reserva_vencida_conta_tentativa_ate_a_fila_de_mortas(self):
+        enfileirar(_registrar_execucao, max_tentativas=2, valor=1)
+        for _ in range(2):
+            reservar_tarefas(1)
+            Tarefa.objects.update(reservada_ate=timezone.now() - timedelta(seconds=1))
+
+        self.assertEqual(reservar_tarefas(1), [])
+        tarefa_ = Tarefa.objects.get()
+        self.assertEqual((tarefa_.status, tarefa_.tentativas), ("morta", 2))
+        self.assertIn("Reserva vencida", tarefa_.erro)
+
+    @override_settings(TAREFAS_TIMEOUT=0.5)
+    def test_pool_limita_o_tempo_de_execucao(self):
+        enfileirar(_dormir, max_tentativas=1, segundos=30)
+
+        inicio = time.monotonic()
+        resultados = executar_worker(processos=1, intervalo=0.1, drenar=True)
+
+        self.assertLess(time.monotonic() - inicio, 10)
+        self.assertEqual(resultados["morta"], 1)
+        self.assertIn("Tempo limite excedido", Tarefa.objects.get().erro)
+
+    def test_pool_recriado_apos_processo_encerrado(self):
+        enfileirar(_encerrar_processo, prioridade=1, max_tentativas=1)
+        enfileirar(_dormir, segundos=0)
+
+        resultados = executar_worker(processos=1, intervalo=0.1, drenar=True)
+
+        self.assertEqual((resultados["morta"], resultados["concluida"]), (1, 1))
+        self.assertIn("BrokenProcessPool", Tarefa.objects.get(nome__endswith="_encerrar_processo").erro)
+
+    def test_processo_encerrado_nao_conta_tentativa_das_demais(self):
+        enfileirar(_encerrar_processo, prioridade=1, max_tentativas=1)
+        enfileirar(_dormir, max_tentativas=1, segundos=0.5)
+
+        # As duas rodam juntas; depois da quebra cada uma é executada sozinha no pool
+        resultados = executar_worker(processos=2, intervalo=0.1, drenar=True)
+
+        self.assertEqual((resultados["morta"], resultados["concluida"], resultados["falha"]), (1, 1, 0))
+        saudavel = Tarefa.objects.get(nome__endswith="_dormir")
+        self.assertEqual((saudavel.status, saudavel.tentativas), ("concluida", 0))
+        self.assertEqual(Tarefa.objects.get(nome__endswith="_encerrar_processo").status, "morta")
+
+    def test_worker_executa_e_registra_metricas(self):
+        enfileirar(_registrar_execucao, valor=1)
+        enfileirar(_registrar_execucao, valor=2)
+
+        resultados = executar_worker(processos=0, drenar=True)
+
+        self.assertEqual(resultados["concluida"], 2)
+        self.assertEqual(_executadas, [1, 2])
+        self.assertFalse(Tarefa.objects.exclude(status="concluida").exists())
+        self.assertIsNotNone(Tarefa.objects.first().duracao_ms)
+        texto = registro.exportar()
+        self.assertIn('tarefas_total{resultado="concluida",tarefa="core.tests._registrar_execucao"}', texto)
+        self.assertIn('tarefas_duracao_seconds_count{tarefa="core.tests._registrar_execucao"}', texto)
+
+    def test_falhas_reagendam_e_terminam_na_fila_de_mortas(self):
+        enfileirar(_falhar, max_tentativas=2)
+
+        executar_worker(processos=0, drenar=True)
+        tarefa_ = Tarefa.objects.get()
+        self.assertEqual((tarefa_.status, tarefa_.tentativas), ("pendente", 1))
+        self.assertIn("RuntimeError: falha de teste", tarefa_.erro)
+        self.assertGreater(tarefa_.executar_em, timezone.now() + timedelta(seconds=5))
+
+        Tarefa.objects.update(executar_em=timezone.now())
+        self.assertEqual(executar_worker(processos=0, drenar=True)["morta"], 1)
+        self.assertEqual(Tarefa.objects.get().status, "morta")
+
+        self.assertEqual(reenfileirar_mortas(), 1)
+        self.assertEqual(Tarefa.objects.get().status, "pendente")
+
+    def test_funcao_nao_registrada(self):
+        with self.assertRaises(ValueError):
+            enfileirar("os.system", command="true")
+
+
+@override_settings(METRICS_DIR="", LOGIN_LIMITE_USUARIO=3, LOGIN_LIMITE_IP=5, LOGIN_JANELA=60,
+                   LOGIN_BLOQUEIO_BASE=30, LOGIN_BLOQUEIO_MAXIMO=3600)
+class LimiteLoginTest(TestCase):
+    """
+        Limite de tentativas de login: recusa antes do hash da senha, bloqueio progressivo e métricas.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        User.objects.create_user("maria", "maria@example.com", "senha-teste")
+
+    def tentar(self, username="maria", password="errada", ip="10.0.0.1"):
+        return self.client.post(reverse("login"), {"username": username, "password": password}, REMOTE_ADDR=ip)
+
+    def test_recusa_sem_verificar_a_senha(self):
+        for _ in range(3):
+            self.assertEqual(self.tentar().status_code, 200)
+
+        with mock.patch("core.views.authenticate") as authenticate:
+            response = self.tentar(password="senha-teste")
+
+        authenticate.assert_not_called()
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response["Retry-After"], "30")
+        self.assertIn('login_bloqueios_total{limite="usuario"}', registro.exportar())
+
+    def test_limite_por_ip_entre_usuarios(self):
+        for indice in range(5):
+            self.assertEqual(self.tentar(username=f"usuario{indice}").status_code, 200)
+
+        self.assertEqual(self.tentar(username="outro").status_code, 429)
+        self.assertEqual(self.tentar(username="outro", ip="10.0.0.2").status_code, 200)
+
+    def test_logins_validos_do_mesmo_ip_nao_esgotam_o_limite(self):
+        for indice in range(10):
+            User.objects.create_user(f"usuario{indice}", f"u{indice}@example.com", "senha-teste")
+
+        # Vinte logins válidos atrás do mesmo IP (NAT) com LOGIN_LIMITE_IP=5
+        for _ in range(2):
+            for indice in range(10):
+                response = self.tentar(username=f"usuario{indice}", password="senha-teste")
+                self.assertRedirects(response, reverse("home"), fetch_redirect_response=False)
+                self.client.logout()
+        self.assertEqual(self.tentar().status_code, 200)
+
+    @override_settings(LOGIN_IP_CABECALHO="HTTP_X_FORWARDED_FOR", LOGIN_PROXIES=1)
+    def test_ip_do_cliente_atras_do_proxy(self):
+        request = RequestFactory().post("/", REMOTE_ADDR="10.0.0.1", HTTP_X_FORWARDED_FOR="1.1.1.1, 203.0.113.7")
+        # O primeiro endereço foi enviado pelo cliente; vale o acrescentado pelo proxy
+        self.assertEqual(ip_cliente(request), "203.0.113.7")
+
+        for indice in range(5):
+            self.client.post(reverse("login"), {"username": f"usuario{indice}", "password": "errada"},
+                             REMOTE_ADDR="10.0.0.1", HTTP_X_FORWARDED_FOR="203.0.113.7")
+        bloqueado = self.client.post(reverse("login"), {"username": "outro", "password": "errada"},
+                                     REMOTE_ADDR="10.0.0.1", HTTP_X_FORWARDED_FOR="203.0.113.7")
+        outro_cliente = self.client.post(reverse("login"), {"username": "outro", "password": "errada"},
+                                         REMOTE_ADDR="10.0.0.1", HTTP_X_FORWARDED_FOR="203.0.113.8")
+        self.assertEqual((bloqueado.status_code, outro_cliente.status_code), (429, 200))
+
+    @override_settings(LOGIN_LIMITE_IP=100)
+    def test_bloqueio_progressivo(self):
+        request = RequestFactory().post("/", REMOTE_ADDR="10.0.0.1")
+        with mock.patch("core.limite_login.time.time") as relogio:
+            relogio.return_value = 1000.0
+            esperas = [consumir_tentativa(request, "maria") for _ in range(4)]
+            self.assertEqual(esperas, [0, 0, 0, 30])
+
+            # Durante o bloqueio a tentativa é recusada sem estender o prazo
+            relogio.return_value = 1010.0
+            self.assertEqual(consumir_tentativa(request, "maria"), 20)
+
+            # Após o bloqueio as tentativas recomeçam do zero; o próximo bloqueio dobra
+            relogio.return_value = 1030.0
+            esperas = [consumir_tentativa(request, "maria") for _ in range(4)]
+            self.assertEqual(esperas, [0, 0, 0, 60])
+
+    def test_janela_deslizante_pondera_a_janela_anterior(self):
+        request = RequestFactory().post("/", REMOTE_ADDR="10.0.0.1")
+        with mock.patch("core.limite_login.time.time") as relogio:
+            relogio.return_value = 1019.0
+            self.assertEqual([consumir_tentativa(request, "maria") for _ in range(3)], [0, 0, 0])
+
+            # 1050: metade da janela anterior (960-1020) ainda está na janela deslizante -> 3 * 0,5 + 1 <= 3
+            relogio.return_value = 1050.0
+            self.assertEqual(consumir_tentativa(request, "maria"), 0)
+            # 3 * 0,5 + 2 > 3
+            self.assertEqual(consumir_tentativa(request, "maria"), 30)
+
+    @override_settings(LOGIN_LIMITE_IP=100)
+    def test_tentativas_concorrentes_nao_passam_do_limite(self):
+        request = RequestFactory().post("/", REMOTE_ADDR="10.0.0.1")
+        barreira = threading.Barrier(12)
+        esperas = []
+
+        def tentar():
+            barreira.wait()
+            esperas.append(consumir_tentativa(request, "maria"))
+
+        threads = [threading.Thread(target=tentar) for _ in range(12)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(esperas.count(0), 3)
+
+    def test_login_valido_restaura_o_usuario(self):
+        for _ in range(2):
+            self.tentar()
+
+        self.assertRedirects(self.tentar(password="senha-teste"), reverse("home"), fetch_redirect_response=False)
+        self.client.logout()
+        # Sem a restauração o balde do usuário estaria vazio após três tentativas
+        for _ in range(2):
+            self.assertEqual(self.tentar().status_code, 200)
+
+
+class SessoesTest(TestCase):
+    """
+        Sessões em cache com mensagens em cookie e limpeza em lotes das sessões expiradas.
+    """
+
+    @override_settings(SESSION_ENGINE="django.contrib.sessions.backends.cache",
+                       MESSAGE_STORAGE="django.contrib.messages.storage.cookie.CookieStorage")
+    def test_sessao_em_cache_nao_consulta_o_banco(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        produto = Produto.objects.create(nome="Sensor", quantidade=1, localizacao="A1")
+        usuario = User.objects.create_user("operador", "op@example.com", "senha-teste")
+        usuario.user_permissions.add(Permission.objects.get(codename="add_movimentacao"))
+        self.client.force_login(usuario)
+
+        with CaptureQueriesContext(connection) as consultas:
+            resposta = self.client.post(
+                reverse("registrar_movimentacao"), {"produto": produto.id, "tipo": "entrada", "quantidade": 1}, follow=True
+            )
+
+        self.assertContains(resposta, "Movimentação registrada com sucesso!")
+        self.assertFalse([c for c in consultas.captured_queries if "django_session" in c["sql"]])
+        self.assertFalse(Session.objects.exists())
+
+    def test_limpeza_em_lotes(self):
+        for _ in range(5):
+            sessao = SessionStore()
+            sessao.set_expiry(-60)
+            sessao.create()
+        SessionStore().create()
+
+        with CaptureQueriesContext(connection) as consultas:
+            self.assertEqual(limpar_sessoes_expiradas(lote=2), 5)
+
+        self.assertEqual(Session.objects.count(), 1)
+        self.assertEqual(sum(1 for c in consultas.captured_queries if c["sql"].startswith("DELETE")), 3)
+
+
+class PermissoesTest(TestCase):
+    """
+        Perfis e permissões resolvidos uma vez por usuário, com invalidação por versão.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        sincronizar_perfis()
+        cls.operador = User.objects.create_user("operador", "op@example.com", "senha-teste")
+        cls.operador.groups.add(Group.objects.get(name="Operador de estoque"))
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    def recarregar(self) -> User:
+        # Nova instância, como a carregada pelo middleware na próxima requisição
+        return User.objects.get(pk=self.operador.pk)
+
+    def test_permissoes_em_cache_entre_requisicoes(self):
+        self.assertTrue(self.recarregar().has_perm("estoque.add_produto"))
+
+        usuario = self.recarregar()
+        with CaptureQueriesContext(connection) as consultas:
+            self.assertTrue(usuario.has_perms(["estoque.add_produto", "estoque.change_inventario"]))
+            self.assertFalse(usuario.has_perm("estoque.delete_produto"))
+            self.assertTrue(usuario.has_module_perms("estoque"))
+        self.assertEqual(len(consultas.captured_queries), 0)
+
+    def test_alteracao_de_perfis_invalida_o_cache(self):
+        self.assertFalse(self.recarregar().has_perm("core.view_logsystem"))
+
+        self.operador.groups.add(Group.objects.get(name="Auditor"))
+        self.assertTrue(self.recarregar().has_perm("core.view_logsystem"))
+
+        Group.objects.get(name="Auditor").permissions.remove(Permission.objects.get(codename="view_logsystem"))
+        self.assertFalse(self.recarregar().has_perm("core.view_logsystem"))
+
+        Group.objects.get(name="Operador de estoque").user_set.remove(self.operador)
+        self.assertFalse(self.recarregar().has_perm("estoque.add_produto"))
+
+    def test_views_exigem_permissao_sem_consultas_extras(self):
+        self.client.force_login(self.operador)
+        self.assertEqual(self.client.get(reverse("criar_produto")).status_code, 200)
+
+        with CaptureQueriesContext(connection) as consultas:
+            resposta = self.client.get(reverse("listar_estoque"))
+        self.assertContains(resposta, "Criar Produto")
+        self.assertFalse([c for c in consultas.captured_queries if "auth_permission" in c["sql"]])
+
+        resposta = self.client.get(reverse("deletar_produto", args=[1]), follow=True)
+        self.assertIn("Você não tem permissão para excluir produtos.", [str(m) for m in resposta.context["messages"]])
+        resposta = self.client.get(reverse("criar_usuario"), follow=True)
+        self.assertIn("Você não tem permissão para criar usuários.", [str(m) for m in resposta.context["messages"]])
+
+    def test_auditor_nao_registra_movimentacoes(self):
+        auditor = User.objects.create_user("auditor", "aud@example.com", "senha-teste")
+        auditor.groups.add(Group.objects.get(name="Auditor"))
+        produto = Produto.objects.create(nome="Resistor 10k", quantidade=5, localizacao="A1")
+        self.client.force_login(auditor)
+
+        resposta = self.client.post(reverse("registrar_movimentacao"),
+                                    {"produto": produto.id, "tipo": "saida", "quantidade": 5}, follow=True)
+        self.assertIn("Você não tem permissão para registrar movimentações.", [str(m) for m in resposta.context["messages"]])
+        self.assertEqual(Produto.objects.get(pk=produto.pk).quantidade, 5)
+        self.assertFalse(Movimentacao.objects.exists())
+        self.assertEqual(self.client.get(reverse("listar_usuarios")).status_code, 200)
+
+        # O operador registra movimentações, mas não lista usuários (sem auth.view_user)
+        self.client.force_login(self.operador)
+        self.client.post(reverse("registrar_movimentacao"), {"produto": produto.id, "tipo": "saida", "quantidade": 2})
+        self.assertEqual(Produto.objects.get(pk=produto.pk).quantidade, 3)
+        resposta = self.client.get(reverse("listar_usuarios"), follow=True)
+        self.assertIn("Você não tem permissão para listar usuários.", [str(m) for m in resposta.context["messages"]])
+
+    def test_alteracao_de_superusuario_e_ativo_invalida_o_cache(self):
+        self.assertFalse(self.recarregar().has_perm("estoque.delete_produto"))
+
+        usuario = self.recarregar()
+        usuario.is_superuser = True
+        usuario.save()
+        self.assertTrue(self.recarregar().has_perm("estoque.delete_produto"))
+
+        usuario.is_active = False
+        usuario.save(update_fields=["is_active"])
+        self.assertFalse(User.objects.get(pk=usuario.pk).has_perm("estoque.delete_produto"))
+
+    def test_exige_cache_compartilhado_no_deploy(self):
+        with override_settings(CACHE_LOCAL_PERMITIDO=False):
+            self.assertEqual([erro.id for erro in verificar_cache_compartilhado()], ["core.E001"])
+            self.assertIn(verificar_cache_compartilhado, checks.registry.registry.get_checks(include_deployment_checks=True))
+            self.assertNotIn(verificar_cache_compartilhado, checks.registry.registry.get_checks())
+            with override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.redis.RedisCache"}}):
+                self.assertEqual(verificar_cache_compartilhado(), [])
+
+
+class AquecimentoTest(TestCase):
+    """
+        Aquecimento dos workers: módulos do servidor, rotas, templates, conexões e caches.
+    """
+
+    def test_aquecer_compila_templates_e_registra_tempos(self):
+        resultado = aquecer()
+
+        self.assertEqual(resultado["erros"], {})
+        self.assertEqual(list(resultado["etapas"]),
+                         ["importacao", "urls", "templates", "autenticacao", "conexoes", "caches"])
+        self.assertIn("estoque.views", resultado["modulos"])
+        loader = engines["django"].engine.template_loaders[0]
+        self.assertIn("estoque/listar.html", loader.get_template_cache)
+        self.assertIn('aquecimento_etapa_seconds{etapa="templates"}', registro.exportar())
+
+    def test_preload_sem_conexoes_e_sem_modulos_de_comandos(self):
+        self.assertNotIn("conexoes", aquecer(conexoes=False)["etapas"])
+
+        modulos = modulos_servidor()
+        self.assertIn("estoque.templatetags.tabelas_estoque", modulos)
+        self.assertEqual(modulos[-1], "project.urls")
+        self.assertNotIn("estoque.carga_concorrente", modulos)
+
+    def test_medidor_mede_importacoes_e_devolve_o_loader_original(self):
+        diretorio = tempfile.TemporaryDirectory()
+        self.addCleanup(diretorio.cleanup)
+        with open(os.path.join(diretorio.name, "modulo_medido.py"), "w") as arquivo:
+            arquivo.write("import time\ntime.sleep(0.01)\n")
+        self.addCleanup(sys.modules.pop, "modulo_medido", None)
+        medidor_teste = MedidorImportacoes()
+
+        with mock.patch.object(sys, "path", [diretorio.name, *sys.path]):
+            medidor_teste.instalar()
+            try:
+                modulo = importlib.import_module("modulo_medido")
+            finally:
+                medidor_teste.remover()
+
+        self.assertGreaterEqual(medidor_teste.tempos["modulo_medido"], 0.01)
+        self.assertNotIn(medidor_teste, sys.meta_path)
+        self.assertIs(modulo.__loader__, modulo.__spec__.loader)
+        self.assertEqual(type(modulo.__loader__).__name__, "SourceFileLoader")
+
+    def test_modulos_carregados_no_setup_usam_o_tempo_do_medidor(self):
+        with mock.patch.dict(medidor.tempos, {"estoque.models": 0.25}):
+            self.assertEqual(aquecer(conexoes=False)["modulos"]["estoque.models"], 0.25)
+
+    def test_conexoes_abertas_apenas_com_pool(self):
+        sem_pool = mock.Mock(settings_dict={"OPTIONS": {}})
+        com_pool = mock.Mock(settings_dict={"OPTIONS": {"pool": {"min_size": 2}}})
+
+        with mock.patch("core.aquecimento.connections", {"default": sem_pool, "pool": com_pool}):
+            self.assertEqual(abrir_conexoes(), 1)
+
+        sem_pool.ensure_connection.assert_not_called()
+        com_pool.ensure_connection.assert_called_once_with()
+        com_pool.close.assert_called_once_with()
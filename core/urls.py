@@ -17,7 +17,8 @@ Including another URLconf
 from django.urls import path
 
 
-from core.views import HomeView, LoginView, LogoutView
+from core.views import HomeView, LoginView, LogoutView, MetricasView, ConsultasLentasView, \
+    DownloadPerfilView
 
 urlpatterns = [
 
@@ -30,5 +31,14 @@ urlpatterns = [
     # Rota para Logout
     path('logout/', LogoutView.as_view(), name='logout'),
 
+    # Rota para métricas no formato Prometheus
+    path('metrics', MetricasView.as_view(), name='metrics'),
+
+    # Rota para o painel de consultas lentas (equipe)
+    path('consultas-lentas/', ConsultasLentasView.as_view(), name='consultas_lentas'),
+
+    # Rota para download de perfis de requisição (equipe)
+    path('profiling/<str:perfil_id>/', DownloadPerfilView.as_view(), name='download_perfil'),
+
 ]
 
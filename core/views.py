@@ -1,10 +1,19 @@
+import hmac
+import math
+import os
+
+from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth import logout, authenticate, login
-from django.http import HttpRequest, HttpResponse
+from django.http import HttpRequest, HttpResponse, FileResponse, Http404
 from django.shortcuts import render, redirect
 from django.views import View
 from django.contrib.auth.mixins import LoginRequiredMixin
 
+from core.consultas_lentas import consultas_lentas
+from core.limite_login import consumir_tentativa, liberar_usuario, registrar_falha
+from core.metricas import registro
+from core.profiling import FORMATOS, caminho_perfil
 from core.utils import registrar_log
 
 
@@ -78,6 +87,9 @@ class LoginView(View):
             Captura os campos 'username' e 'password' do formulário,
             realiza a autenticação e cria a sessão do usuário.
             Caso as credenciais estejam incorretas, exibe uma mensagem de erro.
+            Tentativas acima do limite por usuário e por IP (apenas senhas
+            recusadas) são recusadas com status 429 antes do hash da senha
+            (ver ``core.limite_login``).
 
             Args:
                 request (HttpRequest): Objeto de requisição HTTP.
@@ -90,11 +102,20 @@ class LoginView(View):
             username = request.POST.get('username')
             password = request.POST.get('password')
 
+            espera = consumir_tentativa(request, username)
+            if espera:
+                messages.error(request, f"Muitas tentativas de login. Tente novamente em {math.ceil(espera)} segundos.")
+                response = render(request, 'core/login.html', status=429)
+                response['Retry-After'] = str(math.ceil(espera))
+                return response
+
             usuario = authenticate(request, username=username, password=password)
             if usuario is not None:
+                liberar_usuario(username)
                 login(request, usuario)
                 return redirect('home')
             else:
+                registrar_falha(request)
                 messages.error(request, "Usuário ou senha incorretos.")
                 return render(request, 'core/login.html')
 
@@ -197,3 +218,110 @@ class Erro500View(View):
         except Exception as e:
             registrar_log(request.user if request.user.is_authenticated else None, "ERRO500", "ERROR", f"Erro inesperado: {str(e)}")
             return render(request, 'core/500.html', status=500)
+
+
+class MetricasView(View):
+    """
+        Expõe as métricas da aplicação no formato texto do Prometheus.
+
+        Exige o cabeçalho ``Authorization: Bearer <token>`` com o
+        ``settings.METRICS_TOKEN``; sem token configurado a rota responde 404.
+
+        Métodos:
+            get: Retorna as métricas agregadas de todos os workers.
+    """
+
+    def get(self, request: HttpRequest) -> HttpResponse:
+        """
+            Retorna o texto de exposição das métricas.
+
+            Args:
+                request (django.http.HttpRequest): Objeto da requisição HTTP.
+
+            Returns:
+                django.http.HttpResponse: Métricas no formato Prometheus, 404 sem token configurado
+                ou 403 se o token for inválido.
+        """
+        token = settings.METRICS_TOKEN
+        if not token:
+            return HttpResponse("Não encontrado.", status=404, content_type="text/plain")
+        if not hmac.compare_digest(request.headers.get("Authorization", ""), f"Bearer {token}"):
+            return HttpResponse("Acesso negado.", status=403, content_type="text/plain")
+
+        return HttpResponse(registro.exportar(), content_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+class ConsultasLentasView(LoginRequiredMixin, View):
+    """
+        Exibe as consultas SQL lentas capturadas neste processo.
+
+        Acesso restrito a usuários da equipe (``is_staff``).
+
+        Métodos:
+            get: Lista as impressões digitais mais frequentes e as últimas consultas com seus planos.
+    """
+
+    def get(self, request: HttpRequest) -> HttpResponse:
+        """
+            Renderiza o painel de consultas lentas.
+
+            Args:
+                request (django.http.HttpRequest): Objeto da requisição HTTP.
+
+            Returns:
+                django.http.HttpResponse: Página com os agregados e o buffer de consultas lentas.
+        """
+        if not request.user.is_staff:
+            messages.error(request, "Apenas usuários da equipe podem ver as consultas lentas.")
+            return redirect('home')
+
+        try:
+            return render(request, 'core/consultas_lentas.html', {
+                'frequentes': consultas_lentas.mais_frequentes(),
+                'ultimas': consultas_lentas.ultimas(),
+                'limite_ms': settings.SLOW_QUERY_MS,
+            })
+
+        except Exception as e:
+            registrar_log(request.user, "Consultas Lentas", "ERROR", f"Erro ao carregar consultas lentas: {str(e)}")
+            messages.error(request, "Erro ao carregar as consultas lentas.")
+            return redirect('home')
+
+
+class DownloadPerfilView(LoginRequiredMixin, View):
+    """
+        Permite à equipe baixar um perfil de requisição salvo pelo ``ProfilingMiddleware``.
+
+        Métodos:
+            get: Retorna o perfil no formato solicitado.
+    """
+
+    def get(self, request: HttpRequest, perfil_id: str) -> HttpResponse:
+        """
+            Retorna o arquivo do perfil.
+
+            O formato é escolhido por ``?formato=``: ``txt`` (árvore de chamadas),
+            ``colapsado`` (pilhas para flame graph), ``prof`` (pstats) ou ``html`` (pyinstrument).
+
+            Args:
+                request (django.http.HttpRequest): Objeto da requisição HTTP.
+                perfil_id (str): Id retornado no cabeçalho ``X-Profile-Id``.
+
+            Returns:
+                django.http.HttpResponse: Arquivo do perfil ou 404 se não existir.
+        """
+        if not request.user.is_staff:
+            messages.error(request, "Apenas usuários da equipe podem baixar perfis.")
+            return redirect('home')
+
+        formato = request.GET.get('formato', 'txt')
+        caminho = caminho_perfil(perfil_id, formato)
+        if caminho is None or not os.path.exists(caminho):
+            raise Http404("Perfil não encontrado.")
+
+        return FileResponse(
+            open(caminho, 'rb'),
+            as_attachment=formato != 'txt',
+            filename=os.path.basename(caminho),
+            content_type=FORMATOS[formato][1],
+        )
@@ -1,7 +1,13 @@
 from django.contrib import admin
 
-from estoque.models import Movimentacao, Produto
+from estoque.models import Movimentacao, Produto, EventoEstoque, ConsumidorFeed, DivergenciaEstoque, Inventario, \
+    ItemInventario
 
 # Register your models here.
 admin.site.register(Produto)
 admin.site.register(Movimentacao)
+admin.site.register(EventoEstoque)
+admin.site.register(ConsumidorFeed)
+admin.site.register(DivergenciaEstoque)
+admin.site.register(Inventario)
+admin.site.register(ItemInventario)
@@ -0,0 +1,108 @@
+import asyncio
+import io
+import logging
+from importlib import import_module
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user
+from django.contrib.auth.views import redirect_to_login
+from django.core.handlers.asgi import ASGIRequest
+from django.db import close_old_connections
+from django.urls import reverse
+
+from estoque.eventos import difusor, cursor_sse
+
+logger = logging.getLogger(__name__)
+
+
+def _autenticar(request: ASGIRequest):
+    """
+        Carrega o usuário da sessão de ``request`` em uma thread do pool, como em um ciclo de requisição.
+    """
+    close_old_connections()
+    try:
+        engine = import_module(settings.SESSION_ENGINE)
+        request.session = engine.SessionStore(request.COOKIES.get(settings.SESSION_COOKIE_NAME))
+        return get_user(request)
+    finally:
+        close_old_connections()
+
+
+class EventosEstoqueASGI:
+    """
+        Aplicação ASGI que atende ``/estoque/eventos/`` (SSE) antes do ``ASGIHandler`` do Django.
+
+        O ``ASGIHandler`` mantém uma thread do Django por requisição enquanto a
+        resposta é transmitida, então cada cliente SSE ocioso ocuparia uma
+        thread. Aqui o usuário é carregado da sessão uma única vez, em uma
+        thread do pool, e o fluxo é enviado direto do ``difusor`` no loop de
+        eventos: clientes ociosos não ocupam threads. As demais requisições
+        seguem para ``aplicacao``.
+
+        Uso (``project/asgi.py``)::
+
+            application = EventosEstoqueASGI(get_asgi_application())
+
+        Attributes:
+            aplicacao: Aplicação ASGI do Django.
+    """
+
+    def __init__(self, aplicacao):
+        self.aplicacao = aplicacao
+        self._caminho = None
+
+    def _atende(self, scope: dict) -> bool:
+        if scope["type"] != "http" or scope["method"] != "GET" or not settings.VIEWS_ASSINCRONAS:
+            return False
+        if self._caminho is None:
+            self._caminho = reverse("eventos_estoque")
+        return scope["path"].removeprefix(scope.get("root_path", "")) == self._caminho
+
+    async def __call__(self, scope, receive, send):
+        if not self._atende(scope):
+            return await self.aplicacao(scope, receive, send)
+
+        request = ASGIRequest(scope, io.BytesIO())
+        usuario = await sync_to_async(_autenticar, thread_sensitive=False)(request)
+        if not usuario.is_authenticated:
+            destino = redirect_to_login(request.get_full_path())["Location"]
+            await send({"type": "http.response.start", "status": 302, "headers": [(b"location", destino.encode())]})
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        ultimo = request.headers.get("Last-Event-ID") or request.GET.get("ultimo_id", "")
+        await send({
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [
+                (b"content-type", b"text/event-stream"),
+                (b"cache-control", b"no-cache"),
+                # Desativa o buffer de proxies (ex: nginx) para entregar cada evento imediatamente
+                (b"x-accel-buffering", b"no"),
+            ],
+        })
+        await self._transmitir(cursor_sse(ultimo), receive, send)
+
+    async def _transmitir(self, cursor: int | None, receive, send) -> None:
+        """
+            Envia as mensagens do ``difusor`` até o cliente desconectar.
+        """
+        async def enviar():
+            async for mensagem in difusor.assinar(cursor):
+                await send({"type": "http.response.body", "body": mensagem.encode(), "more_body": True})
+
+        async def aguardar_desconexao():
+            while (await receive())["type"] != "http.disconnect":
+                pass
+
+        envio, desconexao = asyncio.ensure_future(enviar()), asyncio.ensure_future(aguardar_desconexao())
+        try:
+            await asyncio.wait((envio, desconexao), return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            # Cancela a assinatura (o difusor para sem assinantes) e a espera pela desconexão
+            envio.cancel()
+            desconexao.cancel()
+            for resultado in await asyncio.gather(envio, desconexao, return_exceptions=True):
+                if isinstance(resultado, Exception):
+                    logger.warning("Fluxo de eventos de estoque encerrado: %s", resultado)
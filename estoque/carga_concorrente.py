@@ -0,0 +1,224 @@
+import multiprocessing
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth.models import User
+from django.db import connection, connections, DatabaseError, transaction
+from django.db.models import Q
+from django.test import Client
+from django.urls import reverse
+
+from estoque.dados_sinteticos import pesos_zipf
+from estoque.models import Produto, Movimentacao
+from estoque.reconciliacao import saldos_razao
+
+# Códigos SQLSTATE do PostgreSQL
+SQLSTATE_DEADLOCK = "40P01"
+SQLSTATE_SERIALIZACAO = "40001"
+SQLSTATE_LOCK_INDISPONIVEL = "55P03"
+
+
+class MonitorBanco:
+    """
+        Wrapper de execução SQL que mede a espera por locks (``SELECT ... FOR UPDATE``)
+        e classifica as falhas de concorrência do banco.
+
+        Attributes:
+            espera_lock (float): Tempo total (s) gasto nas consultas com ``FOR UPDATE``.
+            locks (int): Quantidade de consultas com ``FOR UPDATE``.
+            deadlocks (int): Falhas por deadlock.
+            serializacao (int): Falhas de serialização.
+            bloqueios (int): Falhas por lock indisponível/banco bloqueado (ex: SQLite "database is locked").
+            outras (int): Demais erros de banco.
+    """
+
+    def __init__(self):
+        self.espera_lock = 0.0
+        self.locks = 0
+        self.deadlocks = 0
+        self.serializacao = 0
+        self.bloqueios = 0
+        self.outras = 0
+
+    def falhas(self) -> int:
+        return self.deadlocks + self.serializacao + self.bloqueios + self.outras
+
+    def __call__(self, execute, sql, params, many, context):
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        except DatabaseError as e:
+            self._classificar(e)
+            raise
+        finally:
+            if "FOR UPDATE" in sql:
+                self.espera_lock += time.perf_counter() - inicio
+                self.locks += 1
+
+    def _classificar(self, erro: DatabaseError) -> None:
+        causa = erro.__cause__ or erro
+        codigo = getattr(causa, "pgcode", None) or getattr(getattr(causa, "diag", None), "sqlstate", None)
+        mensagem = str(erro).lower()
+
+        if codigo == SQLSTATE_DEADLOCK or "deadlock" in mensagem:
+            self.deadlocks += 1
+        elif codigo == SQLSTATE_SERIALIZACAO or "could not serialize" in mensagem:
+            self.serializacao += 1
+        elif codigo == SQLSTATE_LOCK_INDISPONIVEL or "locked" in mensagem:
+            self.bloqueios += 1
+        else:
+            self.outras += 1
+
+
+def preparar_produtos(quantidade: int, estoque_inicial: int, usuario: User, prefixo: str) -> list[int]:
+    """
+        Cria os produtos usados pela carga com o estoque inicial registrado no razão.
+
+        Cada produto recebe uma movimentação de entrada igual ao estoque inicial,
+        de modo que ``Produto.quantidade`` deve sempre igualar a soma do razão.
+
+        Returns:
+            list[int]: Ids dos produtos criados.
+    """
+    with transaction.atomic():
+        produtos = Produto.objects.bulk_create(
+            [Produto(nome=f"{prefixo}-{i}", quantidade=estoque_inicial, localizacao="Carga") for i in range(quantidade)]
+        )
+        if not all(p.pk for p in produtos):
+            produtos = list(Produto.objects.filter(nome__startswith=f"{prefixo}-").order_by("-id")[:quantidade])
+        Movimentacao.objects.bulk_create([
+            Movimentacao(usuario=usuario, produto=p, quantidade=estoque_inicial, tipo="entrada") for p in produtos
+        ])
+    return [p.pk for p in produtos]
+
+
+def _executar_fatia(argumentos: tuple) -> dict:
+    """
+        Executa uma fatia das requisições de movimentação com o client de testes.
+
+        Args:
+            argumentos (tuple): (semente, quantidade de requisições, id do usuário, ids dos produtos,
+                pesos cumulativos, proporção de saídas, quantidade máxima por movimentação).
+
+        Returns:
+            dict: Latências, contagem de resultados e estatísticas do banco.
+    """
+    semente, requisicoes, usuario_id, ids_produtos, pesos, proporcao_saida, quantidade_maxima = argumentos
+    aleatorio = random.Random(semente)
+    client = Client()
+    client.force_login(User.objects.get(pk=usuario_id))
+    url = reverse("registrar_movimentacao")
+    sucesso_url = reverse("listar_movimentacao")
+
+    monitor = MonitorBanco()
+    latencias, aceitas, rejeitadas, falhas = [], 0, 0, 0
+
+    try:
+        with connection.execute_wrapper(monitor):
+            for _ in range(requisicoes):
+                falhas_antes = monitor.falhas()
+                dados = {
+                    "produto": aleatorio.choices(ids_produtos, cum_weights=pesos)[0],
+                    "tipo": "saida" if aleatorio.random() < proporcao_saida else "entrada",
+                    "quantidade": aleatorio.randint(1, quantidade_maxima),
+                }
+                inicio = time.perf_counter()
+                response = client.post(url, dados)
+                latencias.append(time.perf_counter() - inicio)
+
+                if monitor.falhas() > falhas_antes:
+                    falhas += 1
+                elif response.status_code == 302 and response.url == sucesso_url:
+                    aceitas += 1
+                else:
+                    rejeitadas += 1
+    finally:
+        connections.close_all()
+
+    return {
+        "latencias": latencias,
+        "aceitas": aceitas,
+        "rejeitadas": rejeitadas,
+        "falhas": falhas,
+        "espera_lock": monitor.espera_lock,
+        "locks": monitor.locks,
+        "deadlocks": monitor.deadlocks,
+        "serializacao": monitor.serializacao,
+        "bloqueios": monitor.bloqueios,
+        "outras": monitor.outras,
+    }
+
+
+def executar_carga(usuario: User, ids_produtos: list[int], requisicoes: int, concorrencia: int, modo: str,
+                   expoente: float, proporcao_saida: float, quantidade_maxima: int, seed: int) -> dict:
+    """
+        Dispara movimentações concorrentes em ``RegistrarMovimentacaoView.post``.
+
+        Args:
+            usuario (User): Usuário autenticado nas requisições.
+            ids_produtos (list[int]): Produtos alvo da carga.
+            requisicoes (int): Total de requisições.
+            concorrencia (int): Threads ou processos simultâneos.
+            modo (str): 'thread' ou 'processo'.
+            expoente (float): Expoente de Zipf da escolha dos produtos (0 = uniforme).
+            proporcao_saida (float): Fração das requisições que são saídas.
+            quantidade_maxima (int): Quantidade máxima por movimentação.
+            seed (int): Semente do gerador aleatório.
+
+        Returns:
+            dict: Vazão, percentis de latência, espera de locks e falhas de concorrência.
+    """
+    pesos = pesos_zipf(len(ids_produtos), expoente, random.Random(seed))
+    fatias = [requisicoes // concorrencia + (1 if i < requisicoes % concorrencia else 0) for i in range(concorrencia)]
+    argumentos = [
+        (seed * 1000 + i, fatia, usuario.pk, ids_produtos, pesos, proporcao_saida, quantidade_maxima)
+        for i, fatia in enumerate(fatias) if fatia
+    ]
+
+    inicio = time.perf_counter()
+    if modo == "processo":
+        connections.close_all()
+        with multiprocessing.get_context("fork").Pool(concorrencia) as pool:
+            parciais = pool.map(_executar_fatia, argumentos)
+    else:
+        with ThreadPoolExecutor(max_workers=concorrencia) as executor:
+            parciais = list(executor.map(_executar_fatia, argumentos))
+    duracao = time.perf_counter() - inicio
+
+    latencias = sorted(l for p in parciais for l in p["latencias"])
+    total = {chave: sum(p[chave] for p in parciais) for chave in parciais[0] if chave != "latencias"} if parciais else {}
+
+    def percentil(valor):
+        return round(latencias[min(len(latencias) - 1, int(valor / 100 * len(latencias)))] * 1000, 2) if latencias else 0
+
+    return dict(
+        total,
+        requisicoes=len(latencias),
+        duracao_s=round(duracao, 2),
+        vazao_rps=round(len(latencias) / duracao, 1) if duracao else 0,
+        p50_ms=percentil(50),
+        p95_ms=percentil(95),
+        p99_ms=percentil(99),
+        espera_lock_ms=round(total.get("espera_lock", 0) * 1000, 1),
+    )
+
+
+def verificar_consistencia(ids_produtos: list[int]) -> list[dict]:
+    """
+        Compara ``Produto.quantidade`` com a soma do razão (entradas - saídas).
+
+        Args:
+            ids_produtos (list[int]): Produtos verificados.
+
+        Returns:
+            list[dict]: Produtos divergentes ou com estoque negativo.
+    """
+    razao = saldos_razao(Q(produto_id__in=ids_produtos))
+
+    divergentes = []
+    for produto_id, quantidade in Produto.objects.filter(id__in=ids_produtos).values_list("id", "quantidade"):
+        saldo = razao.get(produto_id, 0)
+        if quantidade != saldo or quantidade < 0:
+            divergentes.append({"produto_id": produto_id, "quantidade": quantidade, "razao": saldo})
+    return divergentes
@@ -0,0 +1,242 @@
+import io
+import itertools
+import multiprocessing
+import random
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import connection, connections, transaction
+from django.utils import timezone
+
+from core.models import LogSystem
+from estoque.models import Produto, Movimentacao
+
+ACOES_LOG = ("Login", "Criar Produto", "Atualizar Produto", "Registrar Movimentação", "Listar Produtos")
+
+
+def usa_copy() -> bool:
+    """
+        Indica se o banco atual aceita ``COPY ... FROM STDIN`` (PostgreSQL).
+    """
+    return connection.vendor == "postgresql"
+
+
+def copiar(tabela: str, colunas: tuple, linhas) -> None:
+    """
+        Grava as linhas com ``COPY ... FROM STDIN`` (formato CSV) no PostgreSQL.
+
+        Funciona com psycopg2 (``copy_expert``) e psycopg 3 (``cursor.copy``).
+
+        Args:
+            tabela (str): Nome da tabela.
+            colunas (tuple): Colunas na ordem dos valores.
+            linhas (Iterable[tuple]): Valores de cada linha.
+    """
+    buffer = io.StringIO()
+    for linha in linhas:
+        buffer.write(",".join("" if valor is None else str(valor) for valor in linha))
+        buffer.write("\n")
+    buffer.seek(0)
+
+    sql = f"COPY {tabela} ({', '.join(colunas)}) FROM STDIN WITH (FORMAT csv)"
+    with connection.cursor() as cursor:
+        bruto = cursor.cursor
+        if hasattr(bruto, "copy_expert"):
+            bruto.copy_expert(sql, buffer)
+        else:
+            with bruto.copy(sql) as copia:
+                copia.write(buffer.getvalue())
+
+
+def pesos_zipf(quantidade: int, expoente: float, aleatorio: random.Random) -> list[float]:
+    """
+        Gera pesos cumulativos com distribuição de Zipf embaralhada entre os itens.
+
+        Poucos itens (SKUs "quentes") concentram a maior parte das escolhas.
+
+        Args:
+            quantidade (int): Quantidade de itens.
+            expoente (float): Expoente da distribuição (0 = uniforme).
+            aleatorio (random.Random): Gerador usado para embaralhar as posições.
+
+        Returns:
+            list[float]: Pesos cumulativos para ``random.choices(cum_weights=...)``.
+    """
+    pesos = [1 / (posicao + 1) ** expoente for posicao in range(quantidade)]
+    aleatorio.shuffle(pesos)
+    return list(itertools.accumulate(pesos))
+
+
+def gerar_usuarios(quantidade: int, prefixo: str) -> list[int]:
+    """
+        Cria usuários sintéticos (ignorando os que já existem) e retorna os ids.
+    """
+    senha = make_password(f"{prefixo}-senha")
+    for inicio in range(0, quantidade, 5000):
+        User.objects.bulk_create(
+            [
+                User(username=f"{prefixo}_usuario{i}", email=f"{prefixo}_usuario{i}@example.com", password=senha)
+                for i in range(inicio, min(inicio + 5000, quantidade))
+            ],
+            ignore_conflicts=True,
+        )
+    return list(User.objects.filter(username__startswith=f"{prefixo}_usuario").values_list("id", flat=True))
+
+
+def gerar_produtos(quantidade: int, prefixo: str, aleatorio: random.Random, lote: int) -> list[int]:
+    """
+        Cria produtos sintéticos com quantidade zero e retorna os ids criados.
+    """
+    ultimo_id = Produto.objects.order_by("-id").values_list("id", flat=True).first() or 0
+
+    def linha(i):
+        return (f"{prefixo}-SKU-{i:07d}", f"Corredor {aleatorio.randint(1, 40)}-{aleatorio.randint(1, 12)}")
+
+    for inicio in range(0, quantidade, lote):
+        faixa = range(inicio, min(inicio + lote, quantidade))
+        if usa_copy():
+            copiar("produtos", ("nome", "localizacao", "quantidade", "versao"), ((*linha(i), 0, 0) for i in faixa))
+        else:
+            Produto.objects.bulk_create([Produto(nome=n, localizacao=l, quantidade=0) for n, l in map(linha, faixa)])
+
+    return list(Produto.objects.filter(id__gt=ultimo_id).order_by("id").values_list("id", flat=True))
+
+
+def _gerar_movimentacoes_worker(argumentos: tuple) -> dict:
+    """
+        Gera uma fatia das movimentações em um processo separado.
+
+        Args:
+            argumentos (tuple): (semente, quantidade, ids de produtos, pesos cumulativos,
+                ids de usuários, tamanho do lote, dias de histórico).
+
+        Returns:
+            dict: Saldo líquido gerado por produto (entradas - saídas).
+    """
+    semente, quantidade, ids_produtos, pesos, ids_usuarios, lote, dias = argumentos
+    aleatorio = random.Random(semente)
+    agora = timezone.now()
+    saldos = {}
+
+    try:
+        for inicio in range(0, quantidade, lote):
+            tamanho = min(lote, quantidade - inicio)
+            produtos = aleatorio.choices(ids_produtos, cum_weights=pesos, k=tamanho)
+            linhas = []
+            for produto_id in produtos:
+                if aleatorio.random() < 0.6:
+                    tipo, valor = "entrada", aleatorio.randint(1, 50)
+                    saldos[produto_id] = saldos.get(produto_id, 0) + valor
+                else:
+                    tipo, valor = "saida", aleatorio.randint(1, 20)
+                    saldos[produto_id] = saldos.get(produto_id, 0) - valor
+                linhas.append((aleatorio.choice(ids_usuarios), produto_id, valor, tipo,
+                               agora - timedelta(seconds=aleatorio.randint(0, dias * 86400))))
+
+            with transaction.atomic():
+                if usa_copy():
+                    copiar("movimentacoes", ("usuario_id", "produto_id", "quantidade", "tipo", "data"),
+                           ((u, p, q, t, d.isoformat()) for u, p, q, t, d in linhas))
+                else:
+                    Movimentacao.objects.bulk_create(
+                        [Movimentacao(usuario_id=u, produto_id=p, quantidade=q, tipo=t) for u, p, q, t, _ in linhas]
+                    )
+    finally:
+        connections.close_all()
+
+    return saldos
+
+
+def gerar_movimentacoes(quantidade: int, ids_produtos: list[int], ids_usuarios: list[int], seed: int,
+                        expoente: float, workers: int, lote: int, dias: int) -> dict:
+    """
+        Gera as movimentações em paralelo e retorna o saldo líquido por produto.
+
+        Cada worker recebe uma semente derivada de ``seed``; o resultado é
+        determinístico para a mesma combinação de ``seed`` e ``workers``.
+
+        Args:
+            quantidade (int): Total de movimentações.
+            ids_produtos (list[int]): Produtos disponíveis.
+            ids_usuarios (list[int]): Usuários responsáveis pelas movimentações.
+            seed (int): Semente base.
+            expoente (float): Expoente de Zipf para a concentração em SKUs quentes.
+            workers (int): Quantidade de processos.
+            lote (int): Linhas gravadas por lote.
+            dias (int): Período (em dias) do histórico gerado.
+
+        Returns:
+            dict: Saldo líquido por produto.
+    """
+    pesos = pesos_zipf(len(ids_produtos), expoente, random.Random(seed))
+    fatias = [quantidade // workers + (1 if i < quantidade % workers else 0) for i in range(workers)]
+    argumentos = [
+        (seed * 1000 + i, fatia, ids_produtos, pesos, ids_usuarios, lote, dias)
+        for i, fatia in enumerate(fatias) if fatia
+    ]
+
+    if workers == 1:
+        resultados = [_gerar_movimentacoes_worker(a) for a in argumentos]
+    else:
+        # As conexões não podem ser compartilhadas com os processos filhos
+        connections.close_all()
+        with multiprocessing.get_context("fork").Pool(workers) as pool:
+            resultados = pool.map(_gerar_movimentacoes_worker, argumentos)
+
+    saldos = {}
+    for parcial in resultados:
+        for produto_id, valor in parcial.items():
+            saldos[produto_id] = saldos.get(produto_id, 0) + valor
+    return saldos
+
+
+def ajustar_saldos(saldos: dict, usuario_id: int, lote: int) -> None:
+    """
+        Garante que o razão e ``Produto.quantidade`` fiquem consistentes.
+
+        Produtos com saldo negativo recebem uma entrada inicial que cobre a
+        diferença; em seguida ``Produto.quantidade`` recebe o saldo final.
+
+        Args:
+            saldos (dict): Saldo líquido por produto.
+            usuario_id (int): Usuário das entradas de ajuste.
+            lote (int): Linhas gravadas por lote.
+    """
+    ajustes = [(produto_id, -saldo) for produto_id, saldo in saldos.items() if saldo < 0]
+    for inicio in range(0, len(ajustes), lote):
+        Movimentacao.objects.bulk_create([
+            Movimentacao(usuario_id=usuario_id, produto_id=produto_id, quantidade=valor, tipo="entrada")
+            for produto_id, valor in ajustes[inicio:inicio + lote]
+        ])
+
+    finais = [(produto_id, max(saldo, 0)) for produto_id, saldo in saldos.items()]
+    for inicio in range(0, len(finais), lote):
+        parte = finais[inicio:inicio + lote]
+        if usa_copy():
+            with transaction.atomic(), connection.cursor() as cursor:
+                cursor.execute("CREATE TEMP TABLE saldos_carga (produto_id bigint, quantidade integer) ON COMMIT DROP")
+                copiar("saldos_carga", ("produto_id", "quantidade"), parte)
+                cursor.execute(
+                    "UPDATE produtos SET quantidade = s.quantidade FROM saldos_carga s WHERE produtos.id = s.produto_id"
+                )
+        else:
+            Produto.objects.bulk_update(
+                [Produto(id=produto_id, quantidade=valor) for produto_id, valor in parte], ["quantidade"], batch_size=1000
+            )
+
+
+def gerar_logs(quantidade: int, ids_usuarios: list[int], aleatorio: random.Random, lote: int) -> None:
+    """
+        Cria registros sintéticos de ``LogSystem``.
+    """
+    for inicio in range(0, quantidade, lote):
+        LogSystem.objects.bulk_create([
+            LogSystem(
+                user_id=aleatorio.choice(ids_usuarios),
+                action=aleatorio.choice(ACOES_LOG),
+                status="SUCESSO" if aleatorio.random() < 0.95 else "ERROR",
+                message="Registro gerado pelo seed_large",
+            )
+            for _ in range(min(lote, quantidade - inicio))
+        ])
@@ -0,0 +1,282 @@
+import asyncio
+import contextvars
+import hashlib
+import json
+import logging
+import secrets
+from collections import deque
+from datetime import timedelta
+from itertools import takewhile
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections, DatabaseError
+from django.db.models import Max, Min
+from django.utils import timezone
+
+from estoque.models import EventoEstoque, ConsumidorFeed
+
+logger = logging.getLogger(__name__)
+
+
+def registrar_evento(produto, tipo: str) -> EventoEstoque:
+    """
+        Grava no outbox o estado atual de ``produto``.
+
+        Deve ser chamado dentro da mesma transação que alterou o produto.
+    """
+    return EventoEstoque.objects.create(produto_id=produto.id, quantidade=produto.quantidade, tipo=tipo)
+
+
+def eventos_apos(cursor: int, limite: int = 500) -> list[tuple]:
+    """
+        Lê do outbox os eventos com ``id > cursor``, em ordem, com uma única leitura por faixa da chave primária.
+
+        Os ids são reservados em ``SequenciaOutbox`` sob o bloqueio da linha até
+        o commit, então ficam visíveis na ordem de id: nenhum id menor aparece
+        depois de um maior já lido.
+
+        Args:
+            cursor (int): Último id já entregue ao consumidor.
+            limite (int): Quantidade máxima de eventos lidos.
+
+        Returns:
+            list[tuple]: Tuplas (id, produto_id, quantidade, tipo, criado_em) em ordem de id.
+    """
+    return list(
+        EventoEstoque.objects.filter(id__gt=cursor)
+        .order_by("id")
+        .values_list("id", "produto_id", "quantidade", "tipo", "criado_em")[:limite]
+    )
+
+
+def _ler_para_difusor(cursor: int) -> list[tuple]:
+    # A tarefa do difusor roda fora do ciclo de requisições: renova a conexão como em uma requisição
+    close_old_connections()
+    return eventos_apos(cursor)
+
+
+def cursor_sse(ultimo: str) -> int | None:
+    """
+        Cursor de um cliente SSE a partir do ``Last-Event-ID`` (ou ``ultimo_id``); ``None`` se ausente ou inválido.
+    """
+    return int(ultimo) if ultimo.isdigit() else None
+
+
+def formatar_sse(evento: tuple) -> str:
+    """
+        Formata um evento do outbox como mensagem Server-Sent Events (``id``/``event``/``data``).
+    """
+    evento_id, produto_id, quantidade = evento[:3]
+    dados = json.dumps({"produto_id": produto_id, "quantidade": quantidade})
+    return f"id: {evento_id}\nevent: estoque\ndata: {dados}\n\n"
+
+
+def _hash_token(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def gerar_token_consumidor(nome: str) -> str:
+    """
+        Cria o consumidor do feed ``nome`` (ou troca o token de um existente).
+
+        Apenas o hash do token é gravado; o valor retornado não pode ser recuperado depois.
+
+        Returns:
+            str: Token a ser enviado no cabeçalho ``Authorization: Bearer <token>``.
+    """
+    token = secrets.token_urlsafe(32)
+    ConsumidorFeed.objects.update_or_create(nome=nome, defaults={"token_hash": _hash_token(token)})
+    return token
+
+
+def consumidor_interno(nome: str) -> ConsumidorFeed:
+    """
+        Retorna (criando se necessário) um consumidor do outbox usado por rotinas internas.
+
+        O token é descartado na criação: o consumidor não acessa o feed HTTP, mas
+        seu cursor participa da compactação como o dos consumidores externos.
+    """
+    consumidor, _ = ConsumidorFeed.objects.get_or_create(
+        nome=nome, defaults={"token_hash": _hash_token(secrets.token_urlsafe(32))}
+    )
+    return consumidor
+
+
+def autenticar_consumidor(request) -> ConsumidorFeed | None:
+    """
+        Retorna o consumidor do token Bearer da requisição, ou ``None`` se ausente ou inválido.
+    """
+    prefixo, _, token = request.headers.get("Authorization", "").partition(" ")
+    if prefixo != "Bearer" or not token:
+        return None
+    return ConsumidorFeed.objects.filter(token_hash=_hash_token(token)).first()
+
+
+def confirmar_cursor(consumidor: ConsumidorFeed, cursor: int) -> int:
+    """
+        Registra que ``consumidor`` processou os eventos até ``cursor``.
+
+        O cursor só avança: confirmações repetidas ou fora de ordem são ignoradas.
+
+        Returns:
+            int: Cursor confirmado do consumidor após a operação.
+    """
+    ConsumidorFeed.objects.filter(id=consumidor.id, cursor__lt=cursor).update(
+        cursor=cursor, confirmado_em=timezone.now()
+    )
+    return ConsumidorFeed.objects.values_list("cursor", flat=True).get(id=consumidor.id)
+
+
+def compactar_eventos(reter: timedelta, lote: int = 10_000) -> int:
+    """
+        Remove os eventos do outbox já confirmados por todos os consumidores do feed.
+
+        Eventos mais novos que ``reter`` são mantidos para clientes SSE que
+        reconectam com ``Last-Event-ID``. A remoção é feita em faixas de ``lote``
+        ids, cada uma em sua própria transação, para não manter bloqueios longos.
+
+        Args:
+            reter (timedelta): Idade mínima dos eventos removidos.
+            lote (int): Quantidade de ids removidos por comando ``DELETE``.
+
+        Returns:
+            int: Quantidade de eventos removidos.
+    """
+    # Ids crescem com criado_em: o primeiro evento recente é encontrado pela chave primária
+    recente = (
+        EventoEstoque.objects.filter(criado_em__gte=timezone.now() - reter)
+        .order_by("id").values_list("id", flat=True).first()
+    )
+    limites = [ConsumidorFeed.objects.aggregate(minimo=Min("cursor"))["minimo"]]
+    limites.append(recente - 1 if recente is not None else EventoEstoque.objects.aggregate(maximo=Max("id"))["maximo"])
+    limite = min((valor for valor in limites if valor is not None), default=None)
+    if not limite:
+        return 0
+
+    removidos = 0
+    inicio = EventoEstoque.objects.order_by("id").values_list("id", flat=True).first()
+    while inicio is not None and inicio <= limite:
+        fim = min(inicio + lote - 1, limite)
+        removidos += EventoEstoque.objects.filter(id__lte=fim).delete()[0]
+        inicio = fim + 1
+    return removidos
+
+
+class DifusorEventos:
+    """
+        Difusor único por processo dos eventos de estoque para os clientes SSE.
+
+        Uma única tarefa consulta o outbox a cada ``SSE_INTERVALO`` segundos
+        enquanto houver assinantes e guarda os eventos recentes em um buffer
+        circular compartilhado. Cada cliente mantém apenas o próprio cursor e
+        espera na mesma condição, então clientes ociosos não consultam o banco.
+        Clientes que retomam de um cursor anterior ao buffer são atualizados
+        com leituras diretas ao outbox até alcançá-lo.
+
+        Attributes:
+            eventos (deque): Eventos recentes, como retornados por ``eventos_apos``.
+            ultimo_id (int | None): Último id lido do outbox.
+            assinantes (int): Clientes conectados.
+    """
+
+    def __init__(self, intervalo: float, capacidade: int):
+        self.intervalo = intervalo
+        self.eventos = deque(maxlen=capacidade)
+        self.ultimo_id = None
+        self.assinantes = 0
+        self._condicao = None
+        self._inicio = None
+        self._tarefa = None
+        self._loop = None
+
+    async def _iniciar(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # Primeiro uso ou novo loop de eventos (ex: recarga do servidor de desenvolvimento)
+            self._loop, self._condicao, self._inicio, self._tarefa = loop, asyncio.Condition(), asyncio.Lock(), None
+            self.eventos.clear()
+            self.ultimo_id = None
+
+        # Clientes que chegam juntos fazem uma única consulta do ponto de partida
+        async with self._inicio:
+            if self.ultimo_id is None:
+                maximo = await EventoEstoque.objects.aaggregate(maximo=Max("id"))
+                self.ultimo_id = maximo["maximo"] or 0
+
+        if self._tarefa is None or self._tarefa.done():
+            # Contexto vazio: a tarefa não herda o estado da requisição que a iniciou
+            self._tarefa = loop.create_task(self._sondar(), context=contextvars.Context())
+
+    async def _sondar(self) -> None:
+        while self.assinantes:
+            try:
+                novos = await sync_to_async(_ler_para_difusor, thread_sensitive=False)(self.ultimo_id)
+            except DatabaseError:
+                # Falha temporária do banco: os clientes continuam conectados e a leitura é refeita
+                logger.exception("Erro ao ler o outbox de eventos de estoque")
+                novos = []
+            if novos:
+                self.eventos.extend(novos)
+                self.ultimo_id = novos[-1][0]
+                async with self._condicao:
+                    self._condicao.notify_all()
+            await asyncio.sleep(self.intervalo)
+
+    def _no_buffer(self, cursor: int) -> bool:
+        """
+            Indica se os eventos posteriores a ``cursor`` estão todos no buffer.
+        """
+        if self.eventos:
+            return cursor >= self.eventos[0][0] - 1
+        return cursor >= self.ultimo_id
+
+    async def assinar(self, cursor: int | None):
+        """
+            Gera, indefinidamente, as mensagens SSE dos eventos posteriores a ``cursor``.
+
+            Args:
+                cursor (int | None): Último id recebido pelo cliente (``Last-Event-ID``);
+                    ``None`` recebe apenas os eventos a partir de agora.
+
+            Yields:
+                str: Mensagens SSE e comentários de keep-alive.
+        """
+        self.assinantes += 1
+        try:
+            await self._iniciar()
+            if cursor is None:
+                cursor = self.ultimo_id
+            yield "retry: 3000\n\n"
+
+            while True:
+                no_buffer = self._no_buffer(cursor)
+                if no_buffer:
+                    pendentes = list(takewhile(lambda evento: evento[0] > cursor, reversed(self.eventos)))[::-1]
+                else:
+                    # Cliente atrasado em relação ao buffer: lê direto do outbox, em uma thread do pool
+                    pendentes = await sync_to_async(_ler_para_difusor, thread_sensitive=False)(cursor)
+
+                if pendentes:
+                    cursor = pendentes[-1][0]
+                    yield "".join(formatar_sse(evento) for evento in pendentes)
+                    continue
+
+                # Sem eventos: espera a próxima leitura do difusor
+                espera = settings.SSE_KEEPALIVE if no_buffer else self.intervalo
+                notificado = True
+                async with self._condicao:
+                    if self.ultimo_id <= cursor or not no_buffer:
+                        try:
+                            await asyncio.wait_for(self._condicao.wait(), espera)
+                        except asyncio.TimeoutError:
+                            notificado = False
+
+                if not notificado and no_buffer:
+                    yield ": keep-alive\n\n"
+        finally:
+            self.assinantes -= 1
+
+
+# Difusor global do processo
+difusor = DifusorEventos(settings.SSE_INTERVALO, settings.SSE_BUFFER)
@@ -0,0 +1,220 @@
+import io
+from itertools import islice
+
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+from django.utils import timezone
+
+from estoque.models import Produto, Movimentacao, EventoEstoque, Inventario, ItemInventario
+
+# Linhas de contagem gravadas por transação
+LOTE_CONTAGEM = 5000
+
+# Produtos ajustados por lote ao aplicar o inventário
+LOTE_APLICACAO = 900
+
+
+class InventarioFechado(Exception):
+    """
+        A sessão de inventário não está mais aberta (já aplicada ou cancelada).
+    """
+
+
+def ler_linhas(arquivo) -> io.TextIOWrapper:
+    """
+        Abre um arquivo enviado (CSV ou lista de códigos) para leitura linha a linha, sem carregá-lo na memória.
+    """
+    return io.TextIOWrapper(arquivo, encoding="utf-8-sig", errors="replace")
+
+
+def interpretar_linha(linha: str) -> tuple[int, int] | None:
+    """
+        Converte uma linha de contagem em (produto_id, quantidade).
+
+        Aceita ``produto_id,quantidade`` (ou ``;``) do CSV e apenas ``produto_id``
+        de leitores de código de barras, que conta uma unidade.
+
+        Returns:
+            tuple[int, int] | None: Par lido ou ``None`` para linhas vazias ou inválidas.
+    """
+    partes = [parte.strip() for parte in linha.replace(";", ",").split(",")]
+    if len(partes) == 1:
+        partes.append("1")
+    if len(partes) != 2 or not partes[0].isdigit() or not partes[1].isdigit():
+        return None
+    return int(partes[0]), int(partes[1])
+
+
+def _bloquear_aberto(inventario: Inventario) -> None:
+    """
+        Bloqueia a linha da sessão até o fim da transação, garantindo que ela continua aberta.
+    """
+    if Inventario.objects.select_for_update().filter(id=inventario.id, status="aberto").values_list("id").first() is None:
+        raise InventarioFechado(f"O inventário #{inventario.id} não está aberto.")
+
+
+def registrar_contagens(inventario: Inventario, linhas, substituir: bool) -> dict:
+    """
+        Grava as contagens de um arquivo/scanner na sessão de inventário, em lotes.
+
+        Cada lote agrupa as linhas por produto em memória e grava com um único
+        upsert (``bulk_create(update_conflicts=True)``), então o custo não depende
+        de quantas vezes um produto aparece nem do tamanho total do arquivo.
+
+        Args:
+            inventario (Inventario): Sessão aberta.
+            linhas (Iterable[str]): Linhas ``produto_id[,quantidade]``; a primeira pode ser um cabeçalho.
+            substituir (bool): ``True`` grava a quantidade informada (recontagem);
+                ``False`` soma à quantidade já contada (leituras do scanner).
+
+        Returns:
+            dict: ``lidas``, ``gravadas`` (produtos atualizados), ``invalidas`` e
+                ``desconhecidas`` (produtos inexistentes).
+
+        Raises:
+            InventarioFechado: Se a sessão não estiver aberta.
+    """
+    resultado = {"lidas": 0, "gravadas": 0, "invalidas": 0, "desconhecidas": 0}
+    linhas = iter(linhas)
+    primeira = True
+
+    while lote := list(islice(linhas, LOTE_CONTAGEM)):
+        contagens = {}
+        for linha in lote:
+            if not linha.strip():
+                continue
+            par = interpretar_linha(linha)
+            # Primeira linha não numérica: cabeçalho do CSV (ex: "produto_id,quantidade"), não uma linha inválida
+            if primeira and par is None and not linha.strip()[0].isdigit():
+                primeira = False
+                continue
+            primeira = False
+            resultado["lidas"] += 1
+            if par is None:
+                resultado["invalidas"] += 1
+                continue
+            produto_id, quantidade = par
+            contagens[produto_id] = quantidade if substituir else contagens.get(produto_id, 0) + quantidade
+
+        existentes = set(Produto.objects.filter(id__in=contagens).values_list("id", flat=True)) if contagens else set()
+        resultado["desconhecidas"] += sum(1 for produto_id in contagens if produto_id not in existentes)
+        contagens = {produto_id: valor for produto_id, valor in contagens.items() if produto_id in existentes}
+        if not contagens:
+            continue
+
+        with transaction.atomic():
+            # O lock da sessão serializa lotes simultâneos de vários contadores e a aplicação
+            _bloquear_aberto(inventario)
+
+            if not substituir:
+                anteriores = ItemInventario.objects.filter(inventario=inventario, produto_id__in=contagens)
+                for produto_id, contada in anteriores.values_list("produto_id", "quantidade_contada"):
+                    contagens[produto_id] += contada
+
+            agora = timezone.now()
+            ItemInventario.objects.bulk_create(
+                [
+                    ItemInventario(inventario=inventario, produto_id=produto_id, quantidade_contada=valor, contado_em=agora)
+                    for produto_id, valor in contagens.items()
+                ],
+                update_conflicts=True,
+                unique_fields=["inventario", "produto"],
+                update_fields=["quantidade_contada", "contado_em"],
+            )
+        resultado["gravadas"] += len(contagens)
+
+    return resultado
+
+
+def diferencas(inventario: Inventario):
+    """
+        Itens contados cuja quantidade difere do estoque do sistema, em uma única consulta com junção.
+
+        Returns:
+            QuerySet: Valores ``produto_id``, ``produto__nome``, ``quantidade_contada``,
+                ``sistema`` e ``diferenca`` (contada - sistema), ordenados pelo produto.
+    """
+    return (
+        ItemInventario.objects.filter(inventario=inventario)
+        .exclude(quantidade_contada=F("produto__quantidade"))
+        .annotate(sistema=F("produto__quantidade"), diferenca=F("quantidade_contada") - F("produto__quantidade"))
+        .order_by("produto_id")
+        .values("produto_id", "produto__nome", "quantidade_contada", "sistema", "diferenca")
+    )
+
+
+def resumo_diferencas(inventario: Inventario) -> dict:
+    """
+        Totais da sessão calculados no banco: itens contados, divergentes, sobras e faltas.
+    """
+    diferenca = F("quantidade_contada") - F("produto__quantidade")
+    return ItemInventario.objects.filter(inventario=inventario).aggregate(
+        contados=Count("id"),
+        divergentes=Count("id", filter=~Q(quantidade_contada=F("produto__quantidade"))),
+        sobras=Sum(diferenca, filter=Q(quantidade_contada__gt=F("produto__quantidade")), default=0),
+        faltas=Sum(-diferenca, filter=Q(quantidade_contada__lt=F("produto__quantidade")), default=0),
+    )
+
+
+def aplicar_inventario(inventario: Inventario, usuario) -> int:
+    """
+        Aplica as diferenças da sessão ao estoque em uma única transação.
+
+        Os itens divergentes são percorridos em lotes pela chave (keyset), então a
+        memória usada não cresce com o tamanho da contagem. Cada lote bloqueia os
+        produtos em ordem de id, grava as movimentações de ajuste e os eventos do
+        outbox com ``bulk_create`` e atualiza as quantidades com ``bulk_update``.
+        A diferença é recalculada sobre o estoque bloqueado, então movimentações
+        feitas após a contagem não são perdidas nem contadas duas vezes.
+        Produtos não contados não são alterados (contagem cíclica).
+
+        Args:
+            inventario (Inventario): Sessão aberta.
+            usuario (User): Usuário registrado nas movimentações de ajuste.
+
+        Returns:
+            int: Quantidade de produtos ajustados.
+
+        Raises:
+            InventarioFechado: Se a sessão não estiver aberta.
+    """
+    ajustados = 0
+    with transaction.atomic():
+        _bloquear_aberto(inventario)
+
+        ultimo = 0
+        while True:
+            lote = list(
+                diferencas(inventario).filter(produto_id__gt=ultimo)
+                .values_list("produto_id", "quantidade_contada")[:LOTE_APLICACAO]
+            )
+            if not lote:
+                break
+            ultimo = lote[-1][0]
+            contadas = dict(lote)
+
+            produtos = list(Produto.objects.select_for_update().filter(id__in=contadas).order_by("id").only("id", "quantidade", "versao"))
+            movimentacoes, eventos, alterados = [], [], []
+            for produto in produtos:
+                diferenca = contadas[produto.id] - produto.quantidade
+                if not diferenca:
+                    continue
+                alterados.append(produto)
+                movimentacoes.append(Movimentacao(
+                    usuario=usuario, produto_id=produto.id, quantidade=abs(diferenca),
+                    tipo="entrada" if diferenca > 0 else "saida",
+                ))
+                produto.quantidade = contadas[produto.id]
+                produto.versao += 1
+                eventos.append(EventoEstoque(produto_id=produto.id, quantidade=produto.quantidade, tipo="inventario"))
+
+            Movimentacao.objects.bulk_create(movimentacoes)
+            EventoEstoque.objects.bulk_create(eventos)
+            Produto.objects.bulk_update(alterados, ["quantidade", "versao"])
+            ajustados += len(alterados)
+            if len(lote) < LOTE_APLICACAO:
+                # Lote incompleto: não há mais diferenças
+                break
+
+        Inventario.objects.filter(id=inventario.id).update(status="aplicado", aplicado_em=timezone.now())
+    return ajustados
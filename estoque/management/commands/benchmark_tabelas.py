@@ -0,0 +1,71 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.template import engines
+
+from estoque.models import Produto
+from estoque.renderizacao import renderizar_produtos
+
+# Laço das linhas de "estoque/listar.html" antes do renderizador de linhas, usado como referência
+LINHAS_TEMPLATE = """{% for produto in produtos %}
+<tr>
+    <td>{{ produto.id }}</td>
+    <td><a href="{% url 'detalhe_produto' produto.id %}">{{ produto.nome }}</a></td>
+    <td id="quantidade-{{ produto.id }}">{{ produto.quantidade }}</td>
+    <td>{% if produto.imagem %}<img src="{{ produto.imagem.url }}" alt="Imagem" width="50">{% else %}Sem imagem{% endif %}</td>
+    <td>{% if produto.datasheet %}<a href="{{ produto.datasheet.url }}" download>Baixar PDF</a>{% else %}Nenhum anexo{% endif %}</td>
+    <td>{{ produto.localizacao }}</td>
+    <td>{{ produto.descricao }}</td>
+    <td>
+        {% if pode_editar %}<a href="{% url 'editar_produto' produto.id %}"><button class="btn btn-secondary btn-sm">Editar</button></a>{% endif %}
+        {% if pode_excluir %}<a href="{% url 'deletar_produto' produto.id %}"><button class="btn btn-danger btn-sm">Excluir</button></a>{% endif %}
+    </td>
+</tr>
+{% endfor %}"""
+
+
+class Command(BaseCommand):
+    """
+        Compara o custo por linha da tabela de produtos: laço do template x renderizador de linhas.
+
+        Os produtos são criados apenas em memória (sem banco); metade tem imagem
+        e anexo. Cada renderização é repetida ``--repeticoes`` vezes e a mediana
+        é reportada.
+
+        Uso:
+            python manage.py benchmark_tabelas --linhas 5000 --repeticoes 5
+    """
+    help = "Mede o tempo por linha da tabela de produtos renderizada pelo template e pelo renderizador de linhas."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--linhas", type=int, default=5000, help="Produtos na tabela.")
+        parser.add_argument("--repeticoes", type=int, default=5, help="Renderizações por método.")
+
+    def handle(self, *args, **options):
+        produtos = [
+            Produto(id=i, nome=f"Produto <{i}>", quantidade=i % 100, localizacao=f"A{i % 40}",
+                    descricao="Descrição & detalhes", imagem=f"estoque/images/p{i}.png" if i % 2 else None,
+                    datasheet=f"estoque/anexos/p{i}.pdf" if i % 2 else None)
+            for i in range(1, options["linhas"] + 1)
+        ]
+        template = engines["django"].from_string(LINHAS_TEMPLATE)
+        contexto = {"produtos": produtos, "pode_editar": True, "pode_excluir": True}
+
+        metodos = {
+            "template": lambda: template.render(contexto),
+            "renderizador": lambda: renderizar_produtos(produtos, True, True),
+        }
+        resultados = {}
+        for nome, renderizar in metodos.items():
+            duracoes = []
+            for _ in range(options["repeticoes"]):
+                inicio = time.perf_counter()
+                renderizar()
+                duracoes.append(time.perf_counter() - inicio)
+            resultados[nome] = statistics.median(duracoes)
+
+        self.stdout.write(f"{'método':<14}{'total ms':>10}{'µs/linha':>10}")
+        for nome, duracao in resultados.items():
+            self.stdout.write(f"{nome:<14}{duracao * 1000:>10.1f}{duracao * 1e6 / len(produtos):>10.1f}")
+        self.stdout.write(f"Redução: {resultados['template'] / resultados['renderizador']:.1f}x")
@@ -0,0 +1,64 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from estoque.carga_concorrente import preparar_produtos, executar_carga, verificar_consistencia
+
+
+class Command(BaseCommand):
+    """
+        Harness de carga concorrente para ``RegistrarMovimentacaoView.post``.
+
+        Cria produtos dedicados (com o estoque inicial registrado no razão),
+        dispara entradas e saídas concorrentes a partir de threads ou processos e,
+        ao final, verifica se ``Produto.quantidade`` é igual à soma do razão e
+        nunca ficou negativo.
+
+        Uso:
+            python manage.py carga_movimentacoes --usuario admin --requisicoes 5000 --concorrencia 32
+    """
+    help = "Dispara movimentações concorrentes e verifica a consistência do estoque com o razão."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--usuario", required=True, help="Usuário autenticado nas requisições.")
+        parser.add_argument("--requisicoes", type=int, default=2000, help="Total de requisições.")
+        parser.add_argument("--concorrencia", type=int, default=16, help="Threads ou processos simultâneos.")
+        parser.add_argument("--modo", choices=("thread", "processo"), default="thread", help="Tipo de paralelismo.")
+        parser.add_argument("--produtos", type=int, default=20, help="Produtos criados para a carga.")
+        parser.add_argument("--estoque-inicial", type=int, default=100, help="Estoque inicial de cada produto.")
+        parser.add_argument("--expoente", type=float, default=1.2,
+                            help="Expoente de Zipf (concentração em produtos quentes, 0 = uniforme).")
+        parser.add_argument("--proporcao-saida", type=float, default=0.5, help="Fração das requisições que são saídas.")
+        parser.add_argument("--quantidade-maxima", type=int, default=5, help="Quantidade máxima por movimentação.")
+        parser.add_argument("--seed", type=int, default=42, help="Semente do gerador aleatório.")
+        parser.add_argument("--prefixo", default="carga-concorrente", help="Prefixo do nome dos produtos criados.")
+
+    def handle(self, *args, **options):
+        try:
+            usuario = User.objects.get(username=options["usuario"])
+        except User.DoesNotExist:
+            raise CommandError(f"Usuário '{options['usuario']}' não encontrado.")
+
+        ids_produtos = preparar_produtos(options["produtos"], options["estoque_inicial"], usuario, options["prefixo"])
+        resultado = executar_carga(
+            usuario, ids_produtos, options["requisicoes"], options["concorrencia"], options["modo"],
+            options["expoente"], options["proporcao_saida"], options["quantidade_maxima"], options["seed"],
+        )
+
+        self.stdout.write(f"Requisições: {resultado['requisicoes']} em {resultado['duracao_s']}s "
+                          f"({resultado['vazao_rps']} req/s)")
+        self.stdout.write(f"Latência: p50 {resultado['p50_ms']}ms | p95 {resultado['p95_ms']}ms | p99 {resultado['p99_ms']}ms")
+        self.stdout.write(f"Aceitas: {resultado['aceitas']} | Rejeitadas (estoque insuficiente/validação): "
+                          f"{resultado['rejeitadas']} | Falhas: {resultado['falhas']}")
+        self.stdout.write(f"Espera por locks: {resultado['espera_lock_ms']}ms em {resultado['locks']} SELECT FOR UPDATE")
+        self.stdout.write(f"Deadlocks: {resultado['deadlocks']} | Serialização: {resultado['serializacao']} | "
+                          f"Bloqueios: {resultado['bloqueios']} | Outros erros: {resultado['outras']}")
+
+        divergentes = verificar_consistencia(ids_produtos)
+        if divergentes:
+            for item in divergentes[:20]:
+                self.stdout.write(self.style.ERROR(
+                    f"Produto {item['produto_id']}: quantidade {item['quantidade']} != razão {item['razao']}"
+                ))
+            raise CommandError(f"{len(divergentes)} produto(s) inconsistente(s) com o razão.")
+
+        self.stdout.write(self.style.SUCCESS("Estoque consistente com o razão em todos os produtos da carga."))
@@ -0,0 +1,27 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from estoque.eventos import compactar_eventos
+
+
+class Command(BaseCommand):
+    """
+        Remove do outbox os eventos confirmados por todos os consumidores do feed.
+
+        Deve ser agendado periodicamente (ex: cron a cada hora). Sem consumidores
+        cadastrados, remove todos os eventos fora da janela de retenção.
+
+        Uso:
+            python manage.py compactar_feed --reter-minutos 60 --lote 10000
+    """
+    help = "Compacta o outbox de eventos de estoque já confirmados."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--reter-minutos", type=int, default=60,
+                            help="Mantém os eventos recentes para reconexões SSE (Last-Event-ID).")
+        parser.add_argument("--lote", type=int, default=10_000, help="Ids removidos por comando DELETE.")
+
+    def handle(self, *args, **options):
+        removidos = compactar_eventos(timedelta(minutes=options["reter_minutos"]), options["lote"])
+        self.stdout.write(self.style.SUCCESS(f"{removidos} eventos removidos do outbox."))
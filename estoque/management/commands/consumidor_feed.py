@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from estoque.eventos import gerar_token_consumidor
+
+
+class Command(BaseCommand):
+    """
+        Cria um consumidor do feed de alterações de estoque (ou troca o token de um existente).
+
+        Uso:
+            python manage.py consumidor_feed erp
+    """
+    help = "Gera o token Bearer de um consumidor do feed /estoque/feed/."
+
+    def add_arguments(self, parser):
+        parser.add_argument("nome", help="Nome do sistema consumidor (ex: erp).")
+
+    def handle(self, *args, **options):
+        self.stdout.write(gerar_token_consumidor(options["nome"]))
@@ -0,0 +1,64 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from estoque.dados_sinteticos import usa_copy
+from estoque.reconciliacao import reconciliar, corrigir_divergencias, avancar_cursor
+
+
+class Command(BaseCommand):
+    """
+        Reconcilia ``Produto.quantidade`` com o saldo do razão de movimentações.
+
+        Por padrão é incremental: verifica apenas os produtos alterados desde a
+        última execução (eventos do outbox). A primeira execução, ou com
+        ``--completo``, verifica todos os produtos em faixas de ids, em paralelo
+        com ``--workers`` no PostgreSQL.
+
+        Com ``--corrigir``, grava movimentações de ajuste em lote para que o
+        razão volte a bater com a quantidade dos produtos. O cursor avança a
+        cada execução; divergências apenas reportadas ficam guardadas e
+        continuam aparecendo nas próximas execuções incrementais.
+
+        Uso:
+            python manage.py reconciliar_estoque
+            python manage.py reconciliar_estoque --completo --workers 8 --corrigir --usuario admin
+    """
+    help = "Compara a quantidade dos produtos com o razão e, opcionalmente, grava ajustes."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--completo", action="store_true", help="Verifica todos os produtos.")
+        parser.add_argument("--workers", type=int, default=1, help="Threads da verificação completa.")
+        parser.add_argument("--faixa", type=int, default=50_000, help="Ids de produto por fatia.")
+        parser.add_argument("--corrigir", action="store_true", help="Grava movimentações de ajuste.")
+        parser.add_argument("--usuario", help="Usuário registrado nos ajustes (obrigatório com --corrigir).")
+
+    def handle(self, *args, **options):
+        usuario = None
+        if options["corrigir"]:
+            try:
+                usuario = User.objects.get(username=options["usuario"])
+            except User.DoesNotExist:
+                raise CommandError(f"Usuário '{options['usuario']}' não encontrado.")
+
+        workers = options["workers"]
+        if not usa_copy() and workers > 1:
+            self.stdout.write(self.style.WARNING("Banco sem leitura concorrente eficiente: usando 1 worker."))
+            workers = 1
+
+        resultado = reconciliar(options["completo"], workers, options["faixa"])
+        divergentes = resultado["divergentes"]
+        modo = "completa" if resultado["completo"] else "incremental"
+        self.stdout.write(f"Verificação {modo}: {resultado['verificados']} produto(s), {len(divergentes)} divergente(s).")
+
+        for item in divergentes[:20]:
+            self.stdout.write(self.style.WARNING(
+                f"Produto {item['produto_id']}: quantidade {item['quantidade']} != razão {item['razao']}"
+            ))
+
+        pendentes = [item["produto_id"] for item in divergentes]
+        if divergentes and usuario:
+            gravadas = corrigir_divergencias(pendentes, usuario)
+            self.stdout.write(self.style.SUCCESS(f"{gravadas} movimentação(ões) de ajuste gravada(s)."))
+            pendentes = []
+
+        avancar_cursor(resultado["cursor"], pendentes)
@@ -0,0 +1,71 @@
+import os
+import random
+import time
+
+from django.core.management.base import BaseCommand
+
+from estoque.dados_sinteticos import (
+    usa_copy, gerar_usuarios, gerar_produtos, gerar_movimentacoes, ajustar_saldos, gerar_logs,
+)
+
+
+class Command(BaseCommand):
+    """
+        Gera um grande volume de dados sintéticos e determinísticos para testes de carga.
+
+        No PostgreSQL os dados são gravados com ``COPY`` e as movimentações são
+        geradas em vários processos; nos demais bancos usa ``bulk_create`` em lotes
+        com um único processo.
+
+        Uso:
+            python manage.py seed_large --produtos 200000 --movimentacoes 10000000 --workers 8
+    """
+    help = "Gera produtos, movimentações (com SKUs quentes), usuários e logs sintéticos."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--produtos", type=int, default=200_000, help="Quantidade de produtos.")
+        parser.add_argument("--movimentacoes", type=int, default=10_000_000, help="Quantidade de movimentações.")
+        parser.add_argument("--usuarios", type=int, default=2_000, help="Quantidade de usuários.")
+        parser.add_argument("--logs", type=int, default=50_000, help="Quantidade de registros de log.")
+        parser.add_argument("--seed", type=int, default=42, help="Semente do gerador aleatório.")
+        parser.add_argument("--expoente", type=float, default=1.1,
+                            help="Expoente de Zipf para concentração em SKUs quentes (0 = uniforme).")
+        parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Processos para as movimentações.")
+        parser.add_argument("--lote", type=int, default=50_000, help="Linhas gravadas por lote.")
+        parser.add_argument("--dias", type=int, default=365, help="Período do histórico de movimentações (COPY).")
+        parser.add_argument("--prefixo", default="carga", help="Prefixo dos nomes gerados.")
+
+    def handle(self, *args, **options):
+        aleatorio = random.Random(options["seed"])
+        workers = options["workers"]
+        if not usa_copy() and workers > 1:
+            self.stdout.write(self.style.WARNING("Banco sem COPY/escrita concorrente: usando 1 worker."))
+            workers = 1
+
+        inicio = time.perf_counter()
+        ids_usuarios = gerar_usuarios(options["usuarios"], options["prefixo"])
+        self._etapa("Usuários", len(ids_usuarios), inicio)
+
+        etapa = time.perf_counter()
+        ids_produtos = gerar_produtos(options["produtos"], options["prefixo"], aleatorio, options["lote"])
+        self._etapa("Produtos", len(ids_produtos), etapa)
+
+        if ids_produtos and ids_usuarios:
+            etapa = time.perf_counter()
+            saldos = gerar_movimentacoes(
+                options["movimentacoes"], ids_produtos, ids_usuarios, options["seed"],
+                options["expoente"], workers, options["lote"], options["dias"],
+            )
+            ajustar_saldos(saldos, ids_usuarios[0], options["lote"])
+            self._etapa("Movimentações", options["movimentacoes"], etapa)
+
+        if ids_usuarios:
+            etapa = time.perf_counter()
+            gerar_logs(options["logs"], ids_usuarios, aleatorio, options["lote"])
+            self._etapa("Logs", options["logs"], etapa)
+
+        self.stdout.write(self.style.SUCCESS(f"Concluído em {time.perf_counter() - inicio:.1f}s"))
+
+    def _etapa(self, nome: str, quantidade: int, inicio: float) -> None:
+        duracao = time.perf_counter() - inicio
+        self.stdout.write(f"{nome}: {quantidade} em {duracao:.1f}s ({quantidade / max(duracao, 1e-9):,.0f}/s)")
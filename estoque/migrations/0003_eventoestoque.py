@@ -0,0 +1,26 @@
+# Generated by Django 5.2.7 on 2026-10-19 06:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('estoque', '0002_alter_produto_datasheet'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EventoEstoque',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('produto_id', models.BigIntegerField()),
+                ('quantidade', models.IntegerField()),
+                ('tipo', models.CharField(choices=[('movimentacao', 'Movimentação')], max_length=20)),
+                ('criado_em', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'db_table': 'eventos_estoque',
+            },
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.7 on 2026-10-19 07:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('estoque', '0003_eventoestoque'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ConsumidorFeed',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nome', models.CharField(max_length=100, unique=True)),
+                ('token_hash', models.CharField(max_length=64, unique=True)),
+                ('cursor', models.BigIntegerField(default=0)),
+                ('confirmado_em', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'db_table': 'consumidores_feed',
+            },
+        ),
+        migrations.AlterField(
+            model_name='eventoestoque',
+            name='tipo',
+            field=models.CharField(choices=[('movimentacao', 'Movimentação'), ('criacao', 'Criação'), ('edicao', 'Edição'), ('exclusao', 'Exclusão')], max_length=20),
+        ),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 5.2.7 on 2026-10-19 07:09
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('estoque', '0004_feed_consumidores'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='eventoestoque',
+            name='tipo',
+            field=models.CharField(choices=[('movimentacao', 'Movimentação'), ('criacao', 'Criação'), ('edicao', 'Edição'), ('exclusao', 'Exclusão'), ('inventario', 'Inventário')], max_length=20),
+        ),
+        migrations.CreateModel(
+            name='Inventario',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('descricao', models.CharField(blank=True, max_length=100)),
+                ('status', models.CharField(choices=[('aberto', 'Aberto'), ('aplicado', 'Aplicado'), ('cancelado', 'Cancelado')], default='aberto', max_length=10)),
+                ('criado_em', models.DateTimeField(auto_now_add=True)),
+                ('aplicado_em', models.DateTimeField(blank=True, null=True)),
+                ('usuario', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'inventarios',
+            },
+        ),
+        migrations.CreateModel(
+            name='ItemInventario',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quantidade_contada', models.PositiveIntegerField(default=0)),
+                ('contado_em', models.DateTimeField(auto_now=True)),
+                ('inventario', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='itens', to='estoque.inventario')),
+                ('produto', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='estoque.produto')),
+            ],
+            options={
+                'db_table': 'itens_inventario',
+                'constraints': [models.UniqueConstraint(fields=('inventario', 'produto'), name='item_inventario_unico')],
+            },
+        ),
+    ]
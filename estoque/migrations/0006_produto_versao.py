@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-19 07:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('estoque', '0005_inventario'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='produto',
+            name='versao',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
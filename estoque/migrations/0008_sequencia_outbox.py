@@ -0,0 +1,36 @@
+# Generated by Django 5.2.7 on 2026-10-19 08:08
+
+from django.db import migrations, models
+from django.db.models import Max
+
+
+def criar_sequencia(apps, schema_editor):
+    """
+        Cria a linha da sequência a partir do maior id já gravado no outbox.
+    """
+    EventoEstoque = apps.get_model("estoque", "EventoEstoque")
+    SequenciaOutbox = apps.get_model("estoque", "SequenciaOutbox")
+    banco = schema_editor.connection.alias
+    maximo = EventoEstoque.objects.using(banco).aggregate(maximo=Max("id"))["maximo"] or 0
+    SequenciaOutbox.objects.using(banco).create(pk=1, ultimo_id=maximo)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('estoque', '0007_movimentacoes_usuario_data'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SequenciaOutbox',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ultimo_id', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'db_table': 'sequencia_outbox',
+            },
+        ),
+        migrations.RunPython(criar_sequencia, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.7 on 2026-10-19 08:30
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('estoque', '0008_sequencia_outbox'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DivergenciaEstoque',
+            fields=[
+                ('produto', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, serialize=False, to='estoque.produto')),
+                ('detectada_em', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'db_table': 'divergencias_estoque',
+            },
+        ),
+    ]
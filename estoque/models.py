@@ -1,5 +1,6 @@
 from django.contrib.auth.models import User
-from django.db import models
+from django.db import IntegrityError, models, transaction
+from django.db.models import F, Max
 
 
 # Create your models here.
@@ -10,6 +11,7 @@ class Produto(models.Model):
     imagem = models.ImageField(upload_to='estoque/images/', null=True, blank=True) #Pasta onde será salva a imagem # Pode ser nulo no banco # Pode ser deixado vazio no formulário
     localizacao = models.CharField(max_length=100, null=True, blank=True) # Limite de 100 caracteres
     datasheet = models.FileField(upload_to='estoque/anexos/', null=True, blank=True)# Arquivo adicional do produto, como datasheet ou manual (opcional), Pasta para salvar o arquivo
+    versao = models.PositiveIntegerField(default=0) # Incrementada a cada alteração (controle de concorrência otimista)
 
     def __str__(self):
         return self.nome
@@ -32,7 +34,182 @@ class Movimentacao(models.Model):
 
 
     def __str__(self):
-        return f"{self.tipo} - {self.componente.nome} ({self.quantidade})"
+        return f"{self.tipo} - {self.produto.nome} ({self.quantidade})"
 
     class Meta:
         db_table = 'movimentacoes' # Nome da tabela no banco de dados
+        indexes = [
+            # Total e última movimentação por usuário (listagem de usuários) lidos apenas do índice
+            models.Index(fields=["usuario", "data"], name="movimentacoes_usuario_data"),
+        ]
+
+
+class SequenciaOutbox(models.Model):
+    """
+        Último id atribuído no outbox (``EventoEstoque``), em uma única linha.
+
+        Os ids do outbox são reservados atualizando esta linha na transação que
+        grava os eventos. O bloqueio da linha dura até o commit, então uma
+        transação concorrente só reserva ids depois que a anterior confirma (ou
+        desfaz): os ids ficam na ordem de commit, sem lacunas de transações
+        desfeitas, e um consumidor nunca vê um id maior antes de um menor.
+    """
+    ultimo_id = models.BigIntegerField(default=0)
+
+    class Meta:
+        db_table = 'sequencia_outbox' # Nome da tabela no banco de dados
+
+    @classmethod
+    def reservar(cls, quantidade: int, using: str | None = None) -> range:
+        """
+            Reserva ``quantidade`` ids consecutivos do outbox. Deve ser chamado dentro da transação que grava os eventos.
+
+            Returns:
+                range: Ids reservados.
+        """
+        linhas = cls.objects.using(using)
+        while not linhas.filter(pk=1).update(ultimo_id=F("ultimo_id") + quantidade):
+            # Linha criada pela migração; recriada se a tabela for esvaziada, continuando a partir do maior id gravado
+            maximo = EventoEstoque.objects.using(using).aggregate(maximo=Max("id"))["maximo"] or 0
+            try:
+                with transaction.atomic(using=using):
+                    linhas.create(pk=1, ultimo_id=maximo)
+            except IntegrityError:  # criada por outra transação
+                pass
+        ultimo = linhas.values_list("ultimo_id", flat=True).get(pk=1)
+        return range(ultimo - quantidade + 1, ultimo + 1)
+
+
+class GerenciadorEventos(models.Manager):
+    """
+        Gerenciador do outbox que reserva os ids de ``bulk_create`` em ``SequenciaOutbox``.
+    """
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = list(objs)
+        sem_id = [evento for evento in objs if evento.id is None]
+        with transaction.atomic(using=self.db, savepoint=False):
+            for evento, evento_id in zip(sem_id, SequenciaOutbox.reservar(len(sem_id), using=self.db)):
+                evento.id = evento_id
+            return super().bulk_create(objs, *args, **kwargs)
+
+
+class EventoEstoque(models.Model):
+    """
+        Outbox de alterações de estoque, gravado na mesma transação da alteração.
+
+        O ``id`` crescente é o cursor dos consumidores (feed em tempo real e
+        integrações), que leem apenas ``id > cursor`` pelo índice da chave primária.
+        Os ids são reservados em ``SequenciaOutbox``, na ordem de commit.
+    """
+    TIPOS = [
+        ("movimentacao", "Movimentação"),
+        ("criacao", "Criação"),
+        ("edicao", "Edição"),
+        ("exclusao", "Exclusão"),
+        ("inventario", "Inventário"),
+    ]
+
+    produto_id = models.BigIntegerField() # Sem chave estrangeira: o evento sobrevive à exclusão do produto
+    quantidade = models.IntegerField() # Quantidade do produto após a alteração
+    tipo = models.CharField(max_length=20, choices=TIPOS)
+    criado_em = models.DateTimeField(auto_now_add=True)
+
+    objects = GerenciadorEventos()
+
+    def __str__(self):
+        return f"#{self.id} {self.tipo} - produto {self.produto_id} ({self.quantidade})"
+
+    def save(self, *args, **kwargs):
+        if self.id is not None:
+            return super().save(*args, **kwargs)
+        # Reserva e inserção na mesma transação: o bloqueio da sequência vale até o commit
+        with transaction.atomic(using=kwargs.get("using"), savepoint=False):
+            self.id = SequenciaOutbox.reservar(1, using=kwargs.get("using")).start
+            super().save(*args, **kwargs)
+
+    class Meta:
+        db_table = 'eventos_estoque' # Nome da tabela no banco de dados
+
+
+class ConsumidorFeed(models.Model):
+    """
+        Sistema externo (ex: ERP) que consome o feed de alterações do outbox.
+
+        O ``cursor`` é o último id de ``EventoEstoque`` confirmado pelo consumidor;
+        eventos confirmados por todos os consumidores podem ser compactados.
+    """
+    nome = models.CharField(max_length=100, unique=True)
+    token_hash = models.CharField(max_length=64, unique=True) # SHA-256 do token Bearer; o token em si não é guardado
+    cursor = models.BigIntegerField(default=0)
+    confirmado_em = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.nome} (cursor {self.cursor})"
+
+    class Meta:
+        db_table = 'consumidores_feed' # Nome da tabela no banco de dados
+
+
+class DivergenciaEstoque(models.Model):
+    """
+        Produto cuja ``quantidade`` diferia do razão na última reconciliação sem correção.
+
+        O cursor da reconciliação avança a cada verificação (liberando a
+        compactação do outbox); os produtos divergentes ficam aqui e são
+        verificados novamente nas execuções incrementais seguintes.
+    """
+    produto = models.OneToOneField(Produto, on_delete=models.CASCADE, primary_key=True)
+    detectada_em = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Produto {self.produto_id} divergente desde {self.detectada_em:%d/%m/%Y %H:%M}"
+
+    class Meta:
+        db_table = 'divergencias_estoque' # Nome da tabela no banco de dados
+
+
+class Inventario(models.Model):
+    """
+        Sessão de contagem física do estoque (inventário).
+
+        As contagens são acumuladas em ``ItemInventario`` enquanto a sessão está
+        aberta; ao aplicar, as diferenças viram movimentações de ajuste.
+    """
+    STATUS = [
+        ("aberto", "Aberto"),
+        ("aplicado", "Aplicado"),
+        ("cancelado", "Cancelado"),
+    ]
+
+    usuario = models.ForeignKey(User, on_delete=models.CASCADE) # Usuário que abriu a sessão
+    descricao = models.CharField(max_length=100, blank=True) # Ex: "Corredor A", "Fechamento mensal"
+    status = models.CharField(max_length=10, choices=STATUS, default="aberto")
+    criado_em = models.DateTimeField(auto_now_add=True)
+    aplicado_em = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Inventário #{self.id} ({self.status})"
+
+    class Meta:
+        db_table = 'inventarios' # Nome da tabela no banco de dados
+
+
+class ItemInventario(models.Model):
+    """
+        Quantidade contada de um produto em uma sessão de inventário.
+    """
+    inventario = models.ForeignKey(Inventario, on_delete=models.CASCADE, related_name="itens")
+    produto = models.ForeignKey(Produto, on_delete=models.CASCADE)
+    quantidade_contada = models.PositiveIntegerField(default=0)
+    contado_em = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.inventario_id} - produto {self.produto_id}: {self.quantidade_contada}"
+
+    class Meta:
+        db_table = 'itens_inventario' # Nome da tabela no banco de dados
+        constraints = [
+            # Uma linha por produto na sessão; também é o índice da leitura das diferenças
+            models.UniqueConstraint(fields=["inventario", "produto"], name="item_inventario_unico"),
+        ]
@@ -0,0 +1,197 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth.models import User
+from django.db import connections, transaction
+from django.db.models import Sum, Case, When, F, IntegerField, Max, Min, Q
+
+from estoque.eventos import consumidor_interno, confirmar_cursor, eventos_apos
+from estoque.models import Produto, Movimentacao, EventoEstoque, DivergenciaEstoque
+
+# Consumidor do outbox que guarda até onde a reconciliação incremental já verificou
+CONSUMIDOR_RECONCILIACAO = "reconciliacao"
+
+# Produtos por cláusula IN (abaixo do limite de parâmetros do SQLite)
+TAMANHO_IN = 900
+
+
+def saldos_razao(filtro: Q) -> dict:
+    """
+        Calcula o saldo do razão (entradas - saídas) por produto em uma única consulta agrupada.
+
+        Args:
+            filtro (Q): Filtro das movimentações (ex: ``Q(produto_id__in=ids)``).
+
+        Returns:
+            dict: Saldo por id de produto; produtos sem movimentações não aparecem.
+    """
+    return dict(
+        Movimentacao.objects.filter(filtro)
+        .values("produto_id")
+        .annotate(saldo=Sum(Case(
+            When(tipo="entrada", then=F("quantidade")),
+            default=-F("quantidade"),
+            output_field=IntegerField(),
+        )))
+        .values_list("produto_id", "saldo")
+    )
+
+
+def _divergencias_fatia(fatia: dict) -> list[dict]:
+    """
+        Compara ``Produto.quantidade`` com o razão para os produtos de uma fatia.
+
+        Args:
+            fatia (dict): Lookups sobre o id do produto (ex: ``{"gte": 1, "lt": 50001}`` ou ``{"in": ids}``).
+
+        Returns:
+            list[dict]: Produtos divergentes (produto_id, quantidade, razao).
+    """
+    razao = saldos_razao(Q(**{f"produto_id__{lookup}": valor for lookup, valor in fatia.items()}))
+    produtos = Produto.objects.filter(**{f"id__{lookup}": valor for lookup, valor in fatia.items()})
+
+    return [
+        {"produto_id": produto_id, "quantidade": quantidade, "razao": razao.get(produto_id, 0)}
+        for produto_id, quantidade in produtos.values_list("id", "quantidade")
+        if quantidade != razao.get(produto_id, 0)
+    ]
+
+
+def _executar_fatia(fatia: dict) -> list[dict]:
+    try:
+        return _divergencias_fatia(fatia)
+    finally:
+        # Cada thread abre a própria conexão
+        connections.close_all()
+
+
+def fatias_completas(faixa: int) -> list[dict]:
+    """
+        Divide todos os produtos em faixas contíguas de ``faixa`` ids.
+    """
+    limites = Produto.objects.aggregate(minimo=Min("id"), maximo=Max("id"))
+    if limites["minimo"] is None:
+        return []
+    return [{"gte": inicio, "lt": inicio + faixa} for inicio in range(limites["minimo"], limites["maximo"] + 1, faixa)]
+
+
+def produtos_alterados(cursor: int) -> tuple[set, int]:
+    """
+        Lê do outbox os produtos alterados após ``cursor`` (movimentações, criação e edição).
+
+        Returns:
+            tuple[set, int]: Ids dos produtos alterados e o id do último evento lido.
+    """
+    ids = set()
+    while eventos := eventos_apos(cursor, limite=10_000):
+        ids.update(evento[1] for evento in eventos)
+        cursor = eventos[-1][0]
+    return ids, cursor
+
+
+def reconciliar(completo: bool = False, workers: int = 1, faixa: int = 50_000) -> dict:
+    """
+        Encontra os produtos cuja ``quantidade`` difere do saldo do razão.
+
+        No modo incremental verifica apenas os produtos com eventos no outbox
+        após o cursor do consumidor ``reconciliacao`` e os que continuavam
+        divergentes na execução anterior (``DivergenciaEstoque``); sem cursor gravado (primeira
+        execução) ou com ``completo`` verifica todos os produtos em faixas de ids,
+        cada uma com uma consulta agrupada ao razão, distribuídas em ``workers`` threads.
+
+        Args:
+            completo (bool): Ignora o cursor e verifica todos os produtos.
+            workers (int): Threads simultâneas (cada uma com sua conexão).
+            faixa (int): Ids de produto por fatia na verificação completa.
+
+        Returns:
+            dict: ``verificados``, ``divergentes`` (produto_id/quantidade/razao),
+                ``cursor`` (último evento coberto) e ``completo``.
+    """
+    consumidor = consumidor_interno(CONSUMIDOR_RECONCILIACAO)
+    completo = completo or not consumidor.cursor
+
+    if completo:
+        # O cursor é lido antes da varredura: alterações feitas durante ela são revistas na próxima execução
+        cursor = EventoEstoque.objects.aggregate(maximo=Max("id"))["maximo"] or 0
+        fatias = fatias_completas(faixa)
+        verificados = Produto.objects.count()
+    else:
+        ids, cursor = produtos_alterados(consumidor.cursor)
+        ids.update(DivergenciaEstoque.objects.values_list("produto_id", flat=True))
+        ordenados = sorted(ids)
+        fatias = [{"in": ordenados[i:i + TAMANHO_IN]} for i in range(0, len(ordenados), TAMANHO_IN)]
+        verificados = len(ordenados)
+
+    if workers > 1 and len(fatias) > 1:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            parciais = list(executor.map(_executar_fatia, fatias))
+    else:
+        parciais = [_divergencias_fatia(fatia) for fatia in fatias]
+
+    return {
+        "verificados": verificados,
+        "divergentes": [item for parcial in parciais for item in parcial],
+        "cursor": cursor,
+        "completo": completo,
+    }
+
+
+def corrigir_divergencias(ids_produtos: list[int], usuario: User, lote: int = TAMANHO_IN) -> int:
+    """
+        Grava movimentações de ajuste para que o razão volte a bater com ``Produto.quantidade``.
+
+        ``Produto.quantidade`` é o valor exibido e editado pelos usuários, então o
+        razão é que recebe a diferença (entrada ou saída). Cada lote bloqueia seus
+        produtos e recalcula o saldo antes de gravar, então movimentações
+        registradas desde a verificação não geram ajustes duplicados.
+
+        Args:
+            ids_produtos (list[int]): Produtos divergentes.
+            usuario (User): Usuário registrado nas movimentações de ajuste.
+            lote (int): Produtos por transação.
+
+        Returns:
+            int: Quantidade de movimentações de ajuste gravadas.
+    """
+    ordenados = sorted(ids_produtos)
+    gravadas = 0
+    for inicio in range(0, len(ordenados), lote):
+        parte = ordenados[inicio:inicio + lote]
+        with transaction.atomic():
+            # Locks sempre na ordem dos ids para evitar deadlocks com outras escritas em lote
+            quantidades = dict(
+                Produto.objects.select_for_update().filter(id__in=parte).order_by("id").values_list("id", "quantidade")
+            )
+            razao = saldos_razao(Q(produto_id__in=parte))
+
+            ajustes = []
+            for produto_id, quantidade in quantidades.items():
+                diferenca = quantidade - razao.get(produto_id, 0)
+                if diferenca:
+                    ajustes.append(Movimentacao(
+                        usuario=usuario, produto_id=produto_id, quantidade=abs(diferenca),
+                        tipo="entrada" if diferenca > 0 else "saida",
+                    ))
+            Movimentacao.objects.bulk_create(ajustes)
+            gravadas += len(ajustes)
+    return gravadas
+
+
+def avancar_cursor(cursor: int, pendentes: list[int] = ()) -> None:
+    """
+        Grava o último evento do outbox coberto pela reconciliação e os produtos que continuam divergentes.
+
+        O cursor avança após toda verificação, então a reconciliação não impede a
+        compactação do outbox; os ``pendentes`` (divergências apenas reportadas)
+        substituem os da execução anterior e são verificados de novo na próxima.
+
+        Args:
+            cursor (int): Último evento do outbox coberto pela verificação.
+            pendentes (list[int]): Ids dos produtos divergentes não corrigidos.
+    """
+    with transaction.atomic():
+        DivergenciaEstoque.objects.exclude(produto_id__in=pendentes).delete()
+        # Mantém a data da primeira detecção dos produtos que continuam divergentes
+        DivergenciaEstoque.objects.bulk_create([DivergenciaEstoque(produto_id=produto_id) for produto_id in pendentes],
+                                               ignore_conflicts=True)
+        confirmar_cursor(consumidor_interno(CONSUMIDOR_RECONCILIACAO), cursor)
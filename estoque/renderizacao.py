@@ -0,0 +1,85 @@
+from django.utils.formats import localize
+from django.utils.html import conditional_escape
+from django.utils.safestring import SafeString, mark_safe
+from django.utils.timezone import template_localtime
+
+from core.renderizacao import url_por_id
+
+# Linhas das tabelas de produtos e de movimentações, montadas com str.format em vez de
+# percorrer os nós do template a cada linha (ver comando "benchmark_tabelas")
+LINHA_PRODUTO = (
+    '<tr><td>{id}</td><td><a href="{detalhe}">{nome}</a></td><td id="quantidade-{id}">{quantidade}</td>'
+    '<td>{imagem}</td><td>{anexo}</td><td>{localizacao}</td><td>{descricao}</td><td>{acoes}</td></tr>'
+)
+LINHA_MOVIMENTACAO = (
+    '<tr><td>{id}</td><td>{nome}</td><td>{tipo}</td><td>{quantidade}</td><td>{estoque}</td><td>{data}</td>'
+    '<td>{imagem}</td><td>{anexo}</td><td>{localizacao}</td><td>{descricao}</td></tr>'
+)
+IMAGEM = ('<img src="{}" alt="Imagem" width="50" style="transition: transform 0.2s;" '
+          'onmouseover="this.style.transform=\'scale(1.2)\'" onmouseout="this.style.transform=\'scale(1)\'">')
+ANEXO = '<a href="{}" download>Baixar PDF</a>'
+BOTAO_EDITAR = '<a href="{}"><button class="btn btn-secondary btn-sm">Editar</button></a>'
+BOTAO_EXCLUIR = '<a href="{}"><button class="btn btn-danger btn-sm">Excluir</button></a>'
+
+
+def _imagem_e_anexo(produto) -> tuple[str, str]:
+    imagem = IMAGEM.format(conditional_escape(produto.imagem.url)) if produto.imagem else "Sem imagem"
+    anexo = ANEXO.format(conditional_escape(produto.datasheet.url)) if produto.datasheet else "Nenhum anexo"
+    return imagem, anexo
+
+
+def renderizar_produtos(produtos, pode_editar: bool = False, pode_excluir: bool = False) -> SafeString:
+    """
+        Linhas ``<tr>`` da tabela de produtos (``estoque/listar.html``).
+
+        As rotas são resolvidas uma vez por tabela e as permissões verificadas
+        antes do laço, então cada linha custa apenas a formatação da string e o
+        escape dos campos de texto.
+
+        Args:
+            produtos (Iterable[Produto]): Produtos da página.
+            pode_editar (bool): Exibe o botão de edição.
+            pode_excluir (bool): Exibe o botão de exclusão.
+
+        Returns:
+            SafeString: HTML das linhas.
+    """
+    detalhe = url_por_id("detalhe_produto")
+    editar = url_por_id("editar_produto") if pode_editar else None
+    excluir = url_por_id("deletar_produto") if pode_excluir else None
+
+    linhas = []
+    for produto in produtos:
+        imagem, anexo = _imagem_e_anexo(produto)
+        acoes = (BOTAO_EDITAR.format(editar(produto.id)) if editar else "") + \
+                (BOTAO_EXCLUIR.format(excluir(produto.id)) if excluir else "")
+        linhas.append(LINHA_PRODUTO.format(
+            id=produto.id, detalhe=detalhe(produto.id), nome=conditional_escape(produto.nome),
+            quantidade=produto.quantidade, imagem=imagem, anexo=anexo,
+            localizacao=conditional_escape(produto.localizacao), descricao=conditional_escape(produto.descricao),
+            acoes=acoes,
+        ))
+    return mark_safe("\n".join(linhas))
+
+
+def renderizar_movimentacoes(movimentacoes) -> SafeString:
+    """
+        Linhas ``<tr>`` da tabela de movimentações (``movimentacoes/listar_movimentacao.html``).
+
+        Args:
+            movimentacoes (Iterable[Movimentacao]): Movimentações com o produto carregado (``select_related``).
+
+        Returns:
+            SafeString: HTML das linhas.
+    """
+    linhas = []
+    for movimentacao in movimentacoes:
+        produto = movimentacao.produto
+        imagem, anexo = _imagem_e_anexo(produto)
+        linhas.append(LINHA_MOVIMENTACAO.format(
+            id=movimentacao.id, nome=conditional_escape(produto.nome), tipo=conditional_escape(movimentacao.tipo),
+            quantidade=movimentacao.quantidade, estoque=produto.quantidade,
+            data=conditional_escape(localize(template_localtime(movimentacao.data))), imagem=imagem, anexo=anexo,
+            localizacao=conditional_escape(produto.localizacao), descricao=conditional_escape(produto.descricao),
+        ))
+    return mark_safe("\n".join(linhas))
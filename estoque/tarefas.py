@@ -0,0 +1,50 @@
+import io
+import os
+
+from django.core.files.base import ContentFile
+
+from core.tarefas import tarefa
+from estoque.models import Produto
+
+
+@tarefa
+def otimizar_imagem_produto(produto_id: int, largura_maxima: int = 1200) -> None:
+    """
+        Reduz a imagem de um produto para no máximo ``largura_maxima`` pixels de largura.
+
+        Fotos de celular chegam com vários megabytes e eram servidas como enviadas
+        na listagem e no detalhe. A imagem reduzida é gravada com um novo nome e
+        só substitui a original se o produto ainda apontar para ela (uma edição
+        pode ter trocado a imagem enquanto a tarefa esperava na fila).
+
+        Args:
+            produto_id (int): Produto cuja imagem será otimizada.
+            largura_maxima (int): Largura máxima em pixels, mantendo a proporção.
+    """
+    # Importado aqui: só o worker de tarefas usa o Pillow, e a importação pesa na inicialização das views
+    from PIL import Image
+
+    produto = Produto.objects.filter(id=produto_id).only("id", "imagem").first()
+    if produto is None or not produto.imagem:
+        return
+
+    original = produto.imagem.name
+    with produto.imagem.open("rb") as arquivo:
+        imagem = Image.open(arquivo)
+        imagem.load()
+    if imagem.width <= largura_maxima:
+        return
+
+    formato = imagem.format or "JPEG"
+    imagem.thumbnail((largura_maxima, largura_maxima * imagem.height // imagem.width))
+    if formato == "JPEG" and imagem.mode not in ("RGB", "L"):
+        imagem = imagem.convert("RGB")
+
+    saida = io.BytesIO()
+    imagem.save(saida, format=formato, optimize=True)
+    produto.imagem.save(os.path.basename(original), ContentFile(saida.getvalue()), save=False)
+
+    if Produto.objects.filter(id=produto_id, imagem=original).update(imagem=produto.imagem.name):
+        produto.imagem.storage.delete(original)
+    else:
+        produto.imagem.storage.delete(produto.imagem.name)
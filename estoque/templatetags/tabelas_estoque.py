@@ -0,0 +1,31 @@
+from django import template
+
+from estoque.renderizacao import renderizar_produtos, renderizar_movimentacoes
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def linhas_produtos(context, produtos):
+    """
+        Linhas da tabela de produtos, com os botões conforme as permissões do usuário.
+
+        Uso:
+            {% load tabelas_estoque %}
+            {% linhas_produtos produtos %}
+    """
+    usuario = context["user"]
+    return renderizar_produtos(produtos, usuario.has_perm("estoque.change_produto"),
+                               usuario.has_perm("estoque.delete_produto"))
+
+
+@register.simple_tag
+def linhas_movimentacoes(movimentacoes):
+    """
+        Linhas da tabela de movimentações.
+
+        Uso:
+            {% load tabelas_estoque %}
+            {% linhas_movimentacoes movimentacoes %}
+    """
+    return renderizar_movimentacoes(movimentacoes)
@@ -1,3 +1,560 @@
-from django.test import TestCase
+import asyncio
+import tempfile
+import threading
+from datetime import timedelta
+from io import BytesIO, StringIO
+from unittest import skipUnless
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection, connections, transaction
+from django.db.models import Q
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve, reverse
+
+from PIL import Image
+
+from core.metricas import registro
+from core.models import Tarefa
+from core.tarefas import executar_worker
+from estoque.asgi import EventosEstoqueASGI
+from estoque.eventos import difusor, eventos_apos, gerar_token_consumidor, compactar_eventos
+from estoque.inventario import registrar_contagens
+from estoque.models import Produto, Movimentacao, EventoEstoque, ConsumidorFeed, DivergenciaEstoque, Inventario, \
+    ItemInventario
+from estoque.reconciliacao import reconciliar, saldos_razao
+from estoque.renderizacao import renderizar_produtos
+from estoque.views import ListarEstoqueView, ListarEstoqueAsyncView
+
+
+class OrcamentoConsultasTest(TestCase):
+    """
+        Garante que a quantidade de consultas das views de listagem e detalhe
+        não cresce com a quantidade de linhas (10 e depois 1.000 registros).
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = User.objects.create_superuser("admin_teste", "admin@example.com", "senha-teste")
+
+    def setUp(self):
+        self.client.force_login(self.usuario)
+
+    def popular(self, total: int) -> None:
+        """
+            Completa o banco até ``total`` produtos e ``total`` movimentações.
+        """
+        existentes = Produto.objects.count()
+        Produto.objects.bulk_create(
+            [Produto(nome=f"Produto {i}", quantidade=i, localizacao="A1") for i in range(existentes, total)]
+        )
+        produtos = list(Produto.objects.all())
+        existentes = Movimentacao.objects.count()
+        Movimentacao.objects.bulk_create([
+            Movimentacao(usuario=self.usuario, produto=produtos[i % len(produtos)], quantidade=1, tipo="entrada")
+            for i in range(existentes, total)
+        ])
+
+    def contar_consultas(self, url: str) -> int:
+        with CaptureQueriesContext(connection) as consultas:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, url)
+        return len(consultas.captured_queries)
+
+    def assertConsultasConstantes(self, nome_url: str, **kwargs) -> None:
+        url = reverse(nome_url, kwargs=kwargs) if kwargs else reverse(nome_url)
+        if nome_url == "buscar_produtos":
+            url += "?q=Produto"
+
+        self.popular(10)
+        poucas_linhas = self.contar_consultas(url)
+        self.popular(1000)
+        muitas_linhas = self.contar_consultas(url)
+
+        self.assertEqual(poucas_linhas, muitas_linhas, f"{nome_url}: {poucas_linhas} -> {muitas_linhas} consultas")
+
+    def test_listar_estoque(self):
+        self.assertConsultasConstantes("listar_estoque")
+
+    def test_buscar_produtos(self):
+        self.assertConsultasConstantes("buscar_produtos")
+
+    def test_listar_movimentacao(self):
+        self.assertConsultasConstantes("listar_movimentacao")
+
+    def test_formulario_movimentacao(self):
+        self.assertConsultasConstantes("registrar_movimentacao")
+
+    def test_detalhe_produto(self):
+        produto = Produto.objects.create(nome="Detalhe", quantidade=1)
+        self.assertConsultasConstantes("detalhe_produto", produto_id=produto.id)
+
+
+class EdicaoProdutoVersaoTest(TestCase):
+    """
+        Controle de concorrência otimista na edição de produtos.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = User.objects.create_superuser("admin_teste", "admin@example.com", "senha-teste")
+        cls.produto = Produto.objects.create(nome="Resistor 10k", quantidade=5, localizacao="A1")
+
+    def setUp(self):
+        self.client.force_login(self.usuario)
+
+    def editar(self, versao: int, **dados):
+        dados = {"nome": "Resistor 10k", "quantidade": 5, "localizacao": "A1", "descricao": "", "versao": versao, **dados}
+        return self.client.post(reverse("editar_produto", args=[self.produto.id]), dados, follow=True)
+
+    def test_grava_apenas_campos_alterados(self):
+        with CaptureQueriesContext(connection) as consultas:
+            self.editar(0, nome="Resistor 10k 1/4W")
+
+        update = next(q["sql"] for q in consultas.captured_queries if q["sql"].startswith('UPDATE "produtos"'))
+        self.assertIn('"nome"', update)
+        self.assertIn('"versao" = ("produtos"."versao" + 1)', update)
+        self.assertNotIn('"quantidade"', update)
+        self.assertNotIn('"imagem"', update)
+        self.produto.refresh_from_db()
+        self.assertEqual((self.produto.nome, self.produto.versao), ("Resistor 10k 1/4W", 1))
+
+    def test_movimentacao_invalida_edicao_aberta(self):
+        versao = self.client.get(reverse("editar_produto", args=[self.produto.id])).context["produto"].versao
+        self.client.post(reverse("registrar_movimentacao"), {"produto": self.produto.id, "tipo": "entrada", "quantidade": 3})
+
+        response = self.editar(versao, localizacao="B2")
+
+        self.assertContains(response, "O produto foi alterado por outro usuário")
+        self.produto.refresh_from_db()
+        self.assertEqual((self.produto.quantidade, self.produto.localizacao, self.produto.versao), (8, "A1", 1))
+
+
+class OtimizacaoImagemTest(TestCase):
+    """
+        O upload de imagem apenas enfileira o redimensionamento, feito depois pelo worker de tarefas.
+    """
+
+    def setUp(self):
+        self.client.force_login(User.objects.create_superuser("admin_teste", "admin@example.com", "senha-teste"))
+        midia = tempfile.TemporaryDirectory()
+        self.addCleanup(midia.cleanup)
+        configuracao = override_settings(MEDIA_ROOT=midia.name, METRICS_DIR="")
+        configuracao.enable()
+        self.addCleanup(configuracao.disable)
+
+    def test_imagem_grande_e_reduzida_pelo_worker(self):
+        conteudo = BytesIO()
+        Image.new("RGB", (3000, 1500), "red").save(conteudo, "JPEG")
+        imagem = SimpleUploadedFile("foto.jpg", conteudo.getvalue(), content_type="image/jpeg")
+
+        self.client.post(reverse("criar_produto"), {"nome": "Sensor", "quantidade": 1, "localizacao": "A1", "imagem": imagem})
+
+        produto = Produto.objects.get()
+        self.assertEqual(produto.imagem.width, 3000)
+        self.assertEqual(Tarefa.objects.get().argumentos, {"produto_id": produto.id})
+
+        self.assertEqual(executar_worker(processos=0, drenar=True)["concluida"], 1)
+        produto.refresh_from_db()
+        self.assertEqual((produto.imagem.width, produto.imagem.height), (1200, 600))
+
+
+class FeedEstoqueTest(TestCase):
+    """
+        Feed de alterações por cursor, confirmação e compactação do outbox.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = User.objects.create_superuser("admin_teste", "admin@example.com", "senha-teste")
+        cls.produto = Produto.objects.create(nome="Resistor 10k", quantidade=5, localizacao="A1")
+
+    def setUp(self):
+        self.token = gerar_token_consumidor("erp")
+        self.headers = {"Authorization": f"Bearer {self.token}"}
+
+    def test_exige_token(self):
+        self.assertEqual(self.client.get(reverse("feed_estoque")).status_code, 401)
+        self.assertEqual(self.client.get(reverse("feed_estoque"), headers={"Authorization": "Bearer x"}).status_code, 401)
+
+    def test_edicao_grava_evento_e_feed_le_apos_cursor(self):
+        self.client.force_login(self.usuario)
+        self.client.post(reverse("editar_produto", args=[self.produto.id]),
+                         {"nome": "Resistor 10k", "quantidade": 7, "localizacao": "A2", "versao": 0})
+        self.client.post(reverse("registrar_movimentacao"), {"produto": self.produto.id, "tipo": "saida", "quantidade": 2})
+        edicao, movimentacao = EventoEstoque.objects.order_by("id")
+
+        with self.assertNumQueries(2):
+            dados = self.client.get(reverse("feed_estoque"), {"apos": edicao.id}, headers=self.headers).json()
+
+        self.assertEqual([(e["id"], e["tipo"], e["quantidade"]) for e in dados["eventos"]], [(movimentacao.id, "movimentacao", 5)])
+        self.assertEqual(dados["cursor"], movimentacao.id)
+        self.assertEqual(edicao.tipo, "edicao")
+
+    def test_confirmacao_e_compactacao(self):
+        eventos = [EventoEstoque.objects.create(produto_id=self.produto.id, quantidade=i, tipo="movimentacao") for i in range(3)]
+
+        response = self.client.post(reverse("feed_estoque"), {"cursor": eventos[1].id}, headers=self.headers)
+        self.assertEqual(response.json(), {"cursor": eventos[1].id})
+        # Confirmações antigas não fazem o cursor voltar
+        self.client.post(reverse("feed_estoque"), {"cursor": eventos[0].id}, headers=self.headers)
+        self.assertEqual(ConsumidorFeed.objects.get().cursor, eventos[1].id)
+
+        # Sem "apos" a leitura parte do cursor confirmado
+        dados = self.client.get(reverse("feed_estoque"), headers=self.headers).json()
+        self.assertEqual([e["id"] for e in dados["eventos"]], [eventos[2].id])
+
+        self.assertEqual(compactar_eventos(timedelta(0), lote=1), 2)
+        self.assertEqual(list(EventoEstoque.objects.values_list("id", flat=True)), [eventos[2].id])
+
+
+class ReconciliacaoTest(TestCase):
+    """
+        Reconciliação de ``Produto.quantidade`` com o razão, completa e incremental.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = User.objects.create_superuser("admin_teste", "admin@example.com", "senha-teste")
+        cls.consistente = Produto.objects.create(nome="Resistor 10k", quantidade=5, localizacao="A1")
+        cls.divergente = Produto.objects.create(nome="Capacitor 1uF", quantidade=8, localizacao="A2")
+        Movimentacao.objects.create(usuario=cls.usuario, produto=cls.consistente, quantidade=5, tipo="entrada")
+        Movimentacao.objects.create(usuario=cls.usuario, produto=cls.divergente, quantidade=10, tipo="entrada")
+        EventoEstoque.objects.create(produto_id=cls.consistente.id, quantidade=5, tipo="criacao")
+
+    def test_completa_corrige_em_lote(self):
+        resultado = reconciliar(completo=True, faixa=1)
+        self.assertEqual(resultado["divergentes"], [{"produto_id": self.divergente.id, "quantidade": 8, "razao": 10}])
+
+        call_command("reconciliar_estoque", "--completo", "--corrigir", "--usuario", self.usuario.username, stdout=StringIO())
+
+        ajuste = Movimentacao.objects.latest("id")
+        self.assertEqual((ajuste.produto_id, ajuste.tipo, ajuste.quantidade), (self.divergente.id, "saida", 2))
+        self.assertEqual(saldos_razao(Q())[self.divergente.id], 8)
+        self.assertEqual(reconciliar(completo=True)["divergentes"], [])
+
+    def test_incremental_verifica_apenas_alterados(self):
+        call_command("reconciliar_estoque", "--corrigir", "--usuario", self.usuario.username, stdout=StringIO())
+
+        # Edição pela view gera evento; a alteração direta no banco não
+        self.client.force_login(self.usuario)
+        self.client.post(reverse("editar_produto", args=[self.consistente.id]),
+                         {"nome": "Resistor 10k", "quantidade": 9, "localizacao": "A1", "versao": 0})
+        Produto.objects.filter(id=self.divergente.id).update(quantidade=1)
+
+        resultado = reconciliar()
+        self.assertFalse(resultado["completo"])
+        self.assertEqual(resultado["verificados"], 1)
+        self.assertEqual([item["produto_id"] for item in resultado["divergentes"]], [self.consistente.id])
+
+    def test_divergencia_reportada_nao_impede_a_compactacao(self):
+        call_command("reconciliar_estoque", stdout=StringIO())
+        self.assertEqual(list(DivergenciaEstoque.objects.values_list("produto_id", flat=True)), [self.divergente.id])
+
+        # Sem correção o cursor avança: os eventos já verificados podem ser compactados
+        self.assertEqual(compactar_eventos(timedelta(0)), 1)
+
+        # Sem novos eventos, a execução incremental verifica de novo o produto divergente
+        resultado = reconciliar()
+        self.assertEqual((resultado["completo"], resultado["verificados"]), (False, 1))
+        self.assertEqual([item["produto_id"] for item in resultado["divergentes"]], [self.divergente.id])
+
+        call_command("reconciliar_estoque", "--corrigir", "--usuario", self.usuario.username, stdout=StringIO())
+        self.assertFalse(DivergenciaEstoque.objects.exists())
+
+
+class InventarioTest(TestCase):
+    """
+        Sessões de inventário: contagem por CSV/scanner, diferenças e aplicação em lote.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = User.objects.create_superuser("admin_teste", "admin@example.com", "senha-teste")
+        cls.produtos = [
+            Produto.objects.create(nome=f"Produto {i}", quantidade=10, localizacao="A1") for i in range(4)
+        ]
+
+    def setUp(self):
+        self.client.force_login(self.usuario)
+        self.inventario = Inventario.objects.create(usuario=self.usuario)
+
+    def test_contagem_csv_e_scanner(self):
+        p0, p1, p2, _ = self.produtos
+        csv = f"produto_id,quantidade\n{p0.id},7\n{p1.id},10\n999999,3\n".encode()
+        self.client.post(reverse("contar_inventario", args=[self.inventario.id]),
+                         {"arquivo": SimpleUploadedFile("contagem.csv", csv), "modo": "substituir"})
+        self.client.post(reverse("contar_inventario", args=[self.inventario.id]),
+                         {"codigos": f"{p2.id}\n{p2.id}\n{p0.id}", "modo": "somar"})
+
+        contadas = dict(ItemInventario.objects.values_list("produto_id", "quantidade_contada"))
+        self.assertEqual(contadas, {p0.id: 8, p1.id: 10, p2.id: 2})
+
+        response = self.client.get(reverse("detalhe_inventario", args=[self.inventario.id]))
+        self.assertEqual(response.context["resumo"], {"contados": 3, "divergentes": 2, "sobras": 0, "faltas": 10})
+        self.assertEqual([item["produto_id"] for item in response.context["diferencas"]], [p0.id, p2.id])
+
+    def test_cabecalho_do_csv_nao_conta_como_invalido(self):
+        p0 = self.produtos[0]
+
+        resultado = registrar_contagens(self.inventario, ["produto_id,quantidade", f"{p0.id},5", "abc,1"], substituir=True)
+
+        self.assertEqual(resultado, {"lidas": 2, "gravadas": 1, "invalidas": 1, "desconhecidas": 0})
+        self.assertEqual(registrar_contagens(self.inventario, [f"{p0.id},5", "produto_id,quantidade"], True)["invalidas"], 1)
+
+    def test_aplicar_grava_movimentacoes_em_lote(self):
+        p0, p1, p2, p3 = self.produtos
+        registrar_contagens(self.inventario, [f"{p0.id},12", f"{p1.id},10", f"{p2.id},4"], substituir=True)
+
+        # Sessão, usuário, inventário, savepoint, lock da sessão, diferenças, lock dos produtos,
+        # reserva dos ids do outbox (update e leitura), 3 escritas em lote, fechamento e release
+        with self.assertNumQueries(14):
+            self.client.post(reverse("aplicar_inventario", args=[self.inventario.id]), {"acao": "aplicar"})
+
+        self.assertEqual(
+            dict(Produto.objects.values_list("id", "quantidade")), {p0.id: 12, p1.id: 10, p2.id: 4, p3.id: 10}
+        )
+        self.assertEqual(
+            sorted(Movimentacao.objects.values_list("produto_id", "tipo", "quantidade")),
+            [(p0.id, "entrada", 2), (p2.id, "saida", 6)],
+        )
+        self.assertEqual(EventoEstoque.objects.filter(tipo="inventario").count(), 2)
+        self.inventario.refresh_from_db()
+        self.assertEqual(self.inventario.status, "aplicado")
+
+        response = self.client.post(reverse("contar_inventario", args=[self.inventario.id]), {"codigos": str(p0.id)})
+        self.assertEqual(ItemInventario.objects.get(produto=p0).quantidade_contada, 12)
+        self.assertEqual(response.status_code, 302)
+
+
+@override_settings(VIEWS_ASSINCRONAS=True, ROOT_URLCONF="project.urls_assincronas")
+class ViewsAssincronasTest(TestCase):
+    """
+        Leituras de estoque pelas views assíncronas através do handler ASGI.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = User.objects.create_superuser("admin_teste", "admin@example.com", "senha-teste")
+        cls.produto = Produto.objects.create(nome="Resistor 10k", quantidade=7, localizacao="A1")
+        Produto.objects.create(nome="Capacitor 100nF", quantidade=3, localizacao="A2")
+        Movimentacao.objects.create(usuario=cls.usuario, produto=cls.produto, quantidade=10, tipo="entrada")
+        Movimentacao.objects.create(usuario=cls.usuario, produto=cls.produto, quantidade=3, tipo="saida")
+
+    def setUp(self):
+        self.async_client.force_login(self.usuario)
+
+    async def test_listar_e_buscar(self):
+        response = await self.async_client.get(reverse("listar_estoque"))
+        self.assertContains(response, "Capacitor 100nF")
+
+        response = await self.async_client.get(reverse("buscar_produtos"), {"q": "resistor"})
+        self.assertContains(response, "Resistor 10k")
+        self.assertNotContains(response, "Capacitor 100nF")
+
+    async def test_detalhe_totais(self):
+        response = await self.async_client.get(reverse("detalhe_produto", args=[self.produto.id]))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.context["entradas"], response.context["saidas"]), (10, 3))
+
+    async def test_autocomplete(self):
+        response = await self.async_client.get(reverse("autocomplete_produtos"), {"q": "res"})
+        self.assertEqual(response.json(), {"produtos": [{"id": self.produto.id, "nome": "Resistor 10k", "quantidade": 7}]})
+
+    async def test_exige_login(self):
+        await self.async_client.alogout()
+        response = await self.async_client.get(reverse("listar_estoque"))
+        self.assertEqual(response.status_code, 302)
+
+    def test_urlconf_de_cada_deploy(self):
+        self.assertIs(resolve(reverse("listar_estoque")).func.view_class, ListarEstoqueAsyncView)
+        self.assertEqual(reverse("registrar_movimentacao"), "/estoque/movimentacoes/registrar/")
+
+        with override_settings(VIEWS_ASSINCRONAS=False, ROOT_URLCONF="project.urls"):
+            self.assertIs(resolve(reverse("listar_estoque")).func.view_class, ListarEstoqueView)
+
+
+class OutboxEventosTest(TestCase):
+    """
+        Gravação do outbox junto com a movimentação e leitura ordenada pelo cursor.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = User.objects.create_superuser("admin_teste", "admin@example.com", "senha-teste")
+        cls.produto = Produto.objects.create(nome="Resistor 10k", quantidade=5, localizacao="A1")
+
+    def test_movimentacao_grava_evento(self):
+        self.client.force_login(self.usuario)
+        self.client.post(reverse("registrar_movimentacao"), {"produto": self.produto.id, "tipo": "entrada", "quantidade": 3})
+
+        evento = EventoEstoque.objects.get()
+        self.assertEqual((evento.produto_id, evento.quantidade, evento.tipo), (self.produto.id, 8, "movimentacao"))
+
+    def test_lacuna_nao_interrompe_leitura(self):
+        eventos = [EventoEstoque.objects.create(produto_id=self.produto.id, quantidade=i, tipo="movimentacao") for i in range(4)]
+        eventos[2].delete()
+
+        self.assertEqual([e[0] for e in eventos_apos(eventos[0].id - 1)], [eventos[0].id, eventos[1].id, eventos[3].id])
+
+    def test_transacao_desfeita_nao_consome_id(self):
+        anterior = EventoEstoque.objects.create(produto_id=self.produto.id, quantidade=1, tipo="movimentacao")
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            EventoEstoque.objects.create(produto_id=self.produto.id, quantidade=2, tipo="movimentacao")
+            raise RuntimeError
+
+        evento, = EventoEstoque.objects.bulk_create([EventoEstoque(produto_id=self.produto.id, quantidade=3, tipo="inventario")])
+        self.assertEqual(evento.id, anterior.id + 1)
+
+
+@skipUnless(connection.vendor == "postgresql", "Bloqueio de linha entre conexões concorrentes")
+class OutboxConcorrenciaTest(TransactionTestCase):
+    """
+        Ids do outbox na ordem de commit entre transações concorrentes.
+    """
+
+    def _gravar(self, quantidade: int, gravado: threading.Event | None = None, confirmar: threading.Event | None = None):
+        try:
+            with transaction.atomic():
+                EventoEstoque.objects.create(produto_id=1, quantidade=quantidade, tipo="movimentacao")
+                if gravado:
+                    gravado.set()
+                    confirmar.wait(10)
+        finally:
+            connections.close_all()
+
+    def test_transacao_lenta_confirmada_depois_de_outra(self):
+        gravado, confirmar = threading.Event(), threading.Event()
+        lenta = threading.Thread(target=self._gravar, args=(1, gravado, confirmar))
+        rapida = threading.Thread(target=self._gravar, args=(2,))
+        lenta.start()
+        gravado.wait(10)
+        rapida.start()
+
+        # A transação iniciada depois espera a lenta e nada fica visível antes do commit dela
+        rapida.join(0.5)
+        self.assertTrue(rapida.is_alive())
+        self.assertEqual(eventos_apos(0), [])
+
+        confirmar.set()
+        lenta.join(10)
+        rapida.join(10)
+        self.assertEqual([e[2] for e in eventos_apos(0)], [1, 2])
+
+
+@override_settings(VIEWS_ASSINCRONAS=True, ROOT_URLCONF="project.urls_assincronas")
+class EventosEstoqueASGITest(TransactionTestCase):
+    """
+        Fluxo SSE atendido pela aplicação ASGI antes do Django: retomada pelo
+        ``Last-Event-ID``, autenticação pela sessão e clientes ociosos sem threads.
+    """
+
+    def setUp(self):
+        self.usuario = User.objects.create_superuser("admin_teste", "admin@example.com", "senha-teste")
+        self.client.force_login(self.usuario)
+        self.sessao = self.client.cookies[settings.SESSION_COOKIE_NAME].value
+        self.eventos = [EventoEstoque.objects.create(produto_id=1, quantidade=i, tipo="movimentacao") for i in range(3)]
+        self.repassadas = []
+
+        async def django(scope, receive, send):
+            self.repassadas.append(scope["path"])
+        self.aplicacao = EventosEstoqueASGI(django)
+
+    def _conectar(self, cabecalhos: list, caminho: str | None = None):
+        mensagens, desconectar = asyncio.Queue(), asyncio.Event()
+
+        async def receive():
+            await desconectar.wait()
+            return {"type": "http.disconnect"}
+
+        scope = {"type": "http", "method": "GET", "path": caminho or reverse("eventos_estoque"), "root_path": "",
+                 "query_string": b"", "headers": cabecalhos}
+        tarefa = asyncio.ensure_future(self.aplicacao(scope, receive, mensagens.put))
+        return tarefa, mensagens, desconectar
+
+    def _cookie(self) -> tuple:
+        return b"cookie", f"{settings.SESSION_COOKIE_NAME}={self.sessao}".encode()
+
+    async def _abrir(self, cabecalhos: list):
+        conexao = self._conectar(cabecalhos)
+        self.assertEqual((await asyncio.wait_for(conexao[1].get(), 5))["status"], 200)
+        self.assertEqual((await asyncio.wait_for(conexao[1].get(), 5))["body"], b"retry: 3000\n\n")
+        return conexao
+
+    async def _fechar(self, conexoes: list) -> None:
+        for tarefa, _, desconectar in conexoes:
+            desconectar.set()
+        await asyncio.wait_for(asyncio.gather(*(tarefa for tarefa, _, _ in conexoes)), 5)
+        difusor._tarefa.cancel()
+
+    async def test_retoma_do_ultimo_evento(self):
+        conexao = await self._abrir([self._cookie(), (b"last-event-id", str(self.eventos[0].id).encode())])
+        try:
+            mensagens = (await asyncio.wait_for(conexao[1].get(), 5))["body"].decode()
+        finally:
+            await self._fechar([conexao])
+
+        self.assertNotIn(f"id: {self.eventos[0].id}\n", mensagens)
+        self.assertIn(f'id: {self.eventos[2].id}\nevent: estoque\ndata: {{"produto_id": 1, "quantidade": 2}}', mensagens)
+        self.assertEqual(difusor.assinantes, 0)
+
+    async def test_sem_sessao_redireciona_para_login(self):
+        tarefa, mensagens, _ = self._conectar([])
+        await asyncio.wait_for(tarefa, 5)
+
+        inicio = await mensagens.get()
+        self.assertEqual(inicio["status"], 302)
+        self.assertTrue(dict(inicio["headers"])[b"location"].startswith(settings.LOGIN_URL.encode()))
+
+    async def test_outras_rotas_seguem_para_o_django(self):
+        await asyncio.wait_for(self._conectar([self._cookie()], caminho=reverse("listar_estoque"))[0], 5)
+
+        self.assertEqual(self.repassadas, [reverse("listar_estoque")])
+
+    async def test_clientes_ociosos_nao_ocupam_threads(self):
+        conexoes = [await self._abrir([self._cookie()])]
+        antes = threading.active_count()
+        try:
+            for _ in range(100):
+                conexoes.append(await self._abrir([self._cookie()]))
+            # Apenas as threads do pool usadas na autenticação e nas leituras do difusor
+            self.assertLessEqual(threading.active_count(), antes + 2)
+            self.assertEqual(difusor.assinantes, 101)
+        finally:
+            await self._fechar(conexoes)
+
+
+class TabelasEstoqueTest(TestCase):
+    """
+        Renderizador de linhas das tabelas e medição da renderização dos templates.
+    """
+
+    def test_linhas_de_produtos(self):
+        produtos = [Produto(id=7, nome="<b>Sensor</b>", quantidade=3, localizacao="A1", descricao="x & y",
+                            imagem="estoque/images/s.png")]
+
+        html = renderizar_produtos(produtos, pode_editar=True, pode_excluir=False)
+
+        self.assertIn(f'<a href="{reverse("detalhe_produto", args=[7])}">&lt;b&gt;Sensor&lt;/b&gt;</a>', html)
+        self.assertIn('<td id="quantidade-7">3</td>', html)
+        self.assertIn("/media/estoque/images/s.png", html)
+        self.assertIn("Nenhum anexo", html)
+        self.assertIn("x &amp; y", html)
+        self.assertIn(reverse("editar_produto", args=[7]), html)
+        self.assertNotIn(reverse("deletar_produto", args=[7]), html)
+
+    def test_listagem_mede_template_e_linhas(self):
+        Produto.objects.create(nome="Sensor", quantidade=1, localizacao="A1")
+        Movimentacao.objects.create(usuario=User.objects.create_superuser("admin_teste", "admin@example.com", "senha-teste"),
+                                    produto=Produto.objects.get(), tipo="entrada", quantidade=1)
+        self.client.force_login(User.objects.get())
+
+        self.assertContains(self.client.get(reverse("listar_estoque")), reverse("deletar_produto", args=[Produto.objects.get().id]))
+        self.assertContains(self.client.get(reverse("listar_movimentacao")), "<td>Sensor</td>")
+
+        texto = registro.exportar()
+        self.assertIn('template_renderizacao_seconds_count{template="estoque/listar.html"}', texto)
+        self.assertIn('template_bloco_seconds_count{bloco="linhas",template="movimentacoes/listar_movimentacao.html"}', texto)
@@ -14,15 +14,16 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
-from itertools import product
-
-from django.contrib import admin
-from django.urls import path, include
+from django.urls import path
 
 from estoque.views import ListarEstoqueView, DetalheProdutoView, BuscarProdutosView, CriarProdutoView, \
-    EditarProdutoView, DeletarProdutoView, ListarMovimentacaoView, RegistrarMovimentacaoView
+    EditarProdutoView, DeletarProdutoView, ListarMovimentacaoView, RegistrarMovimentacaoView, \
+    ListarEstoqueAsyncView, DetalheProdutoAsyncView, BuscarProdutosAsyncView, AutocompleteProdutosView, \
+    EventosEstoqueView, FeedEstoqueView, ListarInventariosView, DetalheInventarioView, ContarInventarioView, \
+    AplicarInventarioView
 
-urlpatterns = [
+# Leituras do estoque pelas views síncronas (WSGI)
+leituras_sincronas = [
 
     # Lista todos os produtos no estoque
     path('', ListarEstoqueView.as_view(), name='listar_estoque'),
@@ -32,6 +33,26 @@ urlpatterns = [
 
     # Busca produtos
     path('buscar/', BuscarProdutosView.as_view(), name='buscar_produtos'),
+]
+
+# As mesmas leituras pelas views assíncronas (deploy ASGI, VIEWS_ASSINCRONAS=True)
+leituras_assincronas = [
+    path('', ListarEstoqueAsyncView.as_view(), name='listar_estoque'),
+    path('<int:produto_id>/', DetalheProdutoAsyncView.as_view(), name='detalhe_produto'),
+    path('buscar/', BuscarProdutosAsyncView.as_view(), name='buscar_produtos'),
+]
+
+# Demais rotas, iguais nos dois deploys
+rotas = [
+
+    # Sugestões de produtos pelo início do nome (JSON)
+    path('autocomplete/', AutocompleteProdutosView.as_view(), name='autocomplete_produtos'),
+
+    # Fluxo (Server-Sent Events) das alterações de estoque
+    path('eventos/', EventosEstoqueView.as_view(), name='eventos_estoque'),
+
+    # Feed de alterações para integrações: GET lê após o cursor, POST confirma (token Bearer)
+    path('feed/', FeedEstoqueView.as_view(), name='feed_estoque'),
 
     # Criação de um novo produto
     path('criar_produto/', CriarProdutoView.as_view(), name='criar_produto'),
@@ -47,4 +68,22 @@ urlpatterns = [
 
     # Registrar nova movimentação (entrada/saída)
     path('movimentacoes/registrar/', RegistrarMovimentacaoView.as_view(), name='registrar_movimentacao'),
+
+    # Lista e abre sessões de inventário (contagem física)
+    path('inventarios/', ListarInventariosView.as_view(), name='listar_inventarios'),
+
+    # Diferenças e formulários de contagem de uma sessão
+    path('inventarios/<int:inventario_id>/', DetalheInventarioView.as_view(), name='detalhe_inventario'),
+
+    # Recebe contagens por CSV ou scanner
+    path('inventarios/<int:inventario_id>/contar/', ContarInventarioView.as_view(), name='contar_inventario'),
+
+    # Aplica (ou cancela) a sessão
+    path('inventarios/<int:inventario_id>/aplicar/', AplicarInventarioView.as_view(), name='aplicar_inventario'),
 ]
+
+
+urlpatterns = leituras_sincronas + rotas
+
+# Rotas do deploy ASGI, incluídas por project/urls_assincronas.py
+urlpatterns_assincronas = leituras_assincronas + rotas
@@ -1,18 +1,29 @@
+from asgiref.sync import sync_to_async
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.core.exceptions import ValidationError
 from django.db import transaction, IntegrityError, DatabaseError
-from django.db.models import Sum
-from django.http import HttpRequest, HttpResponse
-from django.shortcuts import render, redirect, get_object_or_404
+from django.db.models import Sum, Q, Count, F
+from django.http import HttpRequest, HttpResponse, JsonResponse
+from django.shortcuts import render, redirect, get_object_or_404, aget_object_or_404
 from django.contrib import messages
+from django.utils.decorators import method_decorator
 from django.views import View
+from django.views.decorators.csrf import csrf_exempt
 
+from core.assincrono import LoginRequiredAsyncMixin, arender
+from core.permissoes import PermissaoRequeridaMixin
+from core.replicas import LeituraReplicaMixin
+from core.tarefas import enfileirar
 from core.utils import registrar_log
-from estoque.models import Produto, Movimentacao
+from estoque.eventos import registrar_evento, eventos_apos, autenticar_consumidor, confirmar_cursor
+from estoque.inventario import registrar_contagens, ler_linhas, diferencas, resumo_diferencas, aplicar_inventario, \
+    InventarioFechado
+from estoque.models import Produto, Movimentacao, EventoEstoque, Inventario
+from estoque.tarefas import otimizar_imagem_produto
 from estoque.utils import validar_produto
 
 
-class ListarMovimentacaoView(LoginRequiredMixin, View):
+class ListarMovimentacaoView(LoginRequiredMixin, LeituraReplicaMixin, View):
     """
         View responsável por listar todas as movimentações de estoque.
 
@@ -31,7 +42,7 @@ class ListarMovimentacaoView(LoginRequiredMixin, View):
                 django.http.HttpResponse: Página HTML contendo a lista de movimentações.
         """
         try:
-            movimentacoes = Movimentacao.objects.all()
+            movimentacoes = Movimentacao.objects.select_related('produto')
 
         except DatabaseError:
             messages.error(request, "Erro de banco de dados ao carregar movimentações.")
@@ -45,7 +56,7 @@ class ListarMovimentacaoView(LoginRequiredMixin, View):
         return render(request, 'movimentacoes/listar_movimentacao.html', {'movimentacoes': movimentacoes})
 
 
-class RegistrarMovimentacaoView(LoginRequiredMixin, View):
+class RegistrarMovimentacaoView(LoginRequiredMixin, PermissaoRequeridaMixin, View):
     """
          View responsável por registrar entradas e saídas de produtos no estoque.
 
@@ -53,6 +64,9 @@ class RegistrarMovimentacaoView(LoginRequiredMixin, View):
              get: Exibe o formulário de movimentação.
              post: Processa o registro de movimentação no banco de dados.
      """
+    permissao_requerida = "estoque.add_movimentacao"
+    mensagem_sem_permissao = "Você não tem permissão para registrar movimentações."
+    url_sem_permissao = 'listar_movimentacao'
     def get(self, request: HttpRequest) -> HttpResponse:
         """
             Exibe o formulário para registrar uma nova movimentação.
@@ -115,7 +129,9 @@ class RegistrarMovimentacaoView(LoginRequiredMixin, View):
                 else:
                     produto.quantidade -= quantidade
 
-                produto.save()
+                # A nova versão invalida edições abertas antes da movimentação
+                produto.versao += 1
+                produto.save(update_fields=['quantidade', 'versao'])
 
                 Movimentacao.objects.create(
                     usuario=request.user,
@@ -123,6 +139,7 @@ class RegistrarMovimentacaoView(LoginRequiredMixin, View):
                     tipo=tipo,
                     quantidade=quantidade
                 )
+                registrar_evento(produto, 'movimentacao')
             messages.success(request, 'Movimentação registrada com sucesso!')
             return redirect('listar_movimentacao')
 
@@ -136,7 +153,7 @@ class RegistrarMovimentacaoView(LoginRequiredMixin, View):
             return redirect('listar_movimentacao')
 
 
-class ListarEstoqueView(LoginRequiredMixin, View):
+class ListarEstoqueView(LoginRequiredMixin, LeituraReplicaMixin, View):
     """
          View responsável por listar todos os produtos disponíveis no estoque.
 
@@ -168,7 +185,7 @@ class ListarEstoqueView(LoginRequiredMixin, View):
 
         return render(request, "estoque/listar.html", {"produtos": produtos})
 
-class BuscarProdutosView(LoginRequiredMixin, View):
+class BuscarProdutosView(LoginRequiredMixin, LeituraReplicaMixin, View):
     """
         View responsável por realizar a busca de produtos no estoque.
 
@@ -245,7 +262,237 @@ class DetalheProdutoView(LoginRequiredMixin, View):
         })
 
 
-class CriarProdutoView(LoginRequiredMixin, View):
+class ListarEstoqueAsyncView(LoginRequiredAsyncMixin, LeituraReplicaMixin, View):
+    """
+        Versão assíncrona de ``ListarEstoqueView`` para o deploy ASGI (``VIEWS_ASSINCRONAS``).
+
+        Métodos:
+            get: Exibe a lista de produtos cadastrados.
+    """
+    async def get(self, request: HttpRequest) -> HttpResponse:
+        """
+            Carrega os produtos com o ORM assíncrono e renderiza a listagem.
+
+            Args:
+                request (django.http.HttpRequest): Objeto da requisição HTTP.
+
+            Returns:
+                django.http.HttpResponse: Página HTML com a lista de produtos.
+        """
+        try:
+            produtos = [produto async for produto in Produto.objects.all()]
+
+        except DatabaseError:
+            messages.error(request, "Erro de banco de dados ao carregar produtos.")
+            produtos = []
+
+        except Exception as e:
+            messages.error(request, f"Erro ao carregar produtos: {str(e)}")
+            await sync_to_async(registrar_log)(request.user, "Listar Produtos", "ERROR",
+                                               f"Erro ao listar produtos: {str(e)}")
+            produtos = []
+
+        return await arender(request, "estoque/listar.html", {"produtos": produtos})
+
+
+class BuscarProdutosAsyncView(LoginRequiredAsyncMixin, LeituraReplicaMixin, View):
+    """
+        Versão assíncrona de ``BuscarProdutosView`` para o deploy ASGI (``VIEWS_ASSINCRONAS``).
+
+        Métodos:
+            get: Filtra os produtos pelo nome informado na busca.
+    """
+    async def get(self, request: HttpRequest) -> HttpResponse:
+        """
+            Busca produtos com base no termo informado pelo usuário.
+
+            Args:
+                request (django.http.HttpRequest): Objeto da requisição HTTP.
+
+            Returns:
+                django.http.HttpResponse: Página HTML com os resultados da busca.
+        """
+        termo = request.GET.get('q', '').strip()
+
+        try:
+            produtos = [produto async for produto in Produto.objects.filter(nome__icontains=termo)] if termo else []
+
+        except Exception as e:
+            messages.error(request, f"Erro ao buscar produtos: {str(e)}")
+            await sync_to_async(registrar_log)(request.user, "Buscar Produtos", "ERROR",
+                                               f"Erro ao buscar produtos: {str(e)}")
+            produtos = []
+
+        return await arender(request, 'estoque/listar.html', {'produtos': produtos, 'termo': termo})
+
+
+class DetalheProdutoAsyncView(LoginRequiredAsyncMixin, LeituraReplicaMixin, View):
+    """
+        Versão assíncrona de ``DetalheProdutoView`` para o deploy ASGI (``VIEWS_ASSINCRONAS``).
+
+        Métodos:
+            get: Exibe as informações e movimentações do produto selecionado.
+    """
+    async def get(self, request: HttpRequest, produto_id: int) -> HttpResponse:
+        """
+            Exibe os detalhes, o total de entradas e saídas e o saldo do produto.
+
+            Os totais são calculados em uma única agregação condicional.
+
+            Args:
+                request (django.http.HttpRequest): Objeto da requisição HTTP.
+                produto_id (int): ID do produto a ser detalhado.
+
+            Returns:
+                django.http.HttpResponse: Página HTML com os detalhes do produto.
+        """
+        try:
+            produto = await aget_object_or_404(Produto, id=produto_id)
+            totais = await Movimentacao.objects.filter(produto=produto).aaggregate(
+                entradas=Sum('quantidade', filter=Q(tipo='entrada')),
+                saidas=Sum('quantidade', filter=Q(tipo='saida')),
+            )
+
+        except Exception as e:
+            messages.error(request, f"Erro ao carregar detalhes do produto: {str(e)}")
+            await sync_to_async(registrar_log)(request.user, "Detalhes Produto", "ERROR",
+                                               f"Erro ao carregar detalhes do produto: {str(e)}")
+            return redirect('listar_estoque')
+
+        return await arender(request, 'estoque/detalhe_produto.html', {
+            'produto': produto,
+            'entradas': totais['entradas'] or 0,
+            'saidas': totais['saidas'] or 0,
+            'saldo': produto.quantidade
+        })
+
+
+class AutocompleteProdutosView(LoginRequiredAsyncMixin, LeituraReplicaMixin, View):
+    """
+        View assíncrona que sugere produtos pelo início do nome (campo de busca).
+
+        Métodos:
+            get: Retorna em JSON até ``LIMITE`` produtos cujo nome começa com ``q``.
+    """
+    LIMITE = 10
+
+    async def get(self, request: HttpRequest) -> JsonResponse:
+        """
+            Busca produtos cujo nome começa com o termo informado.
+
+            Args:
+                request (django.http.HttpRequest): Objeto da requisição HTTP.
+
+            Returns:
+                django.http.JsonResponse: ``{"produtos": [{"id", "nome", "quantidade"}, ...]}``.
+        """
+        termo = request.GET.get('q', '').strip()
+        if not termo:
+            return JsonResponse({'produtos': []})
+
+        produtos = [
+            produto async for produto in Produto.objects.filter(nome__istartswith=termo)
+            .order_by('nome').values('id', 'nome', 'quantidade')[:self.LIMITE]
+        ]
+        return JsonResponse({'produtos': produtos})
+
+
+class EventosEstoqueView(View):
+    """
+        Rota dos eventos de estoque por Server-Sent Events.
+
+        No deploy ASGI o fluxo é atendido por ``estoque.asgi.EventosEstoqueASGI``,
+        montada em ``project/asgi.py`` antes do Django, e não chega a esta view.
+        No WSGI cada conexão ocuparia uma thread, então a view responde 204, que
+        faz o navegador desistir de reconectar.
+
+        Métodos:
+            get: Responde 204.
+    """
+    def get(self, request: HttpRequest) -> HttpResponse:
+        """
+            Recusa o fluxo de eventos fora do deploy ASGI.
+
+            Args:
+                request (django.http.HttpRequest): Objeto da requisição HTTP.
+
+            Returns:
+                django.http.HttpResponse: Resposta vazia com status 204.
+        """
+        return HttpResponse(status=204)
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class FeedEstoqueView(View):
+    """
+        Feed de alterações de estoque para integrações (ex: ERP), autenticado por token.
+
+        O consumidor envia ``Authorization: Bearer <token>`` (gerado por
+        ``python manage.py consumidor_feed <nome>``) e lê os eventos em lotes
+        ordenados pelo id, que funciona como número de sequência.
+
+        Métodos:
+            get: Retorna os eventos posteriores ao cursor.
+            post: Confirma o processamento até um cursor.
+    """
+    LIMITE_MAXIMO = 5000
+
+    def dispatch(self, request: HttpRequest, *args, **kwargs) -> HttpResponse:
+        self.consumidor = autenticar_consumidor(request)
+        if self.consumidor is None:
+            return JsonResponse({'erro': 'Token inválido.'}, status=401)
+        return super().dispatch(request, *args, **kwargs)
+
+    def get(self, request: HttpRequest) -> JsonResponse:
+        """
+            Retorna até ``limite`` eventos com id maior que ``apos``.
+
+            Sem ``apos`` a leitura parte do último cursor confirmado pelo consumidor.
+
+            Args:
+                request (django.http.HttpRequest): Objeto da requisição HTTP.
+
+            Returns:
+                django.http.JsonResponse: ``{"eventos": [...], "cursor": <último id do lote>}``.
+        """
+        apos = request.GET.get('apos', '')
+        limite = request.GET.get('limite', '')
+        if (apos and not apos.isdigit()) or (limite and not limite.isdigit()):
+            return JsonResponse({'erro': "Parâmetros 'apos' e 'limite' devem ser inteiros."}, status=400)
+
+        cursor = int(apos) if apos else self.consumidor.cursor
+        limite = min(int(limite), self.LIMITE_MAXIMO) if limite else 500
+
+        eventos = [
+            {'id': evento_id, 'produto_id': produto_id, 'quantidade': quantidade, 'tipo': tipo, 'criado_em': criado_em}
+            for evento_id, produto_id, quantidade, tipo, criado_em in eventos_apos(cursor, limite)
+        ]
+        return JsonResponse({'eventos': eventos, 'cursor': eventos[-1]['id'] if eventos else cursor})
+
+    def post(self, request: HttpRequest) -> JsonResponse:
+        """
+            Confirma que o consumidor processou os eventos até ``cursor``.
+
+            Eventos confirmados por todos os consumidores são removidos pelo comando ``compactar_feed``.
+
+            Args:
+                request (django.http.HttpRequest): Objeto da requisição HTTP.
+
+            Returns:
+                django.http.JsonResponse: ``{"cursor": <cursor confirmado>}``.
+        """
+        cursor = request.POST.get('cursor', '').strip()
+        if not cursor.isdigit():
+            return JsonResponse({'erro': "Informe o 'cursor' confirmado."}, status=400)
+
+        ultimo = EventoEstoque.objects.order_by('-id').values_list('id', flat=True).first() or 0
+        if int(cursor) > ultimo:
+            return JsonResponse({'erro': 'Cursor posterior ao último evento.'}, status=400)
+
+        return JsonResponse({'cursor': confirmar_cursor(self.consumidor, int(cursor))})
+
+
+class CriarProdutoView(LoginRequiredMixin, PermissaoRequeridaMixin, View):
     """
         View responsável pela criação de novos produtos no sistema.
 
@@ -253,6 +500,9 @@ class CriarProdutoView(LoginRequiredMixin, View):
             get: Exibe o formulário de criação de produto.
             post: Processa e salva o novo produto no banco de dados.
     """
+    permissao_requerida = "estoque.add_produto"
+    mensagem_sem_permissao = "Você não tem permissão para criar produtos."
+    url_sem_permissao = 'listar_estoque'
 
     def get(self, request: HttpRequest) -> HttpResponse:
         """
@@ -301,6 +551,10 @@ class CriarProdutoView(LoginRequiredMixin, View):
                     datasheet=datasheet
                 )
                 produto.save()
+                registrar_evento(produto, 'criacao')
+                if imagem:
+                    # Redimensionamento fora da requisição, pelo worker de tarefas
+                    enfileirar(otimizar_imagem_produto, produto_id=produto.id)
                 messages.success(request, "Produto criado com sucesso!")
             return redirect("listar_estoque")
 
@@ -318,7 +572,7 @@ class CriarProdutoView(LoginRequiredMixin, View):
             return redirect("criar_produto")
 
 
-class EditarProdutoView(LoginRequiredMixin, View):
+class EditarProdutoView(LoginRequiredMixin, PermissaoRequeridaMixin, View):
     """
         View responsável por editar produtos existentes no estoque.
 
@@ -326,6 +580,10 @@ class EditarProdutoView(LoginRequiredMixin, View):
             get: Exibe o formulário com os dados do produto.
             post: Atualiza o produto no banco de dados.
     """
+    permissao_requerida = "estoque.change_produto"
+    mensagem_sem_permissao = "Você não tem permissão para editar produtos."
+    url_sem_permissao = 'listar_estoque'
+
     def get(self, request: HttpRequest, produto_id: int) -> HttpResponse:
         """
             Exibe o formulário preenchido com os dados do produto selecionado.
@@ -343,11 +601,17 @@ class EditarProdutoView(LoginRequiredMixin, View):
     def post(self, request: HttpRequest, produto_id: int) -> HttpResponse:
         """
             Atualiza os dados do produto após validação.
+
+            A atualização é condicional à ``versao`` exibida no formulário: se o
+            produto mudou desde então (outra edição ou uma movimentação), nada é
+            gravado e o usuário recarrega os dados atuais. Apenas os campos
+            alterados são gravados, sem bloquear o produto.
         """
         nome = request.POST.get("nome")
-        descricao = request.POST.get("descricao")
+        descricao = request.POST.get("descricao", "").strip()
         quantidade_str = request.POST.get("quantidade", "").strip()
-        localizacao = request.POST.get("localizacao")
+        localizacao = request.POST.get("localizacao", "").strip()
+        versao_str = request.POST.get("versao", "").strip()
 
         try:
             quantidade = int(quantidade_str)
@@ -357,22 +621,48 @@ class EditarProdutoView(LoginRequiredMixin, View):
         if not validar_produto(request, nome, localizacao, quantidade):
             return redirect("editar_produto", produto_id=produto_id)
 
+        if not versao_str.isdigit():
+            messages.error(request, "Formulário desatualizado. Recarregue a página e tente novamente.")
+            return redirect("editar_produto", produto_id=produto_id)
+
+        conflito = "O produto foi alterado por outro usuário ou movimentação. Confira os dados atuais e edite novamente."
+
         try:
             with transaction.atomic():
                 produto = get_object_or_404(Produto, id=produto_id)
+                if produto.versao != int(versao_str):
+                    messages.error(request, conflito)
+                    return redirect("editar_produto", produto_id=produto_id)
+
+                novos = {"nome": nome, "descricao": descricao, "localizacao": localizacao, "quantidade": quantidade}
+                # Nos campos de texto opcionais, vazio no formulário equivale a NULL no banco
+                campos = {
+                    campo: valor for campo, valor in novos.items()
+                    if getattr(produto, campo) != valor and {getattr(produto, campo), valor} != {None, ""}
+                }
+
+                for campo in ("imagem", "datasheet"):
+                    if request.FILES.get(campo):
+                        arquivo = getattr(produto, campo)
+                        arquivo.save(request.FILES[campo].name, request.FILES[campo], save=False)
+                        campos[campo] = arquivo.name
+
+                if campos:
+                    # UPDATE ... WHERE versao = <lida>: falha se outra escrita confirmou antes desta
+                    if not Produto.objects.filter(id=produto_id, versao=produto.versao).update(**campos, versao=F("versao") + 1):
+                        for campo in ("imagem", "datasheet"):
+                            if campo in campos:
+                                getattr(produto, campo).delete(save=False)
+                        messages.error(request, conflito)
+                        return redirect("editar_produto", produto_id=produto_id)
+
+                    for campo, valor in campos.items():
+                        setattr(produto, campo, valor)
+                    produto.versao += 1
+                    registrar_evento(produto, 'edicao')
+                    if "imagem" in campos:
+                        enfileirar(otimizar_imagem_produto, produto_id=produto.id)
 
-                produto.nome = nome
-                produto.descricao = descricao
-                produto.localizacao = localizacao
-                produto.quantidade = quantidade
-
-                if request.FILES.get("imagem"):
-                    produto.imagem = request.FILES.get("imagem")
-
-                if request.FILES.get("datasheet"):
-                    produto.datasheet = request.FILES.get("datasheet")
-
-                produto.save()
                 messages.success(request, "Produto atualizado com sucesso!")
             return redirect("listar_estoque")
 
@@ -391,7 +681,7 @@ class EditarProdutoView(LoginRequiredMixin, View):
             return redirect('editar_produto', produto_id=produto_id)
 
 
-class DeletarProdutoView(LoginRequiredMixin, View):
+class DeletarProdutoView(LoginRequiredMixin, PermissaoRequeridaMixin, View):
     """
         View responsável por excluir produtos do sistema.
 
@@ -399,6 +689,10 @@ class DeletarProdutoView(LoginRequiredMixin, View):
             get: Exibe a página de confirmação de exclusão.
             post: Exclui o produto do banco de dados.
     """
+    permissao_requerida = "estoque.delete_produto"
+    mensagem_sem_permissao = "Você não tem permissão para excluir produtos."
+    url_sem_permissao = 'listar_estoque'
+
     def get(self, request: HttpRequest, produto_id: int) -> HttpResponse:
         """
             Exibe a página de confirmação para exclusão de um produto.
@@ -436,9 +730,12 @@ class DeletarProdutoView(LoginRequiredMixin, View):
                 django.http.HttpResponse: Redireciona para a listagem após exclusão.
         """
         try:
-            produto = Produto.objects.get(id=produto_id)
-            nome= produto.nome
-            produto.delete()
+            with transaction.atomic():
+                produto = Produto.objects.get(id=produto_id)
+                nome= produto.nome
+                produto.quantidade = 0
+                registrar_evento(produto, 'exclusao')
+                produto.delete()
             messages.success(request, "Produto deletado com sucesso!")
             return redirect('listar_estoque')
 
@@ -452,3 +749,194 @@ class DeletarProdutoView(LoginRequiredMixin, View):
                           f"Erro ao deletar produto {produto_id}: {str(e)}")
             return redirect('listar_estoque')
 
+
+class ListarInventariosView(LoginRequiredMixin, PermissaoRequeridaMixin, View):
+    """
+        View responsável por listar e abrir sessões de inventário (contagem física).
+
+        Métodos:
+            get: Lista as sessões com a quantidade de itens contados.
+            post: Abre uma nova sessão.
+    """
+    permissao_requerida = {"GET": "estoque.view_inventario", "POST": "estoque.add_inventario"}
+    mensagem_sem_permissao = "Você não tem permissão para acessar os inventários."
+    url_sem_permissao = 'listar_estoque'
+
+    def get(self, request: HttpRequest) -> HttpResponse:
+        """
+            Exibe as sessões de inventário, das mais recentes para as mais antigas.
+
+            Args:
+                request (django.http.HttpRequest): Objeto da requisição HTTP.
+
+            Returns:
+                django.http.HttpResponse: Página HTML com a lista de sessões.
+        """
+        try:
+            inventarios = Inventario.objects.select_related('usuario').annotate(itens_contados=Count('itens')).order_by('-id')
+
+        except Exception as e:
+            messages.error(request, f"Erro ao carregar inventários: {str(e)}")
+            registrar_log(request.user, "Listar Inventários", "ERROR", f"Erro ao listar inventários: {str(e)}")
+            inventarios = []
+
+        return render(request, 'inventarios/listar.html', {'inventarios': inventarios})
+
+    def post(self, request: HttpRequest) -> HttpResponse:
+        """
+            Abre uma sessão de inventário e redireciona para a tela de contagem.
+
+            Args:
+                request (django.http.HttpRequest): Objeto da requisição HTTP.
+
+            Returns:
+                django.http.HttpResponse: Redireciona para o detalhe da nova sessão.
+        """
+        try:
+            inventario = Inventario.objects.create(usuario=request.user, descricao=request.POST.get('descricao', '').strip()[:100])
+            return redirect('detalhe_inventario', inventario_id=inventario.id)
+
+        except Exception as e:
+            messages.error(request, f"Erro ao abrir inventário: {str(e)}")
+            registrar_log(request.user, "Abrir Inventário", "ERROR", f"Erro ao abrir inventário: {str(e)}")
+            return redirect('listar_inventarios')
+
+
+class DetalheInventarioView(LoginRequiredMixin, PermissaoRequeridaMixin, View):
+    """
+        View responsável por exibir uma sessão de inventário e suas diferenças.
+
+        Métodos:
+            get: Exibe o resumo, as primeiras diferenças e os formulários de contagem.
+    """
+    permissao_requerida = "estoque.view_inventario"
+    mensagem_sem_permissao = "Você não tem permissão para acessar os inventários."
+    url_sem_permissao = 'listar_estoque'
+
+    LIMITE_DIFERENCAS = 500
+
+    def get(self, request: HttpRequest, inventario_id: int) -> HttpResponse:
+        """
+            Exibe os totais da sessão e até ``LIMITE_DIFERENCAS`` itens divergentes.
+
+            Args:
+                request (django.http.HttpRequest): Objeto da requisição HTTP.
+                inventario_id (int): ID da sessão de inventário.
+
+            Returns:
+                django.http.HttpResponse: Página HTML com as diferenças da contagem.
+        """
+        try:
+            inventario = get_object_or_404(Inventario, id=inventario_id)
+            resumo = resumo_diferencas(inventario)
+            itens = list(diferencas(inventario)[:self.LIMITE_DIFERENCAS])
+
+        except Exception as e:
+            messages.error(request, f"Erro ao carregar inventário: {str(e)}")
+            registrar_log(request.user, "Detalhe Inventário", "ERROR", f"Erro ao carregar inventário {inventario_id}: {str(e)}")
+            return redirect('listar_inventarios')
+
+        return render(request, 'inventarios/detalhe.html', {
+            'inventario': inventario,
+            'resumo': resumo,
+            'diferencas': itens,
+            'limite': self.LIMITE_DIFERENCAS,
+        })
+
+
+class ContarInventarioView(LoginRequiredMixin, PermissaoRequeridaMixin, View):
+    """
+        View responsável por receber as contagens de uma sessão de inventário.
+
+        Aceita um arquivo CSV (``produto_id,quantidade``) ou os códigos lidos por um
+        scanner (um ``produto_id`` por linha, uma unidade por leitura).
+
+        Métodos:
+            post: Grava as contagens em lotes.
+    """
+    permissao_requerida = "estoque.change_inventario"
+    mensagem_sem_permissao = "Você não tem permissão para registrar contagens."
+    url_sem_permissao = 'listar_estoque'
+
+    def post(self, request: HttpRequest, inventario_id: int) -> HttpResponse:
+        """
+            Grava as contagens enviadas na sessão.
+
+            Args:
+                request (django.http.HttpRequest): Objeto da requisição HTTP.
+                inventario_id (int): ID da sessão de inventário.
+
+            Returns:
+                django.http.HttpResponse: Redireciona para o detalhe da sessão.
+        """
+        inventario = get_object_or_404(Inventario, id=inventario_id)
+        arquivo = request.FILES.get('arquivo')
+        codigos = request.POST.get('codigos', '')
+        substituir = request.POST.get('modo') == 'substituir'
+
+        if arquivo is None and not codigos.strip():
+            messages.error(request, "Envie um arquivo CSV ou os códigos lidos.")
+            return redirect('detalhe_inventario', inventario_id=inventario_id)
+
+        try:
+            linhas = ler_linhas(arquivo.file) if arquivo else codigos.splitlines()
+            resultado = registrar_contagens(inventario, linhas, substituir)
+
+        except InventarioFechado as e:
+            messages.error(request, str(e))
+            return redirect('detalhe_inventario', inventario_id=inventario_id)
+
+        except Exception as e:
+            messages.error(request, f"Erro ao registrar contagem: {str(e)}")
+            registrar_log(request.user, "Contar Inventário", "ERROR", f"Erro ao registrar contagem do inventário {inventario_id}: {str(e)}")
+            return redirect('detalhe_inventario', inventario_id=inventario_id)
+
+        messages.success(request, f"{resultado['lidas']} linha(s) lida(s), {resultado['gravadas']} produto(s) atualizado(s).")
+        if resultado['invalidas'] or resultado['desconhecidas']:
+            messages.error(request, f"{resultado['invalidas']} linha(s) inválida(s) e "
+                                    f"{resultado['desconhecidas']} produto(s) inexistente(s) ignorados.")
+        return redirect('detalhe_inventario', inventario_id=inventario_id)
+
+
+class AplicarInventarioView(LoginRequiredMixin, PermissaoRequeridaMixin, View):
+    """
+        View responsável por aplicar as diferenças de uma sessão de inventário ao estoque.
+
+        Métodos:
+            post: Grava as movimentações de ajuste e fecha a sessão.
+    """
+    permissao_requerida = "estoque.change_inventario"
+    mensagem_sem_permissao = "Você não tem permissão para aplicar inventários."
+    url_sem_permissao = 'listar_estoque'
+
+    def post(self, request: HttpRequest, inventario_id: int) -> HttpResponse:
+        """
+            Aplica as diferenças contadas e fecha a sessão.
+
+            Args:
+                request (django.http.HttpRequest): Objeto da requisição HTTP.
+                inventario_id (int): ID da sessão de inventário.
+
+            Returns:
+                django.http.HttpResponse: Redireciona para a lista de inventários.
+        """
+        inventario = get_object_or_404(Inventario, id=inventario_id)
+
+        try:
+            if request.POST.get('acao') == 'cancelar':
+                if not Inventario.objects.filter(id=inventario.id, status='aberto').update(status='cancelado'):
+                    raise InventarioFechado(f"O inventário #{inventario.id} não está aberto.")
+                messages.success(request, "Inventário cancelado.")
+            else:
+                ajustados = aplicar_inventario(inventario, request.user)
+                messages.success(request, f"Inventário aplicado: {ajustados} produto(s) ajustado(s).")
+            return redirect('listar_inventarios')
+
+        except InventarioFechado as e:
+            messages.error(request, str(e))
+            return redirect('detalhe_inventario', inventario_id=inventario_id)
+
+        except Exception as e:
+            messages.error(request, f"Erro ao aplicar inventário: {str(e)}")
+            registrar_log(request.user, "Aplicar Inventário", "ERROR", f"Erro ao aplicar inventário {inventario_id}: {str(e)}")
+            return redirect('detalhe_inventario', inventario_id=inventario_id)
@@ -7,6 +7,10 @@ import sys
 def main():
     """Run administrative tasks."""
     os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'project.settings')
+    if sys.argv[1:2] == ['aquecer']:
+        # Mede também os módulos importados pelo django.setup(), como em project/wsgi.py
+        from core.importacoes import medidor
+        medidor.instalar()
     try:
         from django.core.management import execute_from_command_line
     except ImportError as exc:
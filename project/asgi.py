@@ -8,9 +8,29 @@ https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
 
 import os
+import time
 
-from django.core.asgi import get_asgi_application
+# Início da carga da aplicação, para o tempo de inicialização reportado pelo aquecimento
+INICIO = time.perf_counter()
+
+# Mede a importação dos módulos carregados pelo django.setup() (models, admin, apps.ready)
+from core.importacoes import medidor  # noqa: E402
+
+medidor.instalar()
+
+from django.core.asgi import get_asgi_application  # noqa: E402
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'project.settings')
 
 application = get_asgi_application()
+medidor.remover()
+
+# Fluxo SSE de /estoque/eventos/ atendido antes do Django, sem uma thread por cliente conectado
+from estoque.asgi import EventosEstoqueASGI  # noqa: E402
+
+application = EventosEstoqueASGI(application)
+
+# Carrega rotas, templates, conexões e caches antes da primeira requisição (AQUECIMENTO)
+from core.aquecimento import aquecer_na_inicializacao  # noqa: E402
+
+aquecer_na_inicializacao(INICIO)
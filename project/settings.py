@@ -10,10 +10,11 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 import os
+import sys
+import tempfile
 from pathlib import Path
 
 from decouple import config, Csv
-from django.db.models.functions import Cast
 from dotenv import load_dotenv
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -29,6 +30,11 @@ SECRET_KEY = config("SECRET_KEY")
 # SECURITY WARNING: don't run with debug turned on in production!
 DEBUG = config("DEBUG", default=True, cast=bool)
 
+# Indica execução da suíte de testes: "python manage.py test", pytest (pytest-django) ou
+# qualquer outro runner que defina TESTING=True no ambiente
+TESTING = config("TESTING", default=(len(sys.argv) > 1 and sys.argv[1] == "test") or "pytest" in sys.modules,
+                 cast=bool)
+
 ALLOWED_HOSTS = config("AlLOWED_HOSTS", cast=Csv())
 
 # Application definition
@@ -46,6 +52,10 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.MetricasMiddleware',
+    'core.middleware.ConsultasLentasMiddleware',
+    'core.middleware.NMaisUmMiddleware',
+    'core.middleware.LeituraAposEscritaMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -53,27 +63,42 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'core.middleware.ProfilingMiddleware',
 ]
 
-ROOT_URLCONF = 'project.urls'
+# Templates compilados uma vez por processo (loader em cache), independente do DEBUG;
+# desative (TEMPLATES_CACHE=False) para recarregar os templates a cada requisição ao editá-los
+TEMPLATES_CACHE = config("TEMPLATES_CACHE", default=True, cast=bool)
+TEMPLATES_LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # DjangoTemplates com a duração de cada renderização nas métricas (template_renderizacao_seconds)
+        'BACKEND': 'core.renderizacao.TemplatesMedidos',
+        'NAME': 'django',
         'DIRS': [os.path.join(BASE_DIR, 'templates')],
-        'APP_DIRS': True,
         'OPTIONS': {
             'context_processors': [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
             ],
+            'loaders': [('django.template.loaders.cached.Loader', TEMPLATES_LOADERS)] if TEMPLATES_CACHE
+            else TEMPLATES_LOADERS,
         },
     },
 ]
 
 WSGI_APPLICATION = 'project.wsgi.application'
 
+# Usa as views assíncronas nas leituras de estoque (deploy ASGI, ex: uvicorn project.asgi:application)
+VIEWS_ASSINCRONAS = config("VIEWS_ASSINCRONAS", default=False, cast=bool)
+# As duas versões das leituras têm rotas separadas: project/urls_assincronas.py no deploy ASGI
+ROOT_URLCONF = 'project.urls_assincronas' if VIEWS_ASSINCRONAS else 'project.urls'
+
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
@@ -85,8 +110,103 @@ DATABASES = {
         'PASSWORD': os.getenv('DB_PASSWORD'),
         'HOST': os.getenv('DB_HOST'),
         'PORT': os.getenv('DB_PORT'),
+        # Segundos que uma conexão fica aberta entre requisições (0 = nova conexão por requisição)
+        'CONN_MAX_AGE': config("DB_CONN_MAX_AGE", default=0, cast=int),
+        # Valida conexões persistentes antes de reutilizá-las em uma nova requisição
+        'CONN_HEALTH_CHECKS': config("DB_CONN_HEALTH_CHECKS", default=True, cast=bool),
+        'OPTIONS': {},
+    }
+}
+
+# Pool de conexões do psycopg 3 (PostgreSQL), por processo/worker
+# Requer os pacotes "psycopg[pool]"; substitui CONN_MAX_AGE, que deve ser 0 com o pool ativo
+DB_POOL = config("DB_POOL", default=False, cast=bool)
+if DB_POOL and 'postgresql' in (DATABASES['default']['ENGINE'] or ''):
+    DATABASES['default']['CONN_MAX_AGE'] = 0
+    DATABASES['default']['OPTIONS']['pool'] = {
+        'min_size': config("DB_POOL_MIN", default=2, cast=int),
+        'max_size': config("DB_POOL_MAX", default=10, cast=int),
+        # Segundos aguardando uma conexão livre antes de falhar
+        'timeout': config("DB_POOL_TIMEOUT", default=10, cast=float),
+        # Segundos até uma conexão ociosa acima de min_size ser fechada
+        'max_idle': config("DB_POOL_MAX_IDLE", default=300, cast=float),
+    }
+
+# Outbox de eventos de estoque
+# Intervalo (segundos) entre as leituras do outbox pelo difusor SSE de cada processo
+SSE_INTERVALO = config("SSE_INTERVALO", default=1, cast=float)
+# Eventos recentes mantidos em memória para os clientes SSE
+SSE_BUFFER = config("SSE_BUFFER", default=1000, cast=int)
+# Segundos sem eventos até o envio de um comentário de keep-alive
+SSE_KEEPALIVE = config("SSE_KEEPALIVE", default=15, cast=float)
+
+# Réplicas de leitura
+# Lista separada por vírgulas com o host de cada réplica (PostgreSQL) ou o caminho do arquivo (SQLite)
+DB_REPLICAS = config("DB_REPLICAS", default="", cast=Csv())
+for indice, replica in enumerate(DB_REPLICAS):
+    DATABASES[f'replica_{indice}'] = {
+        **DATABASES['default'],
+        'NAME' if 'sqlite' in (DATABASES['default']['ENGINE'] or '') else 'HOST': replica,
+        'OPTIONS': dict(DATABASES['default']['OPTIONS']),
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['core.replicas.RoteadorReplicas']
+
+# Segundos em que a sessão lê do primário após escrever (read-your-writes)
+REPLICA_JANELA_ESCRITA = config("REPLICA_JANELA_ESCRITA", default=5, cast=int)
+# Atraso máximo (segundos) tolerado antes de voltar a ler do primário
+REPLICA_ATRASO_MAXIMO = config("REPLICA_ATRASO_MAXIMO", default=10, cast=float)
+# Intervalo (segundos) entre verificações do atraso de cada réplica
+REPLICA_INTERVALO_VERIFICACAO = config("REPLICA_INTERVALO_VERIFICACAO", default=5, cast=float)
+
+# Cache compartilhado entre os workers (limite de tentativas de login)
+# Em produção use um backend compartilhado, ex: "django.core.cache.backends.redis.RedisCache"
+# (requer o pacote "redis") com CACHE_LOCATION="redis://127.0.0.1:6379/1"
+CACHES = {
+    'default': {
+        'BACKEND': config("CACHE_BACKEND", default="django.core.cache.backends.locmem.LocMemCache"),
+        'LOCATION': config("CACHE_LOCATION", default=""),
     }
 }
+# Aceita o cache local de cada processo (locmem) no "check --deploy", apenas com um único processo:
+# com vários workers as invalidações do cache de permissões não chegariam aos demais e o limite de
+# tentativas de login valeria por worker
+CACHE_LOCAL_PERMITIDO = config("CACHE_LOCAL_PERMITIDO", default=DEBUG or TESTING, cast=bool)
+
+# Autenticação com o conjunto de permissões de cada usuário resolvido uma vez e guardado no cache
+# (invalidado ao alterar grupos/permissões); os perfis são criados pelo comando "sincronizar_perfis".
+# Requer um cache compartilhado (CACHE_BACKEND) com vários workers, verificado pelo "check --deploy"
+AUTHENTICATION_BACKENDS = ["core.permissoes.BackendPermissoes"]
+# Segundos de validade das permissões em cache
+PERMISSOES_CACHE_TEMPO = config("PERMISSOES_CACHE_TEMPO", default=3600, cast=int)
+
+# Aquecimento do worker ao carregar a aplicação (project/wsgi.py e project/asgi.py):
+# importa os módulos, resolve as rotas, compila os templates e abre conexões e caches
+AQUECIMENTO = config("AQUECIMENTO", default=True, cast=bool)
+# Aplicação carregada no processo mestre antes do fork (ex: gunicorn --preload):
+# o mestre não abre conexões e cada worker as abre logo após o fork
+AQUECIMENTO_PRELOAD = config("AQUECIMENTO_PRELOAD", default=False, cast=bool)
+
+# Sessões e mensagens
+# "cached_db" lê a sessão do cache (gravando também no banco) e "cache" não usa o banco;
+# ambos exigem um cache compartilhado entre os workers (CACHE_BACKEND), senão use "db"
+SESSION_ENGINE = config("SESSION_ENGINE", default="django.contrib.sessions.backends.db")
+# Mensagens em cookie assinado: exibir ou gravar uma mensagem não altera a sessão
+MESSAGE_STORAGE = config("MESSAGE_STORAGE", default="django.contrib.messages.storage.cookie.CookieStorage")
+
+# Limite de tentativas de login (janela deslizante por usuário e por IP, com contadores atômicos no cache)
+# Tentativas por usuário e senhas recusadas por IP permitidas em cada janela e duração da janela em segundos
+LOGIN_LIMITE_USUARIO = config("LOGIN_LIMITE_USUARIO", default=5, cast=int)
+LOGIN_LIMITE_IP = config("LOGIN_LIMITE_IP", default=20, cast=int)
+# IP do cliente atrás de proxies: chave do cabeçalho em request.META (ex: "HTTP_X_FORWARDED_FOR") e quantidade
+# de proxies confiáveis que o acrescentam; vazio usa REMOTE_ADDR
+LOGIN_IP_CABECALHO = config("LOGIN_IP_CABECALHO", default="")
+LOGIN_PROXIES = config("LOGIN_PROXIES", default=1, cast=int)
+LOGIN_JANELA = config("LOGIN_JANELA", default=300, cast=float)
+# Bloqueio ao exceder o limite: segundos, dobrando a cada novo bloqueio, até o máximo
+LOGIN_BLOQUEIO_BASE = config("LOGIN_BLOQUEIO_BASE", default=30, cast=float)
+LOGIN_BLOQUEIO_MAXIMO = config("LOGIN_BLOQUEIO_MAXIMO", default=3600, cast=float)
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -137,3 +257,43 @@ EMAIL_USE_TLS = True
 EMAIL_HOST_USER = os.getenv("EMAIL_HOST_USER")
 EMAIL_HOST_PASSWORD = os.getenv("EMAIL_HOST_PASSWORD")
 DEFAULT_FROM_EMAIL = EMAIL_HOST_USER
+
+# Fila de e-mails (comando "enviar_emails")
+# Tentativas antes de desistir, espera base (segundos, dobra a cada falha) e tempo máximo de espera
+EMAIL_FILA_TENTATIVAS = config("EMAIL_FILA_TENTATIVAS", default=5, cast=int)
+EMAIL_FILA_ESPERA_BASE = config("EMAIL_FILA_ESPERA_BASE", default=30, cast=float)
+EMAIL_FILA_ESPERA_MAXIMA = config("EMAIL_FILA_ESPERA_MAXIMA", default=3600, cast=float)
+# Máximo de e-mails aceitos por destinatário dentro da janela (segundos)
+EMAIL_LIMITE_DESTINATARIO = config("EMAIL_LIMITE_DESTINATARIO", default=5, cast=int)
+EMAIL_JANELA_LIMITE = config("EMAIL_JANELA_LIMITE", default=3600, cast=float)
+
+# Tarefas em segundo plano (comando "executar_tarefas")
+# Espera base (segundos, dobra a cada falha), duração da reserva de uma tarefa pelo worker
+# e tempo máximo de execução no pool (menor que a reserva, para o worker finalizar antes dela vencer)
+TAREFAS_ESPERA_BASE = config("TAREFAS_ESPERA_BASE", default=10, cast=float)
+TAREFAS_ARRENDAMENTO = config("TAREFAS_ARRENDAMENTO", default=600, cast=float)
+TAREFAS_TIMEOUT = config("TAREFAS_TIMEOUT", default=540, cast=float)
+
+# Métricas Prometheus
+# Diretório compartilhado entre os workers do gunicorn (vazio = apenas em memória)
+METRICS_DIR = config("METRICS_DIR", default="")
+METRICS_TOKEN = config("METRICS_TOKEN", default="")
+METRICS_FLUSH_SEGUNDOS = config("METRICS_FLUSH_SEGUNDOS", default=5, cast=float)
+
+# Captura de consultas lentas
+# Limite em milissegundos (0 desativa), tamanho do buffer circular e máximo de impressões digitais agregadas
+SLOW_QUERY_MS = config("SLOW_QUERY_MS", default=200, cast=float)
+SLOW_QUERY_BUFFER = config("SLOW_QUERY_BUFFER", default=200, cast=int)
+SLOW_QUERY_AGREGADOS = config("SLOW_QUERY_AGREGADOS", default=500, cast=int)
+
+# Profiling sob demanda
+# Diretório dos perfis salvos, quantidade mantida e validade (segundos) dos tokens gerados por "token_profiling"
+PROFILING_DIR = config("PROFILING_DIR", default=os.path.join(tempfile.gettempdir(), "sistema_profiles"))
+PROFILING_MAX_PERFIS = config("PROFILING_MAX_PERFIS", default=50, cast=int)
+PROFILING_TOKEN_MAX_AGE = config("PROFILING_TOKEN_MAX_AGE", default=3600, cast=int)
+
+# Detector de consultas N+1
+# Ativo em DEBUG e nos testes; nos testes a requisição falha ao detectar N+1
+N_MAIS_UM_DETECTOR = config("N_MAIS_UM_DETECTOR", default=DEBUG or TESTING, cast=bool)
+N_MAIS_UM_LEVANTAR = config("N_MAIS_UM_LEVANTAR", default=TESTING, cast=bool)
+N_MAIS_UM_LIMITE = config("N_MAIS_UM_LIMITE", default=5, cast=int)
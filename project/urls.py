@@ -14,8 +14,6 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
-from itertools import product
-
 from django.conf import settings
 from django.conf.urls.static import static
 from django.contrib import admin
@@ -0,0 +1,14 @@
+"""
+URLconf do deploy ASGI (``VIEWS_ASSINCRONAS=True``, ver ``ROOT_URLCONF``).
+
+As mesmas rotas de ``project.urls``, com as leituras do estoque pelas views assíncronas.
+"""
+from django.urls import path, include
+
+from estoque.urls import urlpatterns_assincronas
+from project.urls import urlpatterns as rotas_sincronas, handler404, handler500  # noqa: F401
+
+urlpatterns = [
+    path('estoque/', include(urlpatterns_assincronas)) if str(rota.pattern) == 'estoque/' else rota
+    for rota in rotas_sincronas
+]
@@ -8,9 +8,24 @@ https://docs.djangoproject.com/en/5.2/howto/deployment/wsgi/
 """
 
 import os
+import time
 
-from django.core.wsgi import get_wsgi_application
+# Início da carga da aplicação, para o tempo de inicialização reportado pelo aquecimento
+INICIO = time.perf_counter()
+
+# Mede a importação dos módulos carregados pelo django.setup() (models, admin, apps.ready)
+from core.importacoes import medidor  # noqa: E402
+
+medidor.instalar()
+
+from django.core.wsgi import get_wsgi_application  # noqa: E402
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'project.settings')
 
 application = get_wsgi_application()
+medidor.remover()
+
+# Carrega rotas, templates, conexões e caches antes da primeira requisição (AQUECIMENTO)
+from core.aquecimento import aquecer_na_inicializacao  # noqa: E402
+
+aquecer_na_inicializacao(INICIO)
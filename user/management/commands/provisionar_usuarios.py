@@ -0,0 +1,46 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from user.provisionamento import ler_linhas_csv, provisionar_usuarios, LOTE_INSERCAO
+
+
+class Command(BaseCommand):
+    """
+        Cria usuários em lote a partir de um CSV ``username,email[,senha]``.
+
+        Os hashes das senhas informadas são calculados em um pool de processos;
+        linhas sem senha recebem uma senha inutilizável e o convite com o link
+        para definir a senha (enviado pelo worker ``enviar_emails``).
+
+        Uso:
+            python manage.py provisionar_usuarios usuarios.csv --url-base https://gestao.exemplo.com --processos 8
+    """
+    help = "Cria usuários em lote (validação em uma consulta IN, hash em paralelo, bulk_create e convites)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("arquivo", help="CSV com as colunas username,email[,senha].")
+        parser.add_argument("--url-base", required=True, help="Endereço do sistema usado no link dos convites.")
+        parser.add_argument("--processos", type=int, default=0, help="Processos para o hash das senhas (0 = todos os núcleos).")
+        parser.add_argument("--lote", type=int, default=LOTE_INSERCAO, help="Usuários por INSERT.")
+        parser.add_argument("--sem-convite", action="store_true", help="Não enfileira os e-mails de convite.")
+
+    def handle(self, *args, **options):
+        try:
+            with open(options["arquivo"], "rb") as arquivo:
+                linhas = ler_linhas_csv(arquivo)
+        except OSError as erro:
+            raise CommandError(f"Não foi possível ler o arquivo: {erro}")
+
+        inicio = time.perf_counter()
+        resultado = provisionar_usuarios(
+            linhas, options["url_base"], processos=options["processos"], lote=options["lote"],
+            convidar=not options["sem_convite"],
+        )
+
+        for numero, motivo in resultado["erros"]:
+            self.stderr.write(f"Linha {numero}: {motivo}")
+        self.stdout.write(
+            f"Criados: {resultado['criados']} | Convites: {resultado['convites']} | "
+            f"Erros: {len(resultado['erros'])} | {time.perf_counter() - inicio:.1f}s"
+        )
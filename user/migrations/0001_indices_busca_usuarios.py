@@ -0,0 +1,38 @@
+from django.db import migrations
+
+# Índices de prefixo usados pela busca da listagem de usuários (``istartswith``).
+# PostgreSQL: o ``istartswith`` compara UPPER(coluna::text) com LIKE, que só usa
+# um índice sobre a mesma expressão com ``text_pattern_ops`` (fora da collation C).
+# SQLite: o LIKE sem diferenciar maiúsculas usa índices com collation NOCASE.
+INDICES = {
+    "postgresql": [
+        'CREATE INDEX IF NOT EXISTS auth_user_username_prefixo ON auth_user (UPPER("username"::text) text_pattern_ops)',
+        'CREATE INDEX IF NOT EXISTS auth_user_email_prefixo ON auth_user (UPPER("email"::text) text_pattern_ops)',
+    ],
+    "sqlite": [
+        'CREATE INDEX IF NOT EXISTS auth_user_username_prefixo ON auth_user ("username" COLLATE NOCASE)',
+        'CREATE INDEX IF NOT EXISTS auth_user_email_prefixo ON auth_user ("email" COLLATE NOCASE)',
+    ],
+}
+
+
+def criar_indices(apps, schema_editor):
+    for sql in INDICES.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(sql)
+
+
+def remover_indices(apps, schema_editor):
+    if schema_editor.connection.vendor in INDICES:
+        schema_editor.execute("DROP INDEX IF EXISTS auth_user_username_prefixo")
+        schema_editor.execute("DROP INDEX IF EXISTS auth_user_email_prefixo")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.RunPython(criar_indices, remover_indices),
+    ]
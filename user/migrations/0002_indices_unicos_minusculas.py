@@ -0,0 +1,44 @@
+from django.db import migrations
+from django.db.models import Count
+from django.db.models.functions import Lower
+
+# Unicidade sem diferenciar maiúsculas de username e e-mail (PostgreSQL e SQLite).
+# E-mails vazios ficam fora do índice: o campo é opcional no modelo de usuário do Django.
+INDICES = [
+    'CREATE UNIQUE INDEX IF NOT EXISTS auth_user_username_minusculo ON auth_user (LOWER("username"))',
+    'CREATE UNIQUE INDEX IF NOT EXISTS auth_user_email_minusculo ON auth_user (LOWER("email")) WHERE "email" > \'\'',
+]
+
+
+def criar_indices(apps, schema_editor):
+    User = apps.get_model("auth", "User")
+    for campo in ("username", "email"):
+        duplicados = list(
+            User.objects.exclude(**{campo: ""})
+            .values(minusculo=Lower(campo)).annotate(total=Count("id")).filter(total__gt=1)
+            .values_list("minusculo", flat=True)[:10]
+        )
+        if duplicados:
+            raise RuntimeError(
+                f"Há usuários com {campo} repetido (sem diferenciar maiúsculas): {', '.join(duplicados)}. "
+                "Corrija os cadastros antes de aplicar a migração."
+            )
+
+    for sql in INDICES:
+        schema_editor.execute(sql)
+
+
+def remover_indices(apps, schema_editor):
+    schema_editor.execute("DROP INDEX IF EXISTS auth_user_username_minusculo")
+    schema_editor.execute("DROP INDEX IF EXISTS auth_user_email_minusculo")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user', '0001_indices_busca_usuarios'),
+    ]
+
+    operations = [
+        migrations.RunPython(criar_indices, remover_indices),
+    ]
@@ -0,0 +1,183 @@
+import csv
+import io
+import multiprocessing
+import os
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.contrib.auth.tokens import default_token_generator
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import connections, transaction
+from django.db.models.functions import Lower
+from django.urls import reverse
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_encode
+
+from core.email_fila import enfileirar_emails
+
+# Valores por cláusula IN (abaixo do limite de parâmetros do SQLite)
+TAMANHO_IN = 900
+
+# Usuários gravados por INSERT
+LOTE_INSERCAO = 1000
+
+
+def ler_linhas_csv(arquivo) -> list[tuple[int, str, str, str]]:
+    """
+        Lê um CSV ``username,email[,senha]`` enviado (ou aberto em modo binário).
+
+        A primeira linha é ignorada se for um cabeçalho (começa com ``username``).
+
+        Returns:
+            list[tuple[int, str, str, str]]: (número da linha, username, email, senha) com campos sem espaços.
+    """
+    linhas = []
+    leitor = csv.reader(io.TextIOWrapper(arquivo, encoding="utf-8-sig", errors="replace"), delimiter=",")
+    for numero, campos in enumerate(leitor, start=1):
+        campos = [campo.strip() for campo in campos]
+        if not any(campos) or (numero == 1 and campos[0].lower() == "username"):
+            continue
+        campos += [""] * (3 - len(campos))
+        linhas.append((numero, campos[0], campos[1], campos[2]))
+    return linhas
+
+
+def _existentes(campo: str, valores: set) -> set:
+    """
+        Valores de ``campo`` (em minúsculas) já cadastrados, com uma consulta ``IN`` por fatia de ``TAMANHO_IN`` valores.
+
+        A comparação usa ``LOWER(campo)``, a expressão dos índices únicos da migração ``user.0002``.
+    """
+    ordenados = sorted(valores)
+    existentes = set()
+    usuarios = User.objects.alias(minusculo=Lower(campo)).filter(**{f"{campo}__gt": ""})
+    for inicio in range(0, len(ordenados), TAMANHO_IN):
+        fatia = ordenados[inicio:inicio + TAMANHO_IN]
+        existentes.update(usuarios.filter(minusculo__in=fatia).values_list(Lower(campo), flat=True))
+    return existentes
+
+
+def validar_lote(linhas: list[tuple[int, str, str, str]]) -> tuple[list, list]:
+    """
+        Valida todas as linhas do lote com as regras de ``validar_criacao_usuario`` e ``validar_senha``.
+
+        A duplicidade (sem diferenciar maiúsculas) com o banco é verificada para o lote inteiro (uma consulta
+        ``IN`` por campo e fatia), em vez de duas consultas ``exists()`` por
+        usuário; duplicidades dentro do próprio arquivo também são recusadas.
+
+        Returns:
+            tuple[list, list]: Linhas válidas e erros (número da linha, motivo).
+    """
+    usernames = {username.lower() for _, username, _, _ in linhas if username}
+    emails = {email.lower() for _, _, email, _ in linhas if email}
+    usernames_existentes = _existentes("username", usernames)
+    emails_existentes = _existentes("email", emails)
+
+    validas, erros = [], []
+    vistos_usernames, vistos_emails = set(), set()
+    for numero, username, email, senha in linhas:
+        if not username or not email:
+            motivo = "username e e-mail são obrigatórios"
+        elif username.lower() in usernames_existentes or username.lower() in vistos_usernames:
+            motivo = f"username '{username}' já existe"
+        elif email.lower() in emails_existentes or email.lower() in vistos_emails:
+            motivo = f"e-mail '{email}' já está em uso"
+        elif senha and len(senha) < 6:
+            motivo = "a senha deve ter pelo menos 6 caracteres"
+        else:
+            try:
+                validate_email(email)
+                motivo = None
+            except ValidationError:
+                motivo = f"e-mail '{email}' inválido"
+
+        if motivo:
+            erros.append((numero, motivo))
+            continue
+        vistos_usernames.add(username.lower())
+        vistos_emails.add(email.lower())
+        validas.append((numero, username, email, senha))
+    return validas, erros
+
+
+def hash_senhas(senhas: list[str], processos: int = 1) -> list[str]:
+    """
+        Calcula o hash (``make_password``) das senhas, em paralelo quando ``processos > 1``.
+
+        O PBKDF2 é limitado pela CPU, então threads não ajudam; cada processo
+        calcula uma fatia das senhas. Senhas vazias geram uma senha inutilizável
+        (sem custo de hash): o usuário define a própria pelo link do convite.
+
+        Args:
+            senhas (list[str]): Senhas em texto puro (vazias = sem senha).
+            processos (int): Processos do pool (``0`` usa todos os núcleos).
+
+        Returns:
+            list[str]: Hashes na mesma ordem de ``senhas``.
+    """
+    hashes = [make_password(None) if not senha else None for senha in senhas]
+    pendentes = [indice for indice, senha in enumerate(senhas) if senha]
+    processos = processos or os.cpu_count() or 1
+
+    if processos > 1 and len(pendentes) > 1:
+        # As conexões não podem ser compartilhadas com os processos filhos
+        connections.close_all()
+        with multiprocessing.get_context("fork").Pool(processos) as pool:
+            calculados = pool.map(make_password, [senhas[i] for i in pendentes],
+                                  chunksize=max(1, len(pendentes) // (processos * 4)))
+    else:
+        calculados = [make_password(senhas[i]) for i in pendentes]
+
+    for indice, calculado in zip(pendentes, calculados):
+        hashes[indice] = calculado
+    return hashes
+
+
+def _convite(usuario: User, url_base: str) -> tuple[str, str, str]:
+    """
+        Assunto, corpo e destinatário do convite, com o link de definição de senha do reset.
+    """
+    link = url_base.rstrip("/") + reverse("confirm_reset_senha", kwargs={
+        "uidb64": urlsafe_base64_encode(force_bytes(usuario.pk)),
+        "token": default_token_generator.make_token(usuario),
+    })
+    corpo = (
+        f"Olá {usuario.username},"
+        f"\n\nSua conta no sistema de gestão foi criada. Defina sua senha pelo link abaixo:\n\n{link}"
+        f"\n\nSe você não esperava este convite, ignore este e-mail."
+    )
+    return "Convite de acesso", corpo, usuario.email
+
+
+def provisionar_usuarios(linhas: list[tuple[int, str, str, str]], url_base: str, processos: int = 1,
+                         lote: int = LOTE_INSERCAO, convidar: bool = True) -> dict:
+    """
+        Cria usuários em lote: valida, calcula os hashes, grava com ``bulk_create`` e enfileira os convites.
+
+        A gravação é feita em uma única transação, em INSERTs de ``lote``
+        usuários; os convites entram na fila de e-mails (``enviar_emails``) na
+        mesma transação. Linhas inválidas são ignoradas e retornadas em ``erros``.
+
+        Args:
+            linhas (list): (número da linha, username, email, senha), como em ``ler_linhas_csv``.
+            url_base (str): Endereço do sistema usado no link dos convites (ex: ``https://gestao.exemplo.com``).
+            processos (int): Processos usados no hash das senhas (``0`` usa todos os núcleos).
+            lote (int): Usuários por INSERT.
+            convidar (bool): Enfileira o convite com o link para definir a senha.
+
+        Returns:
+            dict: ``criados``, ``convites`` e ``erros`` (lista de (número da linha, motivo)).
+    """
+    validas, erros = validar_lote(linhas)
+    hashes = hash_senhas([senha for _, _, _, senha in validas], processos)
+    usuarios = [
+        User(username=username, email=email, password=senha_hash)
+        for (_, username, email, _), senha_hash in zip(validas, hashes)
+    ]
+
+    with transaction.atomic():
+        User.objects.bulk_create(usuarios, batch_size=lote)
+        convites = enfileirar_emails([_convite(usuario, url_base) for usuario in usuarios]) if convidar else 0
+
+    return {"criados": len(usuarios), "convites": convites, "erros": erros}
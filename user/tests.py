@@ -1,3 +1,185 @@
-from django.test import TestCase
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import IntegrityError, connection, transaction
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
 
-# Create your tests here.
+from core.models import EmailFila
+from estoque.models import Produto, Movimentacao
+from user.provisionamento import validar_lote, provisionar_usuarios
+from user.utils import TAMANHO_PAGINA, conflitos_usuario
+
+
+class OrcamentoConsultasTest(TestCase):
+    """
+        Garante que a listagem de usuários não executa consultas por linha.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = User.objects.create_superuser("admin_teste", "admin@example.com", "senha-teste")
+
+    def setUp(self):
+        self.client.force_login(self.usuario)
+
+    def popular(self, total: int) -> None:
+        senha = make_password("senha-teste")
+        existentes = User.objects.count()
+        User.objects.bulk_create(
+            [User(username=f"usuario{i}", email=f"usuario{i}@example.com", password=senha) for i in range(existentes, total)]
+        )
+
+    def contar_consultas(self, url: str) -> int:
+        with CaptureQueriesContext(connection) as consultas:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(consultas.captured_queries)
+
+    def test_listar_usuarios(self):
+        url = reverse("listar_usuarios")
+        self.popular(10)
+        poucas_linhas = self.contar_consultas(url)
+        self.popular(1000)
+        self.assertEqual(poucas_linhas, self.contar_consultas(url))
+
+
+class ListagemUsuariosTest(TestCase):
+    """
+        Listagem de usuários paginada por keyset, com busca por prefixo e atividade por usuário.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser("admin_teste", "admin@example.com", "senha-teste")
+        User.objects.bulk_create(
+            [User(username=f"usuario{i:03d}", email=f"contato{i:03d}@example.com") for i in range(120)]
+        )
+        produto = Produto.objects.create(nome="Sensor", quantidade=10, localizacao="A1")
+        cls.operador = User.objects.get(username="usuario005")
+        Movimentacao.objects.bulk_create(
+            [Movimentacao(usuario=cls.operador, produto=produto, quantidade=1, tipo="entrada") for _ in range(3)]
+        )
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def test_paginas_por_keyset(self):
+        url = reverse("listar_usuarios")
+        primeira = self.client.get(url).context
+        self.assertEqual(len(primeira["usuarios"]), TAMANHO_PAGINA)
+        self.assertIsNone(primeira["anterior"])
+
+        segunda = self.client.get(url, {"apos": primeira["proximo"]}).context
+        self.assertEqual(segunda["usuarios"][0].id, primeira["usuarios"][-1].id + 1)
+
+        ultima = self.client.get(url, {"apos": segunda["proximo"]}).context
+        self.assertEqual(len(ultima["usuarios"]), 121 - 2 * TAMANHO_PAGINA)
+        self.assertIsNone(ultima["proximo"])
+
+        voltar = self.client.get(url, {"antes": ultima["anterior"]}).context
+        self.assertEqual([u.id for u in voltar["usuarios"]], [u.id for u in segunda["usuarios"]])
+
+    def test_busca_por_prefixo_e_atividade(self):
+        response = self.client.get(reverse("listar_usuarios"), {"q": "CONTATO005"})
+
+        usuarios = response.context["usuarios"]
+        self.assertEqual([u.username for u in usuarios], ["usuario005"])
+        self.assertEqual(usuarios[0].movimentacoes, 3)
+        self.assertIsNotNone(usuarios[0].ultima_movimentacao)
+        self.assertEqual(self.client.get(reverse("listar_usuarios"), {"q": "ontato"}).context["usuarios"], [])
+
+    def test_consultas_constantes_por_pagina(self):
+        with CaptureQueriesContext(connection) as consultas:
+            self.client.get(reverse("listar_usuarios"))
+        agrupadas = [c["sql"] for c in consultas.captured_queries if '"movimentacoes"' in c["sql"]]
+        self.assertEqual(len(agrupadas), 1)
+        self.assertIn("GROUP BY", agrupadas[0])
+
+
+class UnicidadeUsuarioTest(TestCase):
+    """
+        Username e e-mail únicos sem diferenciar maiúsculas (índices sobre LOWER(...)).
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser("Admin_Teste", "Admin@Example.com", "senha-teste")
+
+    def test_indices_recusam_variacao_de_maiusculas(self):
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            User.objects.create_user("outro", "admin@example.COM", "senha-teste")
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            User.objects.create_user("admin_teste", "outro@example.com", "senha-teste")
+
+        # E-mails vazios ficam fora do índice
+        User.objects.create_user("sem_email_1", "", "senha-teste")
+        User.objects.create_user("sem_email_2", "", "senha-teste")
+
+    def test_conflitos_em_uma_consulta(self):
+        with CaptureQueriesContext(connection) as consultas:
+            conflitos = conflitos_usuario("ADMIN_teste", "admin@EXAMPLE.com")
+
+        self.assertEqual(len(consultas.captured_queries), 1)
+        self.assertEqual(conflitos, (True, True))
+        self.assertEqual(conflitos_usuario("admin_teste", "admin@example.com", ignorar_id=self.admin.id), (False, False))
+
+    def test_criacao_pela_view_com_email_em_outra_caixa(self):
+        self.client.force_login(self.admin)
+
+        response = self.client.post(reverse("criar_usuario"), {
+            "username": "novo", "email": "ADMIN@example.com", "password": "senha-nova",
+        }, follow=True)
+
+        self.assertIn("Este e-mail já está em uso.", [str(m) for m in response.context["messages"]])
+        self.assertFalse(User.objects.filter(username="novo").exists())
+
+
+@override_settings(PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"])
+class ProvisionamentoUsuariosTest(TestCase):
+    """
+        Provisionamento em lote: validação do lote inteiro, hashes, bulk_create e convites.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser("admin_teste", "admin@example.com", "senha-teste")
+
+    def test_validacao_do_lote_em_uma_consulta_por_campo(self):
+        linhas = [(i, f"novo{i}", f"novo{i}@example.com", "") for i in range(1, 101)]
+        linhas += [(101, "admin_teste", "outro@example.com", ""), (102, "novo1", "x@example.com", ""),
+                   (103, "curta", "curta@example.com", "123"), (104, "invalido", "sem-arroba", ""),
+                   (105, "Novo2", "y@example.com", ""), (106, "z", "ADMIN@example.com", "")]
+
+        with CaptureQueriesContext(connection) as consultas:
+            validas, erros = validar_lote(linhas)
+
+        self.assertEqual(len(consultas.captured_queries), 2)
+        self.assertEqual(len(validas), 100)
+        self.assertEqual([numero for numero, _ in erros], [101, 102, 103, 104, 105, 106])
+
+    def test_cria_usuarios_com_hash_e_convite(self):
+        linhas = [(1, "ana", "ana@example.com", "senha-da-ana"), (2, "bruno", "bruno@example.com", "")]
+
+        resultado = provisionar_usuarios(linhas, "https://gestao.exemplo.com", processos=1)
+
+        self.assertEqual((resultado["criados"], resultado["convites"], resultado["erros"]), (2, 2, []))
+        self.assertTrue(User.objects.get(username="ana").check_password("senha-da-ana"))
+        self.assertFalse(User.objects.get(username="bruno").has_usable_password())
+        convite = EmailFila.objects.get(destinatario="bruno@example.com")
+        self.assertIn("https://gestao.exemplo.com/user/reset_password/", convite.corpo)
+
+    def test_importacao_pela_view(self):
+        self.client.force_login(self.admin)
+        arquivo = SimpleUploadedFile(
+            "usuarios.csv", b"username,email\ncarla,carla@example.com\ncarla,outra@example.com\ndiego,diego@example.com,senha123\n"
+        )
+
+        response = self.client.post(reverse("importar_usuarios"), {"arquivo": arquivo}, follow=True)
+
+        mensagens = [str(m) for m in response.context["messages"]]
+        self.assertIn("1 usuário(s) criado(s) e 1 convite(s) enfileirado(s).", mensagens)
+        self.assertEqual(len([m for m in mensagens if m.startswith("Linha")]), 2)
+        self.assertTrue(User.objects.filter(username="carla").exists())
+        self.assertFalse(User.objects.filter(username="diego").exists())
@@ -16,10 +16,8 @@ Including another URLconf
 """
 from django.urls import path
 
-from estoque.views import ListarEstoqueView
-from user import views
 from user.views import PedidoResetSenhaView, ConfirmacaoResetSenhaView, CriarUsuarioView, DeleteUsuarioView, \
-    EditarUsuarioView, ListarUsuariosView
+    EditarUsuarioView, ListarUsuariosView, ImportarUsuariosView
 
 urlpatterns = [
 
@@ -30,6 +28,7 @@ urlpatterns = [
     # Gestão de usuários
     path('listar/', ListarUsuariosView.as_view(), name='listar_usuarios'),
     path('criar/', CriarUsuarioView.as_view(), name='criar_usuario'),
+    path('importar/', ImportarUsuariosView.as_view(), name='importar_usuarios'),
     path('deletar/<int:usuario_id>/', DeleteUsuarioView.as_view(), name='deletar_usuario'),
     path('editar/<int:usuario_id>/', EditarUsuarioView.as_view(), name='editar_usuario'),
 
@@ -2,6 +2,53 @@ from django.contrib import messages
 from django.contrib.auth.models import User
 from django.core.exceptions import ValidationError
 from django.core.validators import validate_email
+from django.db import IntegrityError
+from django.db.models import Count, Max, Q
+from django.db.models.functions import Lower
+
+from estoque.models import Movimentacao
+
+
+def conflitos_usuario(username: str, email: str, ignorar_id: int | None = None) -> tuple[bool, bool]:
+    """
+        Verifica, sem diferenciar maiúsculas, se o username ou o e-mail já pertencem a outro usuário.
+
+        Uma única consulta combina as duas condições sobre ``LOWER(username)`` e
+        ``LOWER(email)``, as mesmas expressões dos índices únicos da migração
+        ``user.0002``, então cada condição é uma busca no índice e não uma
+        varredura da tabela. A verificação só antecipa a mensagem ao usuário: a
+        garantia é dos índices, e a gravação deve tratar o ``IntegrityError``
+        com ``mensagem_integridade``.
+
+        Args:
+            username (str): Nome de usuário.
+            email (str): Endereço de e-mail.
+            ignorar_id (int | None): Usuário desconsiderado (o próprio, na edição).
+
+        Returns:
+            tuple[bool, bool]: (username em uso, e-mail em uso).
+    """
+    condicao = Q(username_minusculo=username.lower())
+    if email:
+        condicao |= Q(email_minusculo=email.lower(), email__gt="")
+    usuarios = User.objects.alias(username_minusculo=Lower("username"), email_minusculo=Lower("email")).filter(condicao)
+    if ignorar_id is not None:
+        usuarios = usuarios.exclude(id=ignorar_id)
+
+    encontrados = list(usuarios.values_list("username", "email")[:2])
+    return (
+        any(existente.lower() == username.lower() for existente, _ in encontrados),
+        bool(email) and any(existente.lower() == email.lower() for _, existente in encontrados),
+    )
+
+
+def mensagem_integridade(erro: IntegrityError) -> str:
+    """
+        Mensagem ao usuário para a violação de unicidade de username ou e-mail detectada na gravação.
+    """
+    if "email" in str(erro).lower():
+        return "Este e-mail já está em uso."
+    return "Já existe um usuário com este nome."
 
 
 def validar_criacao_usuario(request, username: str, email: str) -> bool:
@@ -12,29 +59,29 @@ def validar_criacao_usuario(request, username: str, email: str) -> bool:
             request (HttpRequest): Requisição HTTP (para exibir mensagens).
             username (str): Nome de usuário.
             email (str): Endereço de e-mail.
-            password (str): Senha informada.
 
         Returns:
             bool: True se a validação for bem-sucedida, False caso contrário.
     """
-    if not username and not email:
+    if not username or not email:
         messages.error(request, "Todos os campos são obrigatórios.")
         return False
 
-    if User.objects.filter(username=username).exists():
-        messages.error(request, "Já existe um usuário com este nome.")
-        return False
-
-    if User.objects.filter(email=email).exists():
-        messages.error(request, "Este e-mail já está em uso.")
-        return False
-
     try:
         validate_email(email)
     except ValidationError:
         messages.error(request, "Endereço de e-mail inválido.")
         return False
 
+    username_em_uso, email_em_uso = conflitos_usuario(username, email)
+    if username_em_uso:
+        messages.error(request, "Já existe um usuário com este nome.")
+        return False
+
+    if email_em_uso:
+        messages.error(request, "Este e-mail já está em uso.")
+        return False
+
     return True
 
 def validar_edicao_usuario(request, usuario: User, username: str, email: str) -> bool:
@@ -54,22 +101,22 @@ def validar_edicao_usuario(request, usuario: User, username: str, email: str) ->
         messages.error(request, "Os campos 'Usuário' e 'E-mail' são obrigatórios.")
         return False
 
-    # Verifica duplicidade de username (ignorando o próprio)
-    if User.objects.filter(username=username).exclude(id=usuario.id).exists():
-        messages.error(request, "Já existe outro usuário com este nome.")
-        return False
-
-    # Verifica duplicidade de e-mail (ignorando o próprio)
-    if User.objects.filter(email=email).exclude(id=usuario.id).exists():
-        messages.error(request, "Já existe outro usuário com este e-mail.")
-        return False
-
     try:
         validate_email(email)
     except ValidationError:
         messages.error(request, "Endereço de e-mail inválido.")
         return False
 
+    # Verifica duplicidade de username e e-mail (ignorando o próprio)
+    username_em_uso, email_em_uso = conflitos_usuario(username, email, ignorar_id=usuario.id)
+    if username_em_uso:
+        messages.error(request, "Já existe outro usuário com este nome.")
+        return False
+
+    if email_em_uso:
+        messages.error(request, "Já existe outro usuário com este e-mail.")
+        return False
+
     return True
 
 
@@ -92,3 +139,62 @@ def validar_senha(request, senha: str) -> bool:
         return False
 
     return True
+
+
+# Usuários exibidos por página na listagem
+TAMANHO_PAGINA = 50
+
+
+def pagina_usuarios(termo: str = "", apos: int | None = None, antes: int | None = None,
+                    tamanho: int = TAMANHO_PAGINA) -> dict:
+    """
+        Busca uma página da listagem de usuários por keyset (``id > apos`` ou ``id < antes``).
+
+        O custo não depende da posição da página nem do total de usuários: a
+        página é lida pela chave primária, com ``tamanho + 1`` linhas para saber
+        se há próxima página. O termo filtra por prefixo do username ou do e-mail
+        (índices ``auth_user_*_prefixo`` da migração ``user.0001``). Total e
+        data da última movimentação de cada usuário vêm de uma única consulta
+        agrupada restrita aos usuários da página.
+
+        Args:
+            termo (str): Prefixo do username ou do e-mail (sem diferenciar maiúsculas).
+            apos (int | None): Id do último usuário da página anterior (avançar).
+            antes (int | None): Id do primeiro usuário da página seguinte (voltar).
+            tamanho (int): Usuários por página.
+
+        Returns:
+            dict: ``usuarios`` (com ``movimentacoes`` e ``ultima_movimentacao``),
+                ``proximo`` e ``anterior`` (ids para os links ou ``None``).
+    """
+    usuarios = User.objects.only("id", "username", "email", "is_active", "is_superuser")
+    if termo:
+        usuarios = usuarios.filter(Q(username__istartswith=termo) | Q(email__istartswith=termo))
+
+    if antes is not None:
+        pagina = list(usuarios.filter(id__lt=antes).order_by("-id")[:tamanho + 1])
+        ha_mais_antes = len(pagina) > tamanho
+        pagina = pagina[:tamanho][::-1]
+        ha_mais_depois = True
+    else:
+        if apos is not None:
+            usuarios = usuarios.filter(id__gt=apos)
+        pagina = list(usuarios.order_by("id")[:tamanho + 1])
+        ha_mais_depois = len(pagina) > tamanho
+        pagina = pagina[:tamanho]
+        ha_mais_antes = apos is not None
+
+    atividade = {
+        usuario_id: (total, ultima)
+        for usuario_id, total, ultima in Movimentacao.objects.filter(usuario_id__in=[u.id for u in pagina])
+        .values("usuario_id").annotate(total=Count("id"), ultima=Max("data"))
+        .values_list("usuario_id", "total", "ultima")
+    } if pagina else {}
+    for usuario in pagina:
+        usuario.movimentacoes, usuario.ultima_movimentacao = atividade.get(usuario.id, (0, None))
+
+    return {
+        "usuarios": pagina,
+        "proximo": pagina[-1].id if pagina and ha_mais_depois else None,
+        "anterior": pagina[0].id if pagina and ha_mais_antes else None,
+    }
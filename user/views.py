@@ -3,8 +3,8 @@ from django.contrib.auth.hashers import make_password
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.contrib.auth.models import User
 from django.contrib.auth.tokens import default_token_generator
-from django.core.mail import send_mail
 from django.db import transaction, IntegrityError
+from django.db.models.functions import Lower
 from django.http import HttpRequest, HttpResponse
 from django.shortcuts import render, redirect, get_object_or_404
 from django.urls import reverse
@@ -12,8 +12,13 @@ from django.utils.encoding import force_str, force_bytes
 from django.utils.http import urlsafe_base64_decode, urlsafe_base64_encode
 from django.views import View
 
+from core.email_fila import enfileirar_email
+from core.permissoes import PermissaoRequeridaMixin
+from core.replicas import LeituraReplicaMixin
 from core.utils import registrar_log
-from user.utils import validar_criacao_usuario, validar_edicao_usuario, validar_senha
+from user.provisionamento import ler_linhas_csv, provisionar_usuarios
+from user.utils import validar_criacao_usuario, validar_edicao_usuario, validar_senha, pagina_usuarios, \
+    mensagem_integridade
 
 
 class PedidoResetSenhaView(View):
@@ -49,7 +54,7 @@ class PedidoResetSenhaView(View):
             Processa o envio do link de redefinição de senha.
                 - Verifica se o e-mail existe no banco de dados.
                 - Cria um token e UID de segurança.
-                - Envia um link de redefinição de senha para o e-mail informado.
+                - Enfileira o e-mail com o link de redefinição de senha (enviado pelo worker ``enviar_emails``).
 
            Args:
                request (HttpRequest): Objeto de requisição HTTP.
@@ -60,7 +65,10 @@ class PedidoResetSenhaView(View):
         email = request.POST.get('email')
 
         try:
-            user = User.objects.get(email=email)
+            # Busca pelo índice único de LOWER(email), que não inclui e-mails vazios
+            user = User.objects.alias(email_minusculo=Lower("email")).get(
+                email_minusculo=(email or "").strip().lower(), email__gt=""
+            )
 
         except User.DoesNotExist:
             user = None
@@ -86,9 +94,9 @@ class PedidoResetSenhaView(View):
                     f"\n\nSe você não solicitou isso, ignore este e-mail."
                 )
 
-                send_mail(subject, message, None, [email])
+                # Apenas enfileira: o envio SMTP é feito pelo worker "enviar_emails", fora da requisição
+                enfileirar_email(subject, message, user.email)
                 messages.success(request, "Um link de redefinição de senha foi enviado para seu e-mail.")
-                redirect('login')
 
             except Exception as e:
                 registrar_log(request.user if request.user.is_authenticated else None, "Reset de senha", "ERROR", f"Erro ao enviar e-mail de reset:{str(e)}")
@@ -198,17 +206,22 @@ class ConfirmacaoResetSenhaView(View):
 
 
 
-class ListarUsuariosView(LoginRequiredMixin, View):
+class ListarUsuariosView(LoginRequiredMixin, PermissaoRequeridaMixin, LeituraReplicaMixin, View):
     """
-        Lista todos os usuários cadastrados no sistema.
+        Lista os usuários cadastrados no sistema, paginados e com busca por prefixo.
 
         Métodos:
-            get: Renderiza a página com a lista de usuários.
+            get: Renderiza uma página da lista de usuários.
     """
+    permissao_requerida = "auth.view_user"
+    mensagem_sem_permissao = "Você não tem permissão para listar usuários."
 
     def get(self, request: HttpRequest) -> HttpResponse:
         """
-            Exibe a página de listagem de usuários.
+            Exibe uma página da listagem de usuários com o total de movimentações e a última atividade de cada um.
+
+            Parâmetros GET: ``q`` (prefixo do username ou e-mail), ``apos`` e
+            ``antes`` (ids usados pelos links de próxima e anterior).
 
             Args:
                 request (HttpRequest): Objeto da requisição HTTP.
@@ -216,9 +229,17 @@ class ListarUsuariosView(LoginRequiredMixin, View):
             Returns:
                 HttpResponse: Página HTML com a lista de usuários.
         """
+        termo = request.GET.get("q", "").strip()
+        apos = request.GET.get("apos", "")
+        antes = request.GET.get("antes", "")
+
         try:
-            usuarios = User.objects.all()
-            return render(request, "user/listar.html", {"usuarios": usuarios})
+            pagina = pagina_usuarios(
+                termo,
+                apos=int(apos) if apos.isdigit() else None,
+                antes=int(antes) if antes.isdigit() else None,
+            )
+            return render(request, "user/listar.html", {**pagina, "termo": termo})
         except Exception as e:
             registrar_log(request.user if request.user.is_authenticated else None, "Listar Usuários", "ERROR",
                           f"Erro ao carregar a lista de usuários: {str(e)}")
@@ -226,7 +247,7 @@ class ListarUsuariosView(LoginRequiredMixin, View):
             return redirect('home')
 
 
-class CriarUsuarioView(LoginRequiredMixin, View):
+class CriarUsuarioView(LoginRequiredMixin, PermissaoRequeridaMixin, View):
     """
         Cria novos usuários no sistema.
 
@@ -234,6 +255,9 @@ class CriarUsuarioView(LoginRequiredMixin, View):
             get: Exibe o formulário de criação.
             post: Valida e salva o novo usuário.
     """
+    permissao_requerida = "auth.add_user"
+    mensagem_sem_permissao = "Você não tem permissão para criar usuários."
+    url_sem_permissao = 'listar_usuarios'
 
     def get(self, request: HttpRequest) -> HttpResponse:
         """
@@ -281,9 +305,10 @@ class CriarUsuarioView(LoginRequiredMixin, View):
             messages.success(request, "Usuário criado com sucesso!.")
             return redirect('listar_usuarios')
 
-        except IntegrityError:
-            messages.error(request, "Erro de integridaade no banco. Tente novamente.")
-            return redirect('listar_usuarios')
+        except IntegrityError as e:
+            # Cadastro simultâneo com o mesmo username/e-mail: os índices únicos recusam o segundo
+            messages.error(request, mensagem_integridade(e))
+            return redirect('criar_usuario')
 
         except Exception as e:
             registrar_log(request.user if request.user.is_authenticated else None, "Criar Usuário", "ERROR",
@@ -292,7 +317,74 @@ class CriarUsuarioView(LoginRequiredMixin, View):
         return redirect('criar_usuario')
 
 
-class EditarUsuarioView(LoginRequiredMixin, View):
+class ImportarUsuariosView(LoginRequiredMixin, PermissaoRequeridaMixin, View):
+    """
+        Cria usuários em lote a partir de um CSV ``username,email`` enviado por quem tem a permissão ``auth.add_user``.
+
+        Os usuários são criados sem senha (sem custo de hash na requisição) e
+        recebem um convite por e-mail para defini-la. Arquivos com senhas devem
+        ser importados pelo comando ``provisionar_usuarios``, que calcula os
+        hashes em um pool de processos.
+
+        Métodos:
+            get: Exibe o formulário de envio.
+            post: Valida o arquivo e cria os usuários.
+    """
+    permissao_requerida = "auth.add_user"
+    mensagem_sem_permissao = "Você não tem permissão para importar usuários."
+    url_sem_permissao = 'listar_usuarios'
+
+    # Erros de linha exibidos como mensagem após a importação
+    LIMITE_ERROS_EXIBIDOS = 20
+
+    def get(self, request: HttpRequest) -> HttpResponse:
+        """
+            Exibe o formulário de importação.
+        """
+        return render(request, "user/importar.html")
+
+    def post(self, request: HttpRequest) -> HttpResponse:
+        """
+            Cria os usuários do arquivo enviado e enfileira os convites.
+
+            Args:
+                request (django.http.HttpRequest): Objeto da requisição HTTP.
+
+            Returns:
+                django.http.HttpResponse: Redireciona para a listagem após a importação.
+        """
+        arquivo = request.FILES.get("arquivo")
+        if not arquivo:
+            messages.error(request, "Selecione um arquivo CSV.")
+            return redirect('importar_usuarios')
+
+        try:
+            linhas = ler_linhas_csv(arquivo.file)
+            com_senha = [(numero, "informe as senhas pelo comando provisionar_usuarios") for numero, *_, senha in linhas if senha]
+            linhas = [linha for linha in linhas if not linha[3]]
+            resultado = provisionar_usuarios(linhas, request.build_absolute_uri("/"))
+
+        except IntegrityError:
+            messages.error(request, "Usuários do arquivo foram criados por outra operação. Envie o arquivo novamente.")
+            return redirect('importar_usuarios')
+
+        except Exception as e:
+            registrar_log(request.user, "Importar Usuários", "ERROR", f"Erro ao importar usuários: {str(e)}")
+            messages.error(request, f"Erro ao importar usuários: {str(e)}")
+            return redirect('importar_usuarios')
+
+        erros = sorted(resultado["erros"] + com_senha)
+        registrar_log(request.user, "Importar Usuários", "SUCESSO",
+                      f"{resultado['criados']} usuário(s) criado(s), {len(erros)} linha(s) recusada(s).")
+        messages.success(request, f"{resultado['criados']} usuário(s) criado(s) e {resultado['convites']} convite(s) enfileirado(s).")
+        for numero, motivo in erros[:self.LIMITE_ERROS_EXIBIDOS]:
+            messages.warning(request, f"Linha {numero}: {motivo}.")
+        if len(erros) > self.LIMITE_ERROS_EXIBIDOS:
+            messages.warning(request, f"Outras {len(erros) - self.LIMITE_ERROS_EXIBIDOS} linha(s) recusada(s).")
+        return redirect('listar_usuarios')
+
+
+class EditarUsuarioView(LoginRequiredMixin, PermissaoRequeridaMixin, View):
     """
         View responsável por editar informações de um usuário existente.
 
@@ -300,6 +392,9 @@ class EditarUsuarioView(LoginRequiredMixin, View):
             get: Exibe o formulário de edição.
             post: Aplica as alterações e salva no banco.
     """
+    permissao_requerida = "auth.change_user"
+    mensagem_sem_permissao = "Você não tem permissão para editar usuários."
+    url_sem_permissao = 'listar_usuarios'
 
     def get(self, request: HttpRequest, usuario_id) -> HttpResponse:
         """
@@ -335,6 +430,10 @@ class EditarUsuarioView(LoginRequiredMixin, View):
                 HttpResponse: Redireciona após sucesso ou erro.
         """
         usuario = get_object_or_404(User, id=usuario_id)
+        if usuario.is_superuser and not request.user.is_superuser:
+            messages.error(request, "Apenas superusuários podem editar superusuários.")
+            return redirect('listar_usuarios')
+
         username = request.POST.get('username','').strip()
         email = request.POST.get('email','').strip()
         senha = request.POST.get('senha','').strip()
@@ -353,10 +452,15 @@ class EditarUsuarioView(LoginRequiredMixin, View):
                 usuario.set_password(senha)
                 messages.error(request, f"Senha do usuário '{usuario.username}' alterada.")
 
-            usuario.save()
+            with transaction.atomic():
+                usuario.save()
             messages.success(request, "Usuário atualizado com sucesso!")
             return redirect('listar_usuarios')
 
+        except IntegrityError as e:
+            messages.error(request, mensagem_integridade(e))
+            return redirect('editar_usuario', usuario_id=usuario_id)
+
         except Exception as e:
             registrar_log(request.user if request.user.is_authenticated else None, "Editar Usuário", "ERROR",
                           f"Erro ao atualizar usuário: {str(e)}")
@@ -364,7 +468,7 @@ class EditarUsuarioView(LoginRequiredMixin, View):
         return redirect('listar_usuarios')
 
 
-class DeleteUsuarioView(LoginRequiredMixin, View):
+class DeleteUsuarioView(LoginRequiredMixin, PermissaoRequeridaMixin, View):
     """
          View responsável por excluir usuários do sistema.
 
@@ -372,6 +476,9 @@ class DeleteUsuarioView(LoginRequiredMixin, View):
              get: Exibe a página de confirmação de exclusão.
              post: Remove o usuário do banco de dados.
      """
+    permissao_requerida = "auth.delete_user"
+    mensagem_sem_permissao = "Você não tem permissão para excluir usuários."
+    url_sem_permissao = 'listar_usuarios'
 
     def get(self, request: HttpRequest, usuario_id) -> HttpResponse:
         """
@@ -412,8 +519,8 @@ class DeleteUsuarioView(LoginRequiredMixin, View):
             messages.error(request, "O usuário 'admin' não pode ser excluído.")
             return redirect('listar_usuarios')
 
-        if not request.user.is_superuser:
-            messages.error(request, "Apenas superusuários podem excluir usuários.")
+        if usuario.is_superuser and not request.user.is_superuser:
+            messages.error(request, "Apenas superusuários podem excluir superusuários.")
             return redirect('listar_usuarios')
         try:
             usuario.delete()